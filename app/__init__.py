@@ -1,24 +1,46 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from config import Config
+from app.services.cache import Cache
+from app.services.assets import Assets
+from app.services.metrics import Metrics
+from app.services.replica import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # see app/services/replica.py
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
-migrate = Migrate()
+cache = Cache()
+assets = Assets()
+metrics = Metrics()
+
+def init_migrate(app):
+    """
+    Set up Flask-Migrate on `app` and return its config. Importing it pulls in
+    Alembic, so this runs only for `flask db` (see app/commands.py) and when
+    app/services/schema.py has migrations to apply, not on every startup.
+    """
+    if 'migrate' not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
+    return app.extensions['migrate']
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.config.setdefault('JOB_OUTPUT_DIR', os.path.join(app.instance_path, 'jobs'))
+    app.config.setdefault('PHOTO_STAGING_DIR', os.path.join(app.config['JOB_OUTPUT_DIR'], 'photo_uploads'))
+    app.config.setdefault('RECEIPT_DIR', os.path.join(app.instance_path, 'receipts'))
 
     # Initialize extensions with app
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    cache.init_app(app)
+    assets.init_app(app)
+    metrics.init_app(app)
 
     # Import and register blueprints
     from app.routes.auth import auth
@@ -39,6 +61,21 @@ def create_app(config_class=Config):
     
     # Import models to ensure they are registered with SQLAlchemy
     from app import models
-    
+
+    from app.services.identity import identity_cache
+    identity_cache.init_app(app)
+
+    from app.services.images import photo_urls
+    app.add_template_global(photo_urls)
+
+    from app.services.loading import init_lazy_load_detector
+    init_lazy_load_detector(app)
+
+    from app.services.jobs import init_job_executor
+    init_job_executor(app)
+
+    from app.commands import register_commands
+    register_commands(app)
+
     return app
 
@@ -0,0 +1,106 @@
+"""
+Flask CLI commands (run with `flask <command>`).
+"""
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+@click.command('rebuild-attendance-summary')
+@click.option('--from', 'date_from', help='First date to rebuild (YYYY-MM-DD).')
+@click.option('--to', 'date_to', help='Last date to rebuild (YYYY-MM-DD).')
+def rebuild_attendance_summary_command(date_from, date_to):
+    """Backfill the attendance daily summary table from raw attendance."""
+    from app.services.attendance_summary import rebuild_attendance_summary
+    rows = rebuild_attendance_summary(_parse_date(date_from), _parse_date(date_to))
+    click.echo(f"Attendance summary rebuilt: {rows} rows written.")
+
+
+@click.command('generate-data')
+@click.option('--seed', default=42, show_default=True, help='Random seed; the same seed gives the same data.')
+@click.option('--departments', default=4, show_default=True, type=click.IntRange(1))
+@click.option('--classes-per-department', default=4, show_default=True, type=click.IntRange(1))
+@click.option('--students-per-class', default=40, show_default=True, type=click.IntRange(1))
+@click.option('--teachers-per-department', default=6, show_default=True, type=click.IntRange(1))
+@click.option('--subjects-per-department', default=5, show_default=True, type=click.IntRange(1))
+@click.option('--days', default=365, show_default=True, type=click.IntRange(0), help='Days of attendance.')
+@click.option('--exams', default=4, show_default=True, type=click.IntRange(0))
+@click.option('--books', default=500, show_default=True, type=click.IntRange(0))
+@click.option('--end-date', help='Last day of the generated year (YYYY-MM-DD, default today).')
+@with_appcontext
+def generate_data_command(seed, departments, classes_per_department, students_per_class, teachers_per_department,
+                          subjects_per_department, days, exams, books, end_date):
+    """Fill the database with a deterministic synthetic school (see app/services/synthetic.py)."""
+    from app.services.synthetic import PASSWORD, generate_dataset
+    counts = generate_dataset(seed=seed, departments=departments, classes_per_department=classes_per_department,
+                              students_per_class=students_per_class, teachers_per_department=teachers_per_department,
+                              subjects_per_department=subjects_per_department, days=days, exams=exams, books=books,
+                              end_date=_parse_date(end_date), log=click.echo)
+    click.echo(f"Synthetic data committed: {sum(counts.values())} rows. "
+               f"Generated accounts (teacher<id>, student<id>) use the password '{PASSWORD}'.")
+
+
+@click.group('jobs')
+def jobs_group():
+    """Background job queue (see app/services/jobs.py)."""
+
+
+@jobs_group.command('worker')
+@click.option('--processes', '-p', default=1, show_default=True, help='Worker processes to run.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds between polls of an empty queue.')
+@click.option('--burst', is_flag=True, help='Exit once no job is due instead of waiting for more.')
+@with_appcontext
+def jobs_worker_command(processes, poll_interval, burst):
+    """Run queued jobs until stopped with Ctrl-C or SIGTERM."""
+    from app.services.jobs import run_workers
+    click.echo(f"Starting {processes} job worker(s).")
+    run_workers(current_app._get_current_object(), processes, poll_interval, burst)
+
+
+@click.group('assets')
+def assets_group():
+    """Fingerprinted static assets (see app/services/assets.py)."""
+
+
+@assets_group.command('build')
+@with_appcontext
+def assets_build_command():
+    """Write hashed, pre-compressed copies of app/static into static/dist."""
+    from app.services.assets import build_assets
+    manifest = build_assets(current_app.static_folder, current_app.config['ASSETS_DIST'])
+    for path, hashed in sorted(manifest.items()):
+        click.echo(f"{path} -> {hashed}")
+    click.echo(f"{len(manifest)} assets built; restart the app to serve them.")
+
+
+class MigrateGroup(click.Group):
+    """`flask db`, with Flask-Migrate (and Alembic) loaded only when the group is used."""
+
+    def __init__(self, app):
+        super().__init__('db', help='Perform database migrations (Flask-Migrate).')
+        self.app = app
+
+    def _commands(self):
+        from app import init_migrate
+        init_migrate(self.app)
+        from flask_migrate.cli import db
+        return db
+
+    def list_commands(self, ctx):
+        return self._commands().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._commands().get_command(ctx, name)
+
+
+def register_commands(app):
+    app.cli.add_command(rebuild_attendance_summary_command)
+    app.cli.add_command(generate_data_command)
+    app.cli.add_command(jobs_group)
+    app.cli.add_command(assets_group)
+    app.cli.add_command(MigrateGroup(app))
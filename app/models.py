@@ -1,18 +1,21 @@
 from datetime import datetime
 from flask_login import UserMixin
 from app import db, login_manager
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.identity import identity_cache
+from app.services.passwords import hash_password, password_needs_rehash
+from werkzeug.security import check_password_hash
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Cached snapshot of id/username/role/is_approved; see app/services/identity.py
+    return identity_cache.load(int(user_id))
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))  # room for scrypt hashes
     role = db.Column(db.String(20), nullable=False)  # 'admin', 'teacher', 'student'
     is_approved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -21,12 +24,21 @@ class User(db.Model, UserMixin):
     student_profile = db.relationship('Student', backref='user', uselist=False, lazy=True)
     teacher_profile = db.relationship('Teacher', backref='user', uselist=False, lazy=True)
 
+    __table_args__ = (
+        # auth.login matches lower(email) / lower(username)
+        db.Index('ix_users_email_lower', db.func.lower(email)),
+        db.Index('ix_users_username_lower', db.func.lower(username)),
+    )
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def password_needs_rehash(self):
+        return password_needs_rehash(self.password_hash)
+
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -61,8 +73,8 @@ class Subject(db.Model):
 class Teacher(db.Model):
     __tablename__ = 'teachers'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), index=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     qualification = db.Column(db.String(100))
@@ -77,9 +89,9 @@ class Teacher(db.Model):
 class Student(db.Model):
     __tablename__ = 'students'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=True)
-    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=True, index=True)
+    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), index=True)
     
     # Personal Info
     first_name = db.Column(db.String(50), nullable=False)
@@ -108,6 +120,14 @@ class Student(db.Model):
     marks = db.relationship('Mark', backref='student', lazy=True)
     fees = db.relationship('Fee', backref='student', lazy=True)
 
+# Number of enrolled students, for list views that only need the count.
+# Deferred: views opt in with undefer(Class.student_count) (see app/services/loading.py).
+Class.student_count = db.column_property(
+    db.select(db.func.count(Student.id)).where(Student.class_id == Class.id)
+    .correlate_except(Student).scalar_subquery(),
+    deferred=True
+)
+
 class Attendance(db.Model):
     __tablename__ = 'attendance'
     id = db.Column(db.Integer, primary_key=True)
@@ -116,6 +136,33 @@ class Attendance(db.Model):
     status = db.Column(db.String(20), nullable=False) # 'Present', 'Absent', 'Late'
     remarks = db.Column(db.String(255))
 
+    __table_args__ = (
+        # One record per student per day; also serves the (student_id, date) lookups
+        db.Index('uq_attendance_student_date', 'student_id', 'date', unique=True),
+        db.Index('ix_attendance_date_status', 'date', 'status'),
+    )
+
+class AttendanceDailySummary(db.Model):
+    # Rollup of Attendance per day, class and department (maintained incrementally)
+    __tablename__ = 'attendance_daily_summary'
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    # NO_CLASS / NO_DEPARTMENT (0) stand for students without one: NULLs never conflict in the
+    # unique key, so they would allow duplicate rows. Hence no foreign keys on these two.
+    class_id = db.Column(db.Integer, nullable=False, default=0)
+    department_id = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    late = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('date', 'class_id', 'department_id', name='uq_attendance_summary_key'),
+    )
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.late
+
 class Exam(db.Model):
     __tablename__ = 'exams'
     id = db.Column(db.Integer, primary_key=True)
@@ -133,27 +180,41 @@ class Mark(db.Model):
     score_obtained = db.Column(db.Float, nullable=False)
     max_score = db.Column(db.Float, nullable=False)
 
+    __table_args__ = (
+        # One score per student, subject and exam
+        db.Index('uq_marks_student_subject_exam', 'student_id', 'subject_id', 'exam_id', unique=True),
+        db.Index('ix_marks_exam_subject', 'exam_id', 'subject_id'),
+    )
+
 class Fee(db.Model):
     __tablename__ = 'fees'
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
     title = db.Column(db.String(100), nullable=False) # e.g. "Term 1 Fee"
     amount = db.Column(db.Float, nullable=False)
     due_date = db.Column(db.Date)
     status = db.Column(db.String(20), default='Pending') # 'Paid', 'Pending', 'Overdue'
     paid_date = db.Column(db.Date)
 
+    __table_args__ = (
+        db.Index('ix_fees_status_due_date', 'status', 'due_date'),
+    )
+
 class TimeTable(db.Model):
     # Mapping Table: Class + Subject + Teacher + Time (Simple version)
     __tablename__ = 'timetable'
     id = db.Column(db.Integer, primary_key=True)
-    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False, index=True)
     subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), nullable=False)
     teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'), nullable=False)
     day_of_week = db.Column(db.String(20)) # Monday, Tuesday...
     start_time = db.Column(db.Time)
     end_time = db.Column(db.Time)
 
+    __table_args__ = (
+        db.Index('ix_timetable_teacher_day', 'teacher_id', 'day_of_week'),
+    )
+
 # ============================================
 # NEW FEATURES MODELS
 # ============================================
@@ -221,7 +282,7 @@ class Department(db.Model):
     name = db.Column(db.String(100), nullable=False)  # e.g., 'Science', 'Commerce', 'Arts', 'Sports'
     code = db.Column(db.String(20), unique=True)
     description = db.Column(db.Text)
-    head_teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'))
+    head_teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id', use_alter=True, name='fk_departments_head_teacher_id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     head_teacher = db.relationship('Teacher', backref='headed_department', foreign_keys=[head_teacher_id])
@@ -276,3 +337,31 @@ class IDCard(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     
     student = db.relationship('Student', backref='id_card')
+
+# ============================================
+# BACKGROUND JOBS
+# ============================================
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(200), nullable=False)  # 'module:function', see app/services/jobs.py
+    description = db.Column(db.String(200))
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON keyword arguments
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # not before (retry backoff)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)  # claim time, refreshed on every progress report
+    result = db.Column(db.Text)  # JSON returned by the task
+    error = db.Column(db.Text)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Workers claim the oldest due job: WHERE status = 'queued' AND run_at <= now
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
@@ -1,10 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, current_app, abort, send_file
 from flask_login import login_required, current_user
-from app.models import User, Student, Teacher, Class, Subject, Exam, Attendance, Fee, Announcement, Book, BookIssue, TimeTable, Department, Event, Homework, IDCard
-from app import db
+from app.models import User, Student, Teacher, Class, Subject, Exam, Mark, Attendance, AttendanceDailySummary, Fee, Announcement, Book, BookIssue, TimeTable, Department, Event, Homework, IDCard, Job
+from app import db, cache
+from app.services.attendance import load_class_attendance, save_class_attendance
+from app.services.dashboard import dashboard_stats
+from app.services.exports import stream_csv, class_label, date_or
+from app.services.images import InvalidImageError, check_photo, save_student_photo
+from app.services import loading
+from app.services.pagination import paginate, apply_search, apply_filters
+from app.services.replica import read_replica
 from datetime import datetime, timedelta
-import io
-import csv
+from sqlalchemy import func, select
 
 admin = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -24,35 +30,13 @@ def admin_required(f):
 @admin.route('/dashboard')
 @login_required
 @admin_required
+@cache.cached_view(depends_on=(User, Student, Teacher, Class, Subject, Exam, Attendance, Fee, Announcement))
 def dashboard():
-    stats = {
-        'students': Student.query.count(),
-        'teachers': Teacher.query.count(),
-        'classes': Class.query.count(),
-        'subjects': Subject.query.count(),
-        'exams': Exam.query.count(),
-        'users': User.query.count()
-    }
+    # Counts, fee status and the 7-day attendance chart in three grouped queries
+    stats, fee_stats, attendance_data = dashboard_stats()
     recent_students = Student.query.order_by(Student.id.desc()).limit(5).all()
     announcements = Announcement.query.filter_by(is_active=True).order_by(Announcement.created_at.desc()).limit(5).all()
-    
-    # Chart data
-    fee_stats = {
-        'paid': Fee.query.filter_by(status='Paid').count(),
-        'pending': Fee.query.filter_by(status='Pending').count(),
-        'overdue': Fee.query.filter_by(status='Overdue').count()
-    }
-    
-    # Attendance last 7 days
-    from datetime import date, timedelta
-    today = date.today()
-    attendance_data = []
-    for i in range(6, -1, -1):
-        d = today - timedelta(days=i)
-        present = Attendance.query.filter_by(date=d, status='Present').count()
-        absent = Attendance.query.filter_by(date=d, status='Absent').count()
-        attendance_data.append({'date': d.strftime('%a'), 'present': present, 'absent': absent})
-    
+
     return render_template('admin/dashboard.html', 
                            stats=stats, 
                            recent_students=recent_students,
@@ -67,17 +51,38 @@ def dashboard():
 @login_required
 @admin_required
 def students():
-    students = Student.query.all()
+    query = apply_search(Student.query.options(*loading.STUDENT_LIST), request.args.get('q'),
+                         [Student.first_name, Student.last_name, Student.roll_no, Student.enrollment_no])
+    query = apply_filters(query, request.args, {'department_id': Student.department_id, 'class_id': Student.class_id})
+    page = paginate(query, request.args,
+                    sort_fields={'roll_no': Student.roll_no, 'name': Student.first_name,
+                                 'admission_date': Student.admission_date, 'id': Student.id},
+                    default_sort='roll_no', id_column=Student.id)
     departments = Department.query.all()
-    return render_template('admin/students/list.html', students=students, departments=departments)
+    classes = Class.query.all()
+    return render_template('admin/students/list.html', students=page.items, page=page,
+                           departments=departments, classes=classes)
+
+def uploaded_photo():
+    """Check the form's photo upload, if any; returns an UploadedPhoto or None."""
+    photo = request.files.get('photo')
+    if not photo or not photo.filename:
+        return None
+    return check_photo(photo)
 
 @admin.route('/students/add', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def add_student():
-    classes = Class.query.all()
+    classes = Class.query.options(*loading.CLASS_OPTIONS).all()
     departments = Department.query.all()
     if request.method == 'POST':
+        try:
+            photo = uploaded_photo()
+        except InvalidImageError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('admin.add_student'))
+
         user = User(
             username=request.form['username'],
             email=request.form['email'],
@@ -107,6 +112,8 @@ def add_student():
         )
         db.session.add(student)
         db.session.commit()
+        if photo:
+            save_student_photo(student.id, photo, user_id=current_user.id)
         flash('Student added successfully!', 'success')
         return redirect(url_for('admin.students'))
     return render_template('admin/students/form.html', classes=classes, departments=departments, student=None)
@@ -116,9 +123,16 @@ def add_student():
 @admin_required
 def edit_student(id):
     student = Student.query.get_or_404(id)
-    classes = Class.query.all()
+    classes = Class.query.options(*loading.CLASS_OPTIONS).all()
     departments = Department.query.all()
     if request.method == 'POST':
+        # Photo is checked here and resized by a background job (see app/services/images.py)
+        try:
+            photo = uploaded_photo()
+        except InvalidImageError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('admin.edit_student', id=student.id))
+
         student.first_name = request.form['first_name']
         student.last_name = request.form['last_name']
         student.roll_no = request.form['roll_no']
@@ -134,19 +148,9 @@ def edit_student(id):
         student.parent_phone = request.form.get('parent_phone')
         student.admission_date = datetime.strptime(request.form['admission_date'], '%Y-%m-%d').date() if request.form.get('admission_date') else None
         
-        # Handle photo upload
-        if 'photo' in request.files:
-            photo = request.files['photo']
-            if photo and photo.filename:
-                import os
-                from werkzeug.utils import secure_filename
-                filename = secure_filename(f"student_{student.id}_{photo.filename}")
-                upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'photos', filename)
-                os.makedirs(os.path.dirname(upload_path), exist_ok=True)
-                photo.save(upload_path)
-                student.photo_file = filename
-        
         db.session.commit()
+        if photo:
+            save_student_photo(student.id, photo, user_id=current_user.id)
         flash('Student updated successfully!', 'success')
         return redirect(url_for('admin.students'))
     return render_template('admin/students/form.html', classes=classes, departments=departments, student=student)
@@ -167,17 +171,17 @@ def delete_student(id):
 @admin.route('/students/export')
 @login_required
 @admin_required
+@read_replica
 def export_students():
-    students = Student.query.all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Roll No', 'First Name', 'Last Name', 'Class', 'Gender', 'Parent Name', 'Parent Phone'])
-    for s in students:
-        writer.writerow([s.id, s.roll_no, s.first_name, s.last_name, 
-                         f"{s.enrolled_class.grade}-{s.enrolled_class.section}" if s.enrolled_class else 'N/A',
-                         s.gender or '', s.parent_name or '', s.parent_phone or ''])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=students.csv'})
+    statement = select(
+        Student.id, Student.roll_no, Student.first_name, Student.last_name, Class.grade, Class.section,
+        Student.gender, Student.parent_name, Student.parent_phone
+    ).outerjoin(Class, Class.id == Student.class_id).order_by(Student.id)
+    return stream_csv('students.csv',
+                      ['ID', 'Roll No', 'First Name', 'Last Name', 'Class', 'Gender', 'Parent Name', 'Parent Phone'],
+                      statement,
+                      lambda r: [r.id, r.roll_no, r.first_name, r.last_name, class_label(r.grade, r.section),
+                                 r.gender or '', r.parent_name or '', r.parent_phone or ''])
 
 # ============================================
 # TEACHERS CRUD
@@ -186,9 +190,14 @@ def export_students():
 @login_required
 @admin_required
 def teachers():
-    teachers = Teacher.query.all()
+    query = apply_search(Teacher.query.options(*loading.TEACHER_LIST), request.args.get('q'),
+                         [Teacher.first_name, Teacher.last_name, Teacher.specialization])
+    query = apply_filters(query, request.args, {'department_id': Teacher.department_id})
+    page = paginate(query, request.args,
+                    sort_fields={'name': Teacher.first_name, 'joining_date': Teacher.joining_date, 'id': Teacher.id},
+                    default_sort='name', id_column=Teacher.id)
     departments = Department.query.all()
-    return render_template('admin/teachers/list.html', teachers=teachers, departments=departments)
+    return render_template('admin/teachers/list.html', teachers=page.items, page=page, departments=departments)
 
 @admin.route('/teachers/add', methods=['GET', 'POST'])
 @login_required
@@ -261,7 +270,7 @@ def delete_teacher(id):
 @login_required
 @admin_required
 def classes():
-    classes = Class.query.all()
+    classes = Class.query.options(*loading.CLASS_LIST).all()
     departments = Department.query.all()
     return render_template('admin/classes/list.html', classes=classes, departments=departments)
 
@@ -270,7 +279,7 @@ def classes():
 @admin_required
 def add_class():
     departments = Department.query.all()
-    teachers = Teacher.query.all()
+    teachers = Teacher.query.options(*loading.TEACHER_LIST).all()
     if request.method == 'POST':
         cls = Class(
             grade=request.form['grade'],
@@ -290,7 +299,7 @@ def add_class():
 def edit_class(id):
     cls = Class.query.get_or_404(id)
     departments = Department.query.all()
-    teachers = Teacher.query.all()
+    teachers = Teacher.query.options(*loading.TEACHER_LIST).all()
     if request.method == 'POST':
         cls.grade = request.form['grade']
         cls.section = request.form['section']
@@ -318,7 +327,7 @@ def delete_class(id):
 @login_required
 @admin_required
 def subjects():
-    subjects = Subject.query.all()
+    subjects = Subject.query.options(*loading.SUBJECT_LIST).all()
     departments = Department.query.all()
     return render_template('admin/subjects/list.html', subjects=subjects, departments=departments)
 
@@ -396,12 +405,12 @@ def add_exam():
 @login_required
 @admin_required
 def attendance_report():
-    classes = Class.query.all()
+    classes = Class.query.options(*loading.CLASS_OPTIONS).all()
     departments = Department.query.all()
     selected_class = request.args.get('class_id')
     selected_date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
     
-    query = Attendance.query
+    query = Attendance.query.options(*loading.ATTENDANCE_LIST)
     if selected_class:
         query = query.join(Student).filter(Student.class_id == selected_class)
     if selected_date:
@@ -419,7 +428,7 @@ def attendance_report():
 @login_required
 @admin_required
 def mark_attendance():
-    classes = Class.query.all()
+    classes = Class.query.options(*loading.CLASS_OPTIONS).all()
     selected_class = request.args.get('class_id')
     selected_date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
     students = []
@@ -428,25 +437,15 @@ def mark_attendance():
     if selected_class:
         students = Student.query.filter_by(class_id=selected_class).order_by(Student.roll_no).all()
         date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-        for s in students:
-            att = Attendance.query.filter_by(student_id=s.id, date=date_obj).first()
-            if att:
-                existing_attendance[s.id] = att.status
+        existing_attendance = load_class_attendance(selected_class, date_obj)
     
     if request.method == 'POST':
         date_obj = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
         class_id = request.form['class_id']
         students = Student.query.filter_by(class_id=class_id).all()
         
-        for student in students:
-            status = request.form.get(f'status_{student.id}', 'Absent')
-            existing = Attendance.query.filter_by(student_id=student.id, date=date_obj).first()
-            if existing:
-                existing.status = status
-            else:
-                att = Attendance(student_id=student.id, date=date_obj, status=status)
-                db.session.add(att)
-        
+        statuses = {student.id: request.form.get(f'status_{student.id}', 'Absent') for student in students}
+        save_class_attendance(class_id, date_obj, students, statuses)
         db.session.commit()
         flash(f'Attendance marked for {len(students)} students!', 'success')
         return redirect(url_for('admin.attendance_report', class_id=class_id, date=request.form['date']))
@@ -461,35 +460,31 @@ def mark_attendance():
 @admin.route('/attendance/export')
 @login_required
 @admin_required
+@read_replica
 def export_attendance():
     class_id = request.args.get('class_id')
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
     
-    query = Attendance.query.join(Student)
+    statement = select(
+        Attendance.date, Attendance.status, Student.roll_no, Student.first_name, Student.last_name,
+        Class.grade, Class.section, Department.name.label('department')
+    ).join(Student, Student.id == Attendance.student_id) \
+        .outerjoin(Class, Class.id == Student.class_id) \
+        .outerjoin(Department, Department.id == Student.department_id)
     if class_id:
-        query = query.filter(Student.class_id == class_id)
+        statement = statement.where(Student.class_id == class_id)
     if date_from:
-        query = query.filter(Attendance.date >= datetime.strptime(date_from, '%Y-%m-%d').date())
+        statement = statement.where(Attendance.date >= datetime.strptime(date_from, '%Y-%m-%d').date())
     if date_to:
-        query = query.filter(Attendance.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
+        statement = statement.where(Attendance.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
+    statement = statement.order_by(Attendance.date.desc())
     
-    attendance = query.order_by(Attendance.date.desc()).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Date', 'Roll No', 'Student Name', 'Class', 'Department', 'Status'])
-    for a in attendance:
-        writer.writerow([
-            a.date.strftime('%Y-%m-%d'),
-            a.student.roll_no,
-            f"{a.student.first_name} {a.student.last_name}",
-            f"{a.student.enrolled_class.grade}-{a.student.enrolled_class.section}" if a.student.enrolled_class else 'N/A',
-            a.student.department.name if a.student.department else 'N/A',
-            a.status
-        ])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=attendance.csv'})
+    return stream_csv('attendance.csv',
+                      ['Date', 'Roll No', 'Student Name', 'Class', 'Department', 'Status'],
+                      statement,
+                      lambda r: [r.date.strftime('%Y-%m-%d'), r.roll_no, f"{r.first_name} {r.last_name}",
+                                 class_label(r.grade, r.section), r.department or 'N/A', r.status])
 
 # ============================================
 # FEES MANAGEMENT
@@ -498,37 +493,51 @@ def export_attendance():
 @login_required
 @admin_required
 def fees_management():
-    fees = Fee.query.order_by(Fee.due_date.desc()).all()
     status_filter = request.args.get('status')
-    if status_filter:
-        fees = Fee.query.filter_by(status=status_filter).order_by(Fee.due_date.desc()).all()
-    return render_template('admin/fees/list.html', fees=fees, status_filter=status_filter)
+    query = apply_search(Fee.query.join(Student).options(*loading.FEE_LIST), request.args.get('q'),
+                         [Fee.title, Student.first_name, Student.last_name, Student.roll_no])
+    query = apply_filters(query, request.args, {'status': Fee.status, 'department_id': Student.department_id,
+                                                'class_id': Student.class_id})
+    page = paginate(query, request.args,
+                    sort_fields={'due_date': Fee.due_date, 'amount': Fee.amount, 'id': Fee.id},
+                    default_sort='due_date', id_column=Fee.id, default_direction='desc')
+    return render_template('admin/fees/list.html', fees=page.items, page=page, status_filter=status_filter)
 
 @admin.route('/fees/export')
 @login_required
 @admin_required
+@read_replica
 def export_fees():
     status = request.args.get('status')
-    query = Fee.query
+    statement = select(
+        Fee.id, Fee.amount, Fee.due_date, Fee.status, Fee.paid_date,
+        Student.first_name, Student.last_name, Student.roll_no
+    ).join(Student, Student.id == Fee.student_id)
     if status:
-        query = query.filter_by(status=status)
-    fees = query.order_by(Fee.due_date.desc()).all()
+        statement = statement.where(Fee.status == status)
+    statement = statement.order_by(Fee.due_date.desc())
     
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Student', 'Roll No', 'Amount', 'Due Date', 'Status', 'Paid Date'])
-    for f in fees:
-        writer.writerow([
-            f.id,
-            f"{f.student.first_name} {f.student.last_name}",
-            f.student.roll_no,
-            f.amount,
-            f.due_date.strftime('%Y-%m-%d') if f.due_date else 'N/A',
-            f.status,
-            f.paid_date.strftime('%Y-%m-%d') if f.paid_date else 'N/A'
-        ])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=fees.csv'})
+    return stream_csv('fees.csv',
+                      ['ID', 'Student', 'Roll No', 'Amount', 'Due Date', 'Status', 'Paid Date'],
+                      statement,
+                      lambda r: [r.id, f"{r.first_name} {r.last_name}", r.roll_no, r.amount,
+                                 date_or(r.due_date), r.status, date_or(r.paid_date)])
+
+@admin.route('/fees/receipts')
+@login_required
+@admin_required
+def export_receipts():
+    """Queue a zip of the receipts of every fee paid in a term (paid date range, optionally one fee title)."""
+    from app.services.receipts import start_term_export
+
+    try:
+        job = start_term_export(request.args.get('paid_from') or None, request.args.get('paid_to') or None,
+                                request.args.get('title') or None, user_id=current_user.id)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        return redirect(url_for('admin.fees_management'))
+    flash('Receipt export queued.', 'success')
+    return redirect(url_for('admin.job_detail', job_id=job.id))
 
 # ============================================
 # USERS
@@ -537,8 +546,12 @@ def export_fees():
 @login_required
 @admin_required
 def users():
-    users = User.query.all()
-    return render_template('admin/users/list.html', users=users)
+    query = apply_search(User.query, request.args.get('q'), [User.username, User.email])
+    query = apply_filters(query, request.args, {'role': User.role})
+    page = paginate(query, request.args,
+                    sort_fields={'username': User.username, 'created_at': User.created_at, 'id': User.id},
+                    default_sort='id', id_column=User.id)
+    return render_template('admin/users/list.html', users=page.items, page=page)
 
 @admin.route('/users/approvals')
 @login_required
@@ -589,8 +602,14 @@ def reject_user(id):
 @login_required
 @admin_required
 def announcements():
-    announcements = Announcement.query.order_by(Announcement.created_at.desc()).all()
-    return render_template('admin/announcements/list.html', announcements=announcements)
+    query = apply_search(Announcement.query, request.args.get('q'), [Announcement.title])
+    query = apply_filters(query, request.args, {'priority': Announcement.priority,
+                                                'target_role': Announcement.target_role})
+    page = paginate(query, request.args,
+                    sort_fields={'created_at': Announcement.created_at, 'title': Announcement.title,
+                                 'id': Announcement.id},
+                    default_sort='created_at', id_column=Announcement.id, default_direction='desc')
+    return render_template('admin/announcements/list.html', announcements=page.items, page=page)
 
 @admin.route('/announcements/add', methods=['GET', 'POST'])
 @login_required
@@ -643,8 +662,12 @@ def delete_announcement(id):
 @login_required
 @admin_required
 def library():
-    books = Book.query.all()
-    return render_template('admin/library/list.html', books=books)
+    query = apply_search(Book.query, request.args.get('q'), [Book.title, Book.author, Book.isbn])
+    query = apply_filters(query, request.args, {'category': Book.category})
+    page = paginate(query, request.args,
+                    sort_fields={'title': Book.title, 'available': Book.available_copies, 'id': Book.id},
+                    default_sort='title', id_column=Book.id)
+    return render_template('admin/library/list.html', books=page.items, page=page)
 
 @admin.route('/library/add', methods=['GET', 'POST'])
 @login_required
@@ -665,6 +688,20 @@ def add_book():
         return redirect(url_for('admin.library'))
     return render_template('admin/library/form.html', book=None)
 
+@admin.route('/library/delete/<int:id>', methods=['POST'])
+@login_required
+@admin_required
+def delete_book(id):
+    book = Book.query.get_or_404(id)
+    # Issue records reference the book (book_issues.book_id is NOT NULL), and they are the loan history
+    if db.session.query(BookIssue.id).filter_by(book_id=book.id).first():
+        flash('This book has issue records and cannot be deleted.', 'danger')
+        return redirect(url_for('admin.library'))
+    db.session.delete(book)
+    db.session.commit()
+    flash('Book deleted!', 'success')
+    return redirect(url_for('admin.library'))
+
 @admin.route('/library/issue', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -702,7 +739,7 @@ def return_book(id):
 @login_required
 @admin_required
 def library_issues():
-    issues = BookIssue.query.filter_by(status='issued').all()
+    issues = BookIssue.query.options(*loading.BOOK_ISSUE_LIST).filter_by(status='issued').all()
     return render_template('admin/library/issues.html', issues=issues)
 
 # ============================================
@@ -712,7 +749,7 @@ def library_issues():
 @login_required
 @admin_required
 def timetable():
-    classes = Class.query.all()
+    classes = Class.query.options(*loading.CLASS_COUNTS).all()
     return render_template('admin/timetable/list.html', classes=classes)
 
 @admin.route('/timetable/view/<int:class_id>')
@@ -720,7 +757,7 @@ def timetable():
 @admin_required
 def view_timetable(class_id):
     cls = Class.query.get_or_404(class_id)
-    timetable = TimeTable.query.filter_by(class_id=class_id).all()
+    timetable = TimeTable.query.options(*loading.TIMETABLE_FOR_CLASS).filter_by(class_id=class_id).all()
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
     return render_template('admin/timetable/view.html', cls=cls, timetable=timetable, days=days)
 
@@ -753,62 +790,115 @@ def add_timetable_entry(class_id):
 @login_required
 @admin_required
 def report_card(student_id):
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-    
-    student = Student.query.get_or_404(student_id)
-    marks = student.marks
-    
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    
-    # Header
-    p.setFont("Helvetica-Bold", 20)
-    p.drawCentredString(width/2, height - 50, "REPORT CARD")
-    p.setFont("Helvetica", 12)
-    p.drawCentredString(width/2, height - 70, "Student Management System")
-    
-    # Student Info
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(50, height - 120, f"Name: {student.first_name} {student.last_name}")
-    p.drawString(50, height - 140, f"Roll No: {student.roll_no}")
-    p.drawString(50, height - 160, f"Class: {student.enrolled_class.grade}-{student.enrolled_class.section}" if student.enrolled_class else "N/A")
-    
-    # Marks Table
-    y = height - 200
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(50, y, "Subject")
-    p.drawString(200, y, "Exam")
-    p.drawString(350, y, "Score")
-    p.drawString(450, y, "Grade")
-    
-    y -= 20
-    p.setFont("Helvetica", 10)
-    total = 0
-    count = 0
-    for m in marks:
-        percentage = (m.score_obtained / m.max_score) * 100
-        grade = 'A+' if percentage >= 90 else 'A' if percentage >= 80 else 'B' if percentage >= 70 else 'C' if percentage >= 60 else 'D' if percentage >= 50 else 'F'
-        p.drawString(50, y, m.subject.name)
-        p.drawString(200, y, m.exam.name)
-        p.drawString(350, y, f"{m.score_obtained}/{m.max_score}")
-        p.drawString(450, y, grade)
-        total += percentage
-        count += 1
-        y -= 15
-    
-    if count > 0:
-        avg = total / count
-        y -= 20
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(50, y, f"Overall Percentage: {avg:.2f}%")
-    
-    p.save()
-    buffer.seek(0)
-    return Response(buffer, mimetype='application/pdf', 
-                   headers={'Content-Disposition': f'attachment; filename=report_card_{student.roll_no}.pdf'})
+    from app.services.report_cards import report_card_data, render_report_card, report_card_filename
+
+    cards = report_card_data(Student.id == student_id)
+    if not cards:
+        abort(404)
+    card = cards[0]
+    return Response(render_report_card(card), mimetype='application/pdf',
+                    headers={'Content-Disposition': f'attachment; filename={report_card_filename(card)}'})
+
+@admin.route('/reportcards', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def report_card_batch():
+    from app.services.report_cards import start_batch
+
+    if request.method == 'POST':
+        scope = request.form.get('scope')
+        try:
+            job = start_batch(scope, request.form.get(f'{scope}_id', type=int), request.form.get('format'),
+                              exam_id=request.form.get('exam_filter', type=int), user_id=current_user.id)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('admin.report_card_batch'))
+        flash('Report card generation queued.', 'success')
+        return redirect(url_for('admin.job_detail', job_id=job.id))
+
+    classes = Class.query.order_by(Class.grade, Class.section).all()
+    departments = Department.query.order_by(Department.name).all()
+    exams = Exam.query.order_by(Exam.date.desc()).all()
+    return render_template('admin/reportcards/batch.html', classes=classes, departments=departments, exams=exams)
+
+# ============================================
+# REQUEST METRICS
+# ============================================
+@admin.route('/metrics')
+@login_required
+@admin_required
+def request_metrics():
+    from app import metrics
+
+    return render_template('admin/metrics/requests.html', endpoints=metrics.slow_endpoints(), shapes=metrics.repeated_shapes(),
+                           since=datetime.utcfromtimestamp(metrics.since),
+                           enabled=current_app.config['METRICS_ENABLED'])
+
+@admin.route('/metrics/reset', methods=['POST'])
+@login_required
+@admin_required
+def reset_request_metrics():
+    from app import metrics
+
+    metrics.reset()
+    flash('Request metrics reset for this worker.', 'success')
+    return redirect(url_for('admin.request_metrics'))
+
+# ============================================
+# BACKGROUND JOBS
+# ============================================
+@admin.route('/jobs')
+@login_required
+@admin_required
+def jobs():
+    from app.services.jobs import job_status
+
+    recent = Job.query.order_by(Job.id.desc()).limit(50).all()
+    return render_template('admin/jobs/list.html', jobs=[job_status(job) for job in recent])
+
+@admin.route('/jobs/<int:job_id>')
+@login_required
+@admin_required
+def job_detail(job_id):
+    from app.services.jobs import job_status
+
+    job = Job.query.get_or_404(job_id)
+    return render_template('admin/jobs/detail.html', job=job_status(job),
+                           executor=current_app.config['JOB_EXECUTOR'])
+
+@admin.route('/jobs/<int:job_id>/status')
+@login_required
+@admin_required
+def job_status_json(job_id):
+    from app.services.jobs import job_status
+
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job_status(job))
+
+@admin.route('/jobs/<int:job_id>/download')
+@login_required
+@admin_required
+def job_download(job_id):
+    from app.services.jobs import job_download_path
+
+    path = job_download_path(Job.query.get_or_404(job_id))
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True)
+
+@admin.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+@admin_required
+def retry_job(job_id):
+    from app.services.jobs import retry
+
+    if retry(job_id):
+        flash('Job queued again.', 'success')
+    else:
+        flash('Only failed jobs can be retried.', 'warning')
+    return redirect(url_for('admin.job_detail', job_id=job_id))
 
 # ============================================
 # CALENDAR / EVENTS
@@ -875,7 +965,7 @@ def delete_event(id):
 @login_required
 @admin_required
 def departments():
-    departments = Department.query.all()
+    departments = Department.query.options(*loading.DEPARTMENT_LIST).all()
     return render_template('admin/departments/list.html', departments=departments)
 
 @admin.route('/departments/add', methods=['GET', 'POST'])
@@ -929,8 +1019,13 @@ def delete_department(id):
 @login_required
 @admin_required
 def homework():
-    homework = Homework.query.order_by(Homework.due_date.desc()).all()
-    return render_template('admin/homework/list.html', homework=homework)
+    query = apply_search(Homework.query.options(*loading.HOMEWORK_LIST), request.args.get('q'), [Homework.title])
+    query = apply_filters(query, request.args, {'class_id': Homework.class_id, 'subject_id': Homework.subject_id})
+    page = paginate(query, request.args,
+                    sort_fields={'due_date': Homework.due_date, 'title': Homework.title, 'id': Homework.id},
+                    default_sort='due_date', id_column=Homework.id, default_direction='desc')
+    classes = Class.query.all()
+    return render_template('admin/homework/list.html', homework=page.items, page=page, classes=classes)
 
 @admin.route('/homework/add', methods=['GET', 'POST'])
 @login_required
@@ -970,98 +1065,89 @@ def delete_homework(id):
 @admin.route('/teachers/export')
 @login_required
 @admin_required
+@read_replica
 def export_teachers():
     dept_id = request.args.get('department_id')
-    query = Teacher.query
+    statement = select(
+        Teacher.id, Teacher.first_name, Teacher.last_name, Teacher.qualification, Teacher.specialization,
+        Teacher.phone, Teacher.joining_date, Department.name.label('department')
+    ).outerjoin(Department, Department.id == Teacher.department_id)
     if dept_id:
-        query = query.filter_by(department_id=dept_id)
-    teachers = query.all()
+        statement = statement.where(Teacher.department_id == dept_id)
+    statement = statement.order_by(Teacher.id)
     
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Name', 'Department', 'Qualification', 'Specialization', 'Phone', 'Joining Date'])
-    for t in teachers:
-        writer.writerow([
-            t.id,
-            f"{t.first_name} {t.last_name}",
-            t.department.name if t.department else 'N/A',
-            t.qualification or '',
-            t.specialization or '',
-            t.phone or '',
-            t.joining_date.strftime('%Y-%m-%d') if t.joining_date else 'N/A'
-        ])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=teachers.csv'})
+    return stream_csv('teachers.csv',
+                      ['ID', 'Name', 'Department', 'Qualification', 'Specialization', 'Phone', 'Joining Date'],
+                      statement,
+                      lambda r: [r.id, f"{r.first_name} {r.last_name}", r.department or 'N/A',
+                                 r.qualification or '', r.specialization or '', r.phone or '',
+                                 date_or(r.joining_date)])
 
 @admin.route('/library/export')
 @login_required
 @admin_required
+@read_replica
 def export_library():
-    books = Book.query.all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Title', 'Author', 'ISBN', 'Category', 'Total Copies', 'Available'])
-    for b in books:
-        writer.writerow([b.id, b.title, b.author or '', b.isbn or '', b.category or '', b.total_copies, b.available_copies])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=library_books.csv'})
+    statement = select(
+        Book.id, Book.title, Book.author, Book.isbn, Book.category, Book.total_copies, Book.available_copies
+    ).order_by(Book.id)
+    return stream_csv('library_books.csv',
+                      ['ID', 'Title', 'Author', 'ISBN', 'Category', 'Total Copies', 'Available'],
+                      statement,
+                      lambda r: [r.id, r.title, r.author or '', r.isbn or '', r.category or '',
+                                 r.total_copies, r.available_copies])
 
 @admin.route('/homework/export')
 @login_required
 @admin_required
+@read_replica
 def export_homework():
     class_id = request.args.get('class_id')
-    query = Homework.query
+    statement = select(
+        Homework.title, Homework.due_date, Homework.assigned_date, Class.grade, Class.section,
+        Subject.name.label('subject'), Teacher.first_name, Teacher.last_name
+    ).join(Class, Class.id == Homework.class_id) \
+        .join(Subject, Subject.id == Homework.subject_id) \
+        .join(Teacher, Teacher.id == Homework.teacher_id)
     if class_id:
-        query = query.filter_by(class_id=class_id)
-    homework = query.order_by(Homework.due_date.desc()).all()
+        statement = statement.where(Homework.class_id == class_id)
+    statement = statement.order_by(Homework.due_date.desc())
     
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Title', 'Class', 'Subject', 'Teacher', 'Due Date', 'Assigned Date'])
-    for h in homework:
-        writer.writerow([
-            h.title,
-            f"{h.class_info.grade}-{h.class_info.section}",
-            h.subject.name,
-            f"{h.teacher.first_name} {h.teacher.last_name}",
-            h.due_date.strftime('%Y-%m-%d'),
-            h.assigned_date.strftime('%Y-%m-%d') if h.assigned_date else 'N/A'
-        ])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=homework.csv'})
+    return stream_csv('homework.csv',
+                      ['Title', 'Class', 'Subject', 'Teacher', 'Due Date', 'Assigned Date'],
+                      statement,
+                      lambda r: [r.title, f"{r.grade}-{r.section}", r.subject, f"{r.first_name} {r.last_name}",
+                                 r.due_date.strftime('%Y-%m-%d'), date_or(r.assigned_date)])
 
 @admin.route('/classes/export')
 @login_required
 @admin_required
+@read_replica
 def export_classes():
-    classes = Class.query.all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Grade/Year', 'Section', 'Department', 'Class Teacher', 'Students Count'])
-    for c in classes:
-        writer.writerow([
-            c.grade,
-            c.section,
-            c.department.name if c.department else 'N/A',
-            f"{c.class_teacher.first_name} {c.class_teacher.last_name}" if c.class_teacher else 'N/A',
-            len(c.students)
-        ])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=classes.csv'})
+    student_counts = select(Student.class_id, func.count(Student.id).label('students')) \
+        .group_by(Student.class_id).subquery()
+    statement = select(
+        Class.grade, Class.section, Department.name.label('department'),
+        Teacher.first_name, Teacher.last_name, func.coalesce(student_counts.c.students, 0).label('students')
+    ).outerjoin(Department, Department.id == Class.department_id) \
+        .outerjoin(Teacher, Teacher.id == Class.class_teacher_id) \
+        .outerjoin(student_counts, student_counts.c.class_id == Class.id) \
+        .order_by(Class.id)
+    return stream_csv('classes.csv',
+                      ['Grade/Year', 'Section', 'Department', 'Class Teacher', 'Students Count'],
+                      statement,
+                      lambda r: [r.grade, r.section, r.department or 'N/A',
+                                 f"{r.first_name} {r.last_name}" if r.first_name else 'N/A', r.students])
 
 @admin.route('/subjects/export')
 @login_required
 @admin_required
+@read_replica
 def export_subjects():
-    subjects = Subject.query.all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Code', 'Name', 'Department'])
-    for s in subjects:
-        writer.writerow([s.code, s.name, s.department.name if s.department else 'General'])
-    output.seek(0)
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=subjects.csv'})
+    statement = select(Subject.code, Subject.name, Department.name.label('department')) \
+        .outerjoin(Department, Department.id == Subject.department_id).order_by(Subject.id)
+    return stream_csv('subjects.csv', ['Code', 'Name', 'Department'], statement,
+                      lambda r: [r.code, r.name, r.department or 'General'])
 
 # ============================================
 # ANALYTICS DASHBOARDS
@@ -1069,25 +1155,36 @@ def export_subjects():
 @admin.route('/analytics')
 @login_required
 @admin_required
+@read_replica
 def analytics():
     return redirect(url_for('admin.attendance_analytics'))
 
 @admin.route('/analytics/attendance')
 @login_required
 @admin_required
+@read_replica
+@cache.cached_view(depends_on=(AttendanceDailySummary, Student, Class))
 def attendance_analytics():
     from datetime import date, timedelta
     from sqlalchemy import func
     
     today = date.today()
+    S = AttendanceDailySummary
     
-    # Last 30 days trend
+    # Last 30 days trend (from the daily rollup)
+    daily = {
+        row.date: row for row in db.session.query(
+            S.date,
+            func.sum(S.present).label('present'),
+            func.sum(S.absent).label('absent'),
+            func.sum(S.late).label('late')
+        ).filter(S.date >= today - timedelta(days=29), S.date <= today).group_by(S.date).all()
+    }
     daily_data = []
     for i in range(29, -1, -1):
         d = today - timedelta(days=i)
-        present = Attendance.query.filter_by(date=d, status='Present').count()
-        absent = Attendance.query.filter_by(date=d, status='Absent').count()
-        late = Attendance.query.filter_by(date=d, status='Late').count()
+        row = daily.get(d)
+        present, absent, late = (row.present, row.absent, row.late) if row else (0, 0, 0)
         total = present + absent + late
         daily_data.append({
             'date': d.strftime('%m/%d'),
@@ -1098,13 +1195,14 @@ def attendance_analytics():
         })
     
     # Class-wise attendance today
+    class_sizes = dict(db.session.query(Student.class_id, func.count(Student.id)).group_by(Student.class_id).all())
+    present_today = dict(db.session.query(S.class_id, func.sum(S.present)).filter(S.date == today).group_by(S.class_id).all())
     classes = Class.query.all()
     class_data = []
     for c in classes:
-        student_ids = [s.id for s in c.students]
-        if student_ids:
-            present = Attendance.query.filter(Attendance.student_id.in_(student_ids), Attendance.date == today, Attendance.status == 'Present').count()
-            total = len(student_ids)
+        total = class_sizes.get(c.id, 0)
+        if total:
+            present = present_today.get(c.id) or 0
             class_data.append({
                 'name': f"{c.grade}-{c.section}",
                 'present': present,
@@ -1113,8 +1211,8 @@ def attendance_analytics():
             })
     
     # Overall stats
-    total_students = Student.query.count()
-    total_present_today = Attendance.query.filter_by(date=today, status='Present').count()
+    total_students = sum(class_sizes.values())
+    total_present_today = daily[today].present if today in daily else 0
     
     return render_template('admin/analytics/attendance.html',
                            daily_data=daily_data,
@@ -1125,46 +1223,11 @@ def attendance_analytics():
 @admin.route('/analytics/performance')
 @login_required
 @admin_required
+@read_replica
+@cache.cached_view(depends_on=(Mark, Student, Subject, Class))
 def performance_analytics():
-    from app.models import Mark
-    from sqlalchemy import func
-    
-    # Subject-wise averages
-    subjects = Subject.query.all()
-    subject_data = []
-    for s in subjects:
-        marks = Mark.query.filter_by(subject_id=s.id).all()
-        if marks:
-            avg = sum([m.score_obtained / m.max_score * 100 for m in marks]) / len(marks)
-            subject_data.append({'name': s.name, 'average': round(avg, 1)})
-    
-    # Top 10 students by average
-    students = Student.query.all()
-    student_scores = []
-    for st in students:
-        marks = st.marks
-        if marks:
-            avg = sum([m.score_obtained / m.max_score * 100 for m in marks]) / len(marks)
-            student_scores.append({
-                'name': f"{st.first_name} {st.last_name}",
-                'roll_no': st.roll_no,
-                'class': f"{st.enrolled_class.grade}-{st.enrolled_class.section}" if st.enrolled_class else 'N/A',
-                'average': round(avg, 1)
-            })
-    top_students = sorted(student_scores, key=lambda x: x['average'], reverse=True)[:10]
-    
-    # Grade distribution
-    grade_dist = {'A+': 0, 'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
-    from app.models import Mark
-    all_marks = Mark.query.all()
-    for m in all_marks:
-        pct = (m.score_obtained / m.max_score) * 100
-        if pct >= 90: grade_dist['A+'] += 1
-        elif pct >= 80: grade_dist['A'] += 1
-        elif pct >= 70: grade_dist['B'] += 1
-        elif pct >= 60: grade_dist['C'] += 1
-        elif pct >= 50: grade_dist['D'] += 1
-        else: grade_dist['F'] += 1
+    from app.services.performance import performance_summary
+    subject_data, top_students, grade_dist = performance_summary()
     
     return render_template('admin/analytics/performance.html',
                            subject_data=subject_data,
@@ -1174,52 +1237,11 @@ def performance_analytics():
 @admin.route('/analytics/departments')
 @login_required
 @admin_required
+@read_replica
+@cache.cached_view(depends_on=(Department, Student, Teacher, Class, Subject, AttendanceDailySummary, Fee))
 def department_analytics():
-    from datetime import date, timedelta
-    
-    departments = Department.query.all()
-    dept_data = []
-    
-    for d in departments:
-        students = Student.query.filter_by(department_id=d.id).all()
-        teachers = Teacher.query.filter_by(department_id=d.id).all()
-        classes = Class.query.filter_by(department_id=d.id).all()
-        subjects = Subject.query.filter_by(department_id=d.id).all()
-        
-        # Attendance rate (last 7 days)
-        student_ids = [s.id for s in students]
-        if student_ids:
-            today = date.today()
-            week_ago = today - timedelta(days=7)
-            present = Attendance.query.filter(
-                Attendance.student_id.in_(student_ids),
-                Attendance.date >= week_ago,
-                Attendance.status == 'Present'
-            ).count()
-            total_records = Attendance.query.filter(
-                Attendance.student_id.in_(student_ids),
-                Attendance.date >= week_ago
-            ).count()
-            att_rate = round((present / total_records * 100), 1) if total_records > 0 else 0
-        else:
-            att_rate = 0
-        
-        # Fee collection
-        fees = Fee.query.join(Student).filter(Student.department_id == d.id).all()
-        paid = sum([1 for f in fees if f.status == 'Paid'])
-        fee_rate = round((paid / len(fees) * 100), 1) if fees else 0
-        
-        dept_data.append({
-            'name': d.name,
-            'code': d.code,
-            'students': len(students),
-            'teachers': len(teachers),
-            'classes': len(classes),
-            'subjects': len(subjects),
-            'attendance_rate': att_rate,
-            'fee_collection': fee_rate,
-            'head': f"{d.head_teacher.first_name} {d.head_teacher.last_name}" if d.head_teacher else 'Not Assigned'
-        })
+    from app.services.departments import department_stats
+    dept_data = department_stats()
     
     return render_template('admin/analytics/departments.html', dept_data=dept_data)
 
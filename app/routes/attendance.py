@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
-from app.models import Attendance, Student, Class
+from app.models import Student, Class
 from app import db
+from app.services.attendance import save_class_attendance
 from datetime import datetime
 
 attendance_bp = Blueprint('attendance', __name__, url_prefix='/attendance')
@@ -18,12 +19,9 @@ def mark_attendance():
         date = request.form.get('date')
         students = Student.query.filter_by(class_id=class_id).all()
         
-        for student in students:
-            status = request.form.get(f'status_{student.id}')
-            if status:
-                att = Attendance(student_id=student.id, date=datetime.strptime(date, '%Y-%m-%d'), status=status)
-                db.session.add(att)
-        
+        date_obj = datetime.strptime(date, '%Y-%m-%d').date()
+        statuses = {student.id: request.form.get(f'status_{student.id}') for student in students}
+        save_class_attendance(class_id, date_obj, students, statuses)
         db.session.commit()
         flash('Attendance marked successfully', 'success')
         return redirect(url_for('teacher.dashboard'))
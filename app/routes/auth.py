@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy import func, or_
 from app.models import User
 from app import db
 
@@ -17,40 +18,35 @@ def login():
         return redirect(url_for('main.index'))
 
     if request.method == 'POST':
-        login_id = request.form.get('login_id')
-        password = request.form.get('password')
-        
-        print(f"DEBUG: Login attempt for '{login_id}'") # Debug log
+        login_id = (request.form.get('login_id') or '').strip().lower()
+        password = request.form.get('password') or ''
         
-        # specific for postgresql (ilike), but generic sqlalchemy 'ilike' usually works
-        user = User.query.filter((User.email.ilike(login_id)) | (User.username.ilike(login_id))).first()
+        # Matches the lower(email) / lower(username) functional indexes
+        user = User.query.filter(or_(func.lower(User.email) == login_id,
+                                     func.lower(User.username) == login_id)).first()
         
-        if user:
-             print(f"DEBUG: User found: {user.username}, Role: {user.role}")
-             if user.check_password(password):
-                 if not user.is_approved:
-                     print("DEBUG: Account not approved.")
-                     flash('Account pending approval. Please wait for an administrator to verify your details.', 'warning')
-                     return render_template('auth/login.html')
+        if user and user.check_password(password):
+            if not user.is_approved:
+                flash('Account pending approval. Please wait for an administrator to verify your details.', 'warning')
+                return render_template('auth/login.html')
+
+            # Upgrade hashes made with older PASSWORD_HASH_METHOD parameters
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
 
-                 print("DEBUG: Password correct. Logging in...")
-                 login_user(user)
-                 print(f"DEBUG: User {user.username} logged in. Current User: {current_user}")
-                 flash('Login successful!', 'success')
-                 
-                 # Redirect based on role
-                 if user.role == 'admin':
-                     return redirect(url_for('admin.dashboard'))
-                 elif user.role == 'teacher':
-                     return redirect(url_for('teacher.dashboard'))
-                 elif user.role == 'student':
-                     return redirect(url_for('student.dashboard'))
-                 
-                 return redirect(url_for('main.index'))
-             else:
-                 print("DEBUG: Password INCORRECT.")
-        else:
-             print("DEBUG: User NOT found.")
+            login_user(user)
+            flash('Login successful!', 'success')
+            
+            # Redirect based on role
+            if user.role == 'admin':
+                return redirect(url_for('admin.dashboard'))
+            elif user.role == 'teacher':
+                return redirect(url_for('teacher.dashboard'))
+            elif user.role == 'student':
+                return redirect(url_for('student.dashboard'))
+            
+            return redirect(url_for('main.index'))
 
         flash('Login Unsuccessful. Please check email and password', 'danger')
             
@@ -58,6 +54,9 @@ def login():
 
 @auth.before_app_request
 def check_approval_status():
+    # Public, long-cached files: loading the user here would add Vary: Cookie
+    if request.endpoint in ('static', 'assets', 'main.media_photo'):
+        return
     if current_user.is_authenticated and not current_user.is_approved:
         logout_user()
         flash('Your account is pending approval or has been suspended.', 'warning')
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file
+import io
+from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file, current_app
 from flask_login import login_required, current_user
 from app.models import Fee, Student
 from app import db
-from fpdf import FPDF
-import io
+from app.services.receipts import receipt_data, receipt_digest, receipt_etag, render_receipt, ensure_receipt
+from datetime import date
 
 fees_bp = Blueprint('fees', __name__, url_prefix='/fees')
 
@@ -13,8 +14,14 @@ def pay_fee(fee_id):
     fee = Fee.query.get_or_404(fee_id)
     # Simulate payment logic
     fee.status = 'Paid'
-    fee.paid_date = db.func.now()
+    fee.paid_date = date.today()
     db.session.commit()
+    # Render the receipt now so the first download is already a file response. The payment is
+    # recorded either way; if this fails (e.g. a read-only filesystem) the download renders it.
+    try:
+        ensure_receipt(receipt_data(Fee.id == fee.id)[0])
+    except Exception:
+        current_app.logger.exception("Could not store the receipt for fee %s", fee.id)
     flash('Fee paid successfully', 'success')
     return redirect(url_for('student.dashboard'))
 
@@ -26,19 +33,14 @@ def download_receipt(fee_id):
         flash('Fee not paid yet', 'warning')
         return redirect(url_for('student.dashboard'))
         
-    # Generate PDF
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="Fee Receipt", ln=1, align="C")
-    pdf.cell(200, 10, txt=f"Student: {fee.student.first_name}", ln=1)
-    pdf.cell(200, 10, txt=f"Amount: ${fee.amount}", ln=1)
-    pdf.cell(200, 10, txt=f"Date: {fee.paid_date}", ln=1)
-    
-    # Save to buffer
-    buffer = io.BytesIO()
-    s = pdf.output(dest='S').encode('latin-1')
-    buffer.write(s)
-    buffer.seek(0)
-    
-    return send_file(buffer, as_attachment=True, download_name=f'receipt_{fee.id}.pdf', mimetype='application/pdf')
+    data = receipt_data(Fee.id == fee.id)[0]
+    try:
+        digest, source = ensure_receipt(data)
+    except OSError:
+        # Receipts cannot be stored here: render this one in memory
+        current_app.logger.exception("Could not store the receipt for fee %s", fee.id)
+        digest, source = receipt_digest(data), io.BytesIO(render_receipt(data))
+    response = send_file(source, mimetype='application/pdf', as_attachment=True,
+                         download_name=f'receipt_{fee.id}.pdf', etag=receipt_etag(digest), conditional=True)
+    response.cache_control.private = True
+    return response
@@ -1,7 +1,15 @@
-from flask import Blueprint, redirect, url_for
+from flask import Blueprint, redirect, url_for, send_from_directory
+from app.services.images import photos_dir, ONE_YEAR
 
 main = Blueprint('main', __name__)
 
 @main.route('/')
 def index():
     return redirect(url_for('auth.login'))
+
+@main.route('/media/photos/<filename>')
+def media_photo(filename):
+    # Processed photo variants have content-hashed names, so they can be cached for good
+    response = send_from_directory(photos_dir(), filename, max_age=ONE_YEAR)
+    response.cache_control.immutable = True
+    return response
@@ -3,7 +3,11 @@ from flask_login import login_required, current_user
 from functools import wraps
 from datetime import date, timedelta
 from app import db
-from app.models import Student, Attendance, Fee, Mark, TimeTable, Homework, Event, Announcement
+from app.models import Attendance, Fee, Mark, TimeTable, Homework, Event, Announcement
+from app.services import loading
+from app.services.portal import student_context
+from app.services.replica import read_replica
+from app.services.student_dashboard import student_summary
 
 student = Blueprint('student', __name__, url_prefix='/student')
 
@@ -19,44 +23,22 @@ def student_required(f):
 @student.route('/dashboard')
 @login_required
 @student_required
+@read_replica
 def dashboard():
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = student_context()
     if not student:
         flash('Student profile not found.', 'warning')
         return redirect(url_for('main.index'))
     
-    # Attendance stats
-    today = date.today()
-    month_ago = today - timedelta(days=30)
-    total_att = Attendance.query.filter(Attendance.student_id == student.id, Attendance.date >= month_ago).count()
-    present_att = Attendance.query.filter(Attendance.student_id == student.id, Attendance.date >= month_ago, Attendance.status == 'Present').count()
-    att_percentage = round((present_att / total_att * 100), 1) if total_att > 0 else 0
-    
-    # Fee status
-    pending_fees = Fee.query.filter_by(student_id=student.id, status='Pending').count()
-    
-    # Recent marks
-    recent_marks = Mark.query.filter_by(student_id=student.id).order_by(Mark.id.desc()).limit(5).all()
-    
-    # Upcoming homework
-    upcoming_hw = Homework.query.filter(Homework.class_id == student.class_id, Homework.due_date >= today).order_by(Homework.due_date).limit(5).all()
-    
-    # Announcements
-    announcements = Announcement.query.filter_by(is_active=True).order_by(Announcement.created_at.desc()).limit(3).all()
-    
-    return render_template('student/dashboard.html', 
-                           student=student,
-                           att_percentage=att_percentage,
-                           pending_fees=pending_fees,
-                           recent_marks=recent_marks,
-                           upcoming_hw=upcoming_hw,
-                           announcements=announcements)
+    summary = student_summary(student)
+    return render_template('student/dashboard.html', student=student, **summary)
 
 @student.route('/attendance')
 @login_required
 @student_required
+@read_replica
 def attendance():
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = student_context()
     attendance = Attendance.query.filter_by(student_id=student.id).order_by(Attendance.date.desc()).limit(60).all()
     
     # Calculate stats
@@ -73,9 +55,10 @@ def attendance():
 @student.route('/marks')
 @login_required
 @student_required
+@read_replica
 def marks():
-    student = Student.query.filter_by(user_id=current_user.id).first()
-    marks = Mark.query.filter_by(student_id=student.id).order_by(Mark.id.desc()).all()
+    student = student_context()
+    marks = Mark.query.options(*loading.MARK_LIST).filter_by(student_id=student.id).order_by(Mark.id.desc()).all()
     
     # Group by exam
     exams = {}
@@ -89,8 +72,9 @@ def marks():
 @student.route('/fees')
 @login_required
 @student_required
+@read_replica
 def fees():
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = student_context()
     fees = Fee.query.filter_by(student_id=student.id).order_by(Fee.due_date.desc()).all()
     
     total_due = sum(f.amount for f in fees if f.status == 'Pending')
@@ -101,9 +85,10 @@ def fees():
 @student.route('/timetable')
 @login_required
 @student_required
+@read_replica
 def timetable():
-    student = Student.query.filter_by(user_id=current_user.id).first()
-    timetable = TimeTable.query.filter_by(class_id=student.class_id).order_by(TimeTable.day_of_week, TimeTable.start_time).all()
+    student = student_context()
+    timetable = TimeTable.query.options(*loading.TIMETABLE_FOR_CLASS).filter_by(class_id=student.class_id).order_by(TimeTable.day_of_week, TimeTable.start_time).all()
     
     # Group by day
     days = {}
@@ -117,7 +102,8 @@ def timetable():
 @student.route('/homework')
 @login_required
 @student_required
+@read_replica
 def homework():
-    student = Student.query.filter_by(user_id=current_user.id).first()
-    homework = Homework.query.filter_by(class_id=student.class_id).order_by(Homework.due_date.desc()).limit(20).all()
+    student = student_context()
+    homework = Homework.query.options(*loading.HOMEWORK_LIST).filter_by(class_id=student.class_id).order_by(Homework.due_date.desc()).limit(20).all()
     return render_template('student/homework.html', student=student, homework=homework)
@@ -3,7 +3,11 @@ from flask_login import login_required, current_user
 from functools import wraps
 from datetime import date, datetime, timedelta
 from app import db
-from app.models import Teacher, Class, Student, Subject, TimeTable, Attendance, Mark, Exam, Homework
+from app.models import Class, Student, Subject, TimeTable, Attendance, Mark, Exam, Homework
+from app.services.attendance import load_class_attendance, save_class_attendance
+from app.services.marks import load_marks, save_marks, parse_marks_file, resolve_uploaded_marks
+from app.services import loading
+from app.services.portal import teacher_context
 
 teacher = Blueprint('teacher', __name__, url_prefix='/teacher')
 
@@ -20,7 +24,7 @@ def teacher_required(f):
 @login_required
 @teacher_required
 def dashboard():
-    teacher_profile = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher_profile = teacher_context()
     if not teacher_profile:
         flash('Teacher profile not found.', 'warning')
         return redirect(url_for('main.index'))
@@ -29,12 +33,11 @@ def dashboard():
     day_name = today.strftime('%A')
     
     # Today's classes from timetable
-    today_classes = TimeTable.query.filter_by(teacher_id=teacher_profile.id, day_of_week=day_name).order_by(TimeTable.start_time).all()
+    today_classes = TimeTable.query.options(*loading.TIMETABLE_FOR_TEACHER).filter_by(teacher_id=teacher_profile.id, day_of_week=day_name).order_by(TimeTable.start_time).all()
     
     # Classes taught (from timetable)
-    all_timetable = TimeTable.query.filter_by(teacher_id=teacher_profile.id).all()
-    class_ids = list(set([t.class_id for t in all_timetable]))
-    classes_taught = Class.query.filter(Class.id.in_(class_ids)).all() if class_ids else []
+    class_ids = teacher_profile.class_ids
+    classes_taught = Class.query.options(*loading.CLASS_COUNTS).filter(Class.id.in_(class_ids)).all() if class_ids else []
     
     # Homework assigned
     pending_hw = Homework.query.filter_by(teacher_id=teacher_profile.id).filter(Homework.due_date >= today).count()
@@ -50,8 +53,8 @@ def dashboard():
 @login_required
 @teacher_required
 def schedule():
-    teacher_profile = Teacher.query.filter_by(user_id=current_user.id).first()
-    timetable = TimeTable.query.filter_by(teacher_id=teacher_profile.id).order_by(TimeTable.day_of_week, TimeTable.start_time).all()
+    teacher_profile = teacher_context()
+    timetable = TimeTable.query.options(*loading.TIMETABLE_FOR_TEACHER).filter_by(teacher_id=teacher_profile.id).order_by(TimeTable.day_of_week, TimeTable.start_time).all()
     
     # Group by day
     days = {}
@@ -66,11 +69,10 @@ def schedule():
 @login_required
 @teacher_required
 def mark_attendance():
-    teacher_profile = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher_profile = teacher_context()
     
     # Get classes this teacher is assigned to
-    timetable_entries = TimeTable.query.filter_by(teacher_id=teacher_profile.id).all()
-    class_ids = list(set([t.class_id for t in timetable_entries]))
+    class_ids = teacher_profile.class_ids
     classes = Class.query.filter(Class.id.in_(class_ids)).all() if class_ids else []
     
     selected_class = request.args.get('class_id')
@@ -81,25 +83,15 @@ def mark_attendance():
     if selected_class:
         students = Student.query.filter_by(class_id=selected_class).order_by(Student.roll_no).all()
         date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-        for s in students:
-            att = Attendance.query.filter_by(student_id=s.id, date=date_obj).first()
-            if att:
-                existing_attendance[s.id] = att.status
+        existing_attendance = load_class_attendance(selected_class, date_obj)
     
     if request.method == 'POST':
         date_obj = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
         class_id = request.form['class_id']
         students = Student.query.filter_by(class_id=class_id).all()
         
-        for student in students:
-            status = request.form.get(f'status_{student.id}', 'Absent')
-            existing = Attendance.query.filter_by(student_id=student.id, date=date_obj).first()
-            if existing:
-                existing.status = status
-            else:
-                att = Attendance(student_id=student.id, date=date_obj, status=status)
-                db.session.add(att)
-        
+        statuses = {student.id: request.form.get(f'status_{student.id}', 'Absent') for student in students}
+        save_class_attendance(class_id, date_obj, students, statuses)
         db.session.commit()
         flash(f'Attendance marked for {len(students)} students!', 'success')
         return redirect(url_for('teacher.mark_attendance', class_id=class_id, date=request.form['date']))
@@ -116,12 +108,11 @@ def mark_attendance():
 @login_required
 @teacher_required
 def enter_marks():
-    teacher_profile = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher_profile = teacher_context()
     
     # Get classes and subjects
-    timetable_entries = TimeTable.query.filter_by(teacher_id=teacher_profile.id).all()
-    class_ids = list(set([t.class_id for t in timetable_entries]))
-    subject_ids = list(set([t.subject_id for t in timetable_entries]))
+    class_ids = teacher_profile.class_ids
+    subject_ids = teacher_profile.subject_ids
     
     classes = Class.query.filter(Class.id.in_(class_ids)).all() if class_ids else []
     subjects = Subject.query.filter(Subject.id.in_(subject_ids)).all() if subject_ids else []
@@ -133,32 +124,59 @@ def enter_marks():
     students = []
     existing_marks = {}
     
-    if selected_class and selected_subject and selected_exam:
+    # Only a class/subject pair the teacher has on the timetable
+    if selected_class and selected_subject and selected_exam and teacher_profile.teaches(
+            request.args.get('class_id', type=int), request.args.get('subject_id', type=int)):
         students = Student.query.filter_by(class_id=selected_class).order_by(Student.roll_no).all()
-        for s in students:
-            mark = Mark.query.filter_by(student_id=s.id, subject_id=selected_subject, exam_id=selected_exam).first()
-            if mark:
-                existing_marks[s.id] = mark.score_obtained
+        existing_marks = load_marks(selected_class, selected_subject, selected_exam)
+    
+    if request.method == 'POST' and request.files.get('marks_file'):
+        # Bulk upload of an exam sheet (CSV or JSON) across the teacher's classes/subjects
+        exam_id = request.form.get('exam_id', type=int)
+        if exam_id is None or db.session.get(Exam, exam_id) is None:
+            flash('Choose the exam the uploaded marks belong to.', 'danger')
+            return redirect(url_for('teacher.enter_marks', **request.args))
+        try:
+            records = parse_marks_file(request.files['marks_file'])
+        except (ValueError, UnicodeDecodeError):
+            flash('Could not read the uploaded file. Upload a CSV with a header row or a JSON list of objects.', 'danger')
+            return redirect(url_for('teacher.enter_marks', **request.args))
+        
+        rows, skipped = resolve_uploaded_marks(records, exam_id,
+                                               request.form.get('subject_id'),
+                                               float(request.form.get('max_score') or 100),
+                                               set(teacher_profile.assignments))
+        save_marks(rows)
+        db.session.commit()
+        flash(f'{len(rows)} marks uploaded successfully!', 'success')
+        if skipped:
+            flash(f'{skipped} rows were skipped (unknown student/subject or invalid score).', 'warning')
+        return redirect(url_for('teacher.enter_marks', **request.args))
     
     if request.method == 'POST':
-        class_id = request.form['class_id']
-        subject_id = request.form['subject_id']
-        exam_id = request.form['exam_id']
+        class_id = request.form.get('class_id', type=int)
+        subject_id = request.form.get('subject_id', type=int)
+        exam_id = request.form.get('exam_id', type=int)
+        if not teacher_profile.teaches(class_id, subject_id) or exam_id is None \
+                or db.session.get(Exam, exam_id) is None:
+            flash('You can only enter marks for a class and subject you teach.', 'danger')
+            return redirect(url_for('teacher.enter_marks'))
         max_score = float(request.form.get('max_score', 100))
         
         students = Student.query.filter_by(class_id=class_id).all()
         
+        rows = []
         for student in students:
             score = request.form.get(f'score_{student.id}')
             if score:
-                score = float(score)
-                existing = Mark.query.filter_by(student_id=student.id, subject_id=subject_id, exam_id=exam_id).first()
-                if existing:
-                    existing.score_obtained = score
-                    existing.max_score = max_score
-                else:
-                    mark = Mark(student_id=student.id, subject_id=subject_id, exam_id=exam_id, score_obtained=score, max_score=max_score)
-                    db.session.add(mark)
+                rows.append({
+                    'student_id': student.id,
+                    'subject_id': subject_id,
+                    'exam_id': exam_id,
+                    'score_obtained': float(score),
+                    'max_score': max_score
+                })
+        save_marks(rows)
         
         db.session.commit()
         flash('Marks saved successfully!', 'success')
@@ -0,0 +1,142 @@
+"""
+Fingerprinted static assets.
+
+`flask assets build` copies every file under app/static (except uploads)
+to static/dist under a content-hashed name (css/style.css ->
+css/style.1a2b3c4d5e6f.css), writes gzip and brotli variants of the text
+files next to it, and records the names in dist/manifest.json.
+
+Templates link assets with asset_url('css/style.css'), which takes the same
+arguments as url_for('static', filename=...). It resolves to
+/assets/<hashed name>, served with a one-year immutable Cache-Control and
+the smallest encoding the browser accepts (Vary: Accept-Encoding). A
+repeat page load therefore fetches no static bytes at all; a changed file
+gets a new name.
+
+Without a build (e.g. a fresh checkout), the hashes are computed in memory
+at startup and the original files are served uncompressed under the same
+long-lived names. In debug mode asset_url() falls back to the plain static
+URL so edits show up on reload.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import abort, current_app, request, send_file, url_for
+
+MANIFEST = 'manifest.json'
+SKIP_DIRS = ('uploads', 'dist')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ico')
+HASH_LENGTH = 12
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if not name.startswith('.'):
+                yield os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+
+
+def fingerprint(path, data):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def fingerprint_all(static_folder):
+    """Return {logical path: hashed path} for every asset under `static_folder`."""
+    names = {}
+    for path in _source_files(static_folder):
+        with open(os.path.join(static_folder, path), 'rb') as f:
+            names[path] = fingerprint(path, f.read())
+    return names
+
+
+def build_assets(static_folder, dist_folder):
+    """Write hashed copies, .gz/.br variants and the manifest; return the manifest."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        current_app.logger.warning("brotli is not installed; building gzip variants only")
+
+    shutil.rmtree(dist_folder, ignore_errors=True)
+    manifest = {}
+    for path in sorted(_source_files(static_folder)):
+        with open(os.path.join(static_folder, path), 'rb') as f:
+            data = f.read()
+        hashed = manifest[path] = fingerprint(path, data)
+        target = os.path.join(dist_folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        if not path.endswith(COMPRESSIBLE):
+            continue
+        variants = {'.gz': gzip.compress(data, 9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(data):
+                with open(target + suffix, 'wb') as f:
+                    f.write(compressed)
+
+    with open(os.path.join(dist_folder, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class Assets:
+    def __init__(self):
+        self.names = {}
+        self.logical = {}
+        self.dist_folder = None
+        self.built = False
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_DIST', os.path.join(app.static_folder, 'dist'))
+        self.dist_folder = app.config['ASSETS_DIST']
+        manifest_path = os.path.join(self.dist_folder, MANIFEST)
+        self.built = os.path.exists(manifest_path)
+        if self.built:
+            with open(manifest_path) as f:
+                self.names = json.load(f)
+        else:
+            self.names = fingerprint_all(app.static_folder)
+        self.logical = {hashed: path for path, hashed in self.names.items()}
+
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.send)
+        app.add_template_global(self.url, 'asset_url')
+        app.extensions['assets'] = self
+
+    def url(self, filename, **kwargs):
+        """url_for('static', filename=...) for templates, resolved to the fingerprinted name."""
+        hashed = self.names.get(filename)
+        if hashed is None or current_app.debug:
+            return url_for('static', filename=filename, **kwargs)
+        return url_for('assets', filename=hashed, **kwargs)
+
+    def send(self, filename):
+        path = self.logical.get(filename)
+        if path is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        encoding = None
+        if self.built:
+            file_path = os.path.join(self.dist_folder, filename)
+            for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+                if request.accept_encodings[candidate] and os.path.exists(file_path + suffix):
+                    encoding, file_path = candidate, file_path + suffix
+                    break
+        else:
+            file_path = os.path.join(current_app.static_folder, path)
+
+        response = send_file(file_path, mimetype=mimetype, max_age=ONE_YEAR, conditional=True)
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.content_encoding = encoding
+        return response
@@ -0,0 +1,73 @@
+"""
+Class attendance loading and saving.
+
+Existing records for a class and date are read with one query, and changed
+statuses are written with a batched INSERT ... ON CONFLICT DO UPDATE on the
+(student_id, date) unique index. Dialects without ON CONFLICT support fall
+back to updating/adding ORM rows.
+"""
+from app import db
+from app.models import Attendance, Student
+from app.services.attendance_summary import apply_attendance_changes
+from app.services.cache import record_write
+from app.services.student_dashboard import student_tag
+from app.services.upsert import upsert_statement
+
+UPSERT_BATCH_SIZE = 500
+
+
+def load_class_attendance(class_id, date):
+    """Return {student_id: status} for every record of the class on `date`."""
+    rows = db.session.query(Attendance.student_id, Attendance.status) \
+        .join(Student, Student.id == Attendance.student_id) \
+        .filter(Student.class_id == class_id, Attendance.date == date).all()
+    return dict(rows)
+
+
+def _save_orm(date, rows):
+    student_ids = [row['student_id'] for row in rows]
+    existing = {
+        a.student_id: a for a in Attendance.query.filter(
+            Attendance.date == date, Attendance.student_id.in_(student_ids)
+        ).all()
+    }
+    for row in rows:
+        att = existing.get(row['student_id'])
+        if att:
+            att.status = row['status']
+        else:
+            db.session.add(Attendance(**row))
+
+
+def save_class_attendance(class_id, date, students, statuses):
+    """
+    Record `statuses` ({student_id: status}) for `students` on `date`.
+
+    Only records whose status actually changes are written. The daily
+    summary is updated in the same transaction; the caller commits.
+    Returns the number of records written.
+    """
+    existing = load_class_attendance(class_id, date)
+    changes = []
+    rows = []
+    for student in students:
+        status = statuses.get(student.id)
+        if not status:
+            continue
+        old_status = existing.get(student.id)
+        if old_status == status:
+            continue
+        changes.append((student, old_status, status))
+        rows.append({'student_id': student.id, 'date': date, 'status': status})
+
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        stmt = upsert_statement(Attendance, batch, [Attendance.student_id, Attendance.date], ['status'])
+        if stmt is not None:
+            db.session.execute(stmt)
+        else:
+            _save_orm(date, batch)
+
+    apply_attendance_changes(date, changes)
+    record_write(db.session, *(student_tag(row['student_id']) for row in rows))
+    return len(rows)
@@ -0,0 +1,103 @@
+"""
+Maintenance of the AttendanceDailySummary rollup table.
+
+Marking attendance calls apply_attendance_changes() before committing so the
+rollup moves in step with the raw Attendance rows. The counts are changed in
+the database (INSERT ... ON CONFLICT DO UPDATE SET present = present + ...),
+never read and written back, so two submissions for the same class and day
+cannot lose each other's changes. rebuild_attendance_summary() recomputes it
+from scratch (used by the `flask rebuild-attendance-summary` command to
+backfill existing data).
+
+Students without a class or department are counted under NO_CLASS /
+NO_DEPARTMENT (0), which keeps the (date, class_id, department_id) key
+non-null and so unique.
+"""
+from collections import defaultdict
+from sqlalchemy import case, func, insert, select, update
+from app import db
+from app.models import Attendance, AttendanceDailySummary, Student
+from app.services.upsert import upsert_statement
+
+NO_CLASS = 0
+NO_DEPARTMENT = 0
+
+STATUS_COLUMNS = {
+    'Present': 'present',
+    'Absent': 'absent',
+    'Late': 'late'
+}
+
+
+def apply_attendance_changes(date, changes):
+    """
+    Update the rollup for one day.
+
+    `changes` is an iterable of (student, old_status, new_status) tuples where
+    old_status is None for newly created records. The counts are changed in
+    the session's transaction; the caller commits.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for student, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        key = (student.class_id or NO_CLASS, student.department_id or NO_DEPARTMENT)
+        if old_status in STATUS_COLUMNS:
+            deltas[key][STATUS_COLUMNS[old_status]] -= 1
+        if new_status in STATUS_COLUMNS:
+            deltas[key][STATUS_COLUMNS[new_status]] += 1
+
+    if not deltas:
+        return
+
+    rows = [{'date': date, 'class_id': class_id, 'department_id': department_id,
+             **{column: columns.get(column, 0) for column in STATUS_COLUMNS.values()}}
+            for (class_id, department_id), columns in deltas.items()]
+    S = AttendanceDailySummary
+    stmt = upsert_statement(S, rows, [S.date, S.class_id, S.department_id], STATUS_COLUMNS.values(), increment=True)
+    if stmt is not None:
+        db.session.execute(stmt)
+    else:
+        for row in rows:
+            _add_deltas(row)
+
+
+def _add_deltas(row):
+    """Fallback for dialects without ON CONFLICT: an in-place UPDATE, inserting the row if there was none."""
+    S = AttendanceDailySummary
+    columns = STATUS_COLUMNS.values()
+    result = db.session.execute(
+        update(S).where(S.date == row['date'], S.class_id == row['class_id'], S.department_id == row['department_id'])
+        .values({column: getattr(S, column) + row[column] for column in columns})
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(S).values(row))
+
+
+def rebuild_attendance_summary(date_from=None, date_to=None):
+    """Recompute the rollup from Attendance, optionally for a date range. Returns rows written."""
+    delete = AttendanceDailySummary.query
+    class_id = func.coalesce(Student.class_id, NO_CLASS)
+    department_id = func.coalesce(Student.department_id, NO_DEPARTMENT)
+    source = select(
+        Attendance.date,
+        class_id,
+        department_id,
+        *[func.sum(case((Attendance.status == status, 1), else_=0)) for status in STATUS_COLUMNS]
+    ).join(Student, Student.id == Attendance.student_id)
+
+    if date_from:
+        delete = delete.filter(AttendanceDailySummary.date >= date_from)
+        source = source.where(Attendance.date >= date_from)
+    if date_to:
+        delete = delete.filter(AttendanceDailySummary.date <= date_to)
+        source = source.where(Attendance.date <= date_to)
+
+    source = source.group_by(Attendance.date, class_id, department_id)
+
+    delete.delete(synchronize_session=False)
+    result = db.session.execute(insert(AttendanceDailySummary).from_select(
+        ['date', 'class_id', 'department_id', *STATUS_COLUMNS.values()], source
+    ))
+    db.session.commit()
+    return result.rowcount
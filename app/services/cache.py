@@ -0,0 +1,409 @@
+"""
+Response and fragment cache with pluggable backends.
+
+Backends (CACHE_TYPE):
+    'null'        caching disabled
+    'lru'         in-process LRU (CACHE_THRESHOLD entries); per worker process
+    'filesystem'  pickled files under CACHE_DIR (about CACHE_THRESHOLD files);
+                  shared by workers on one host
+    'redis'       any Redis-compatible server at CACHE_REDIS_URL (needs the
+                  `redis` package); 'fake://' uses the in-memory FakeRedis
+
+Entries are tagged with the tables they were computed from. Each table has
+a version token in the backend and the tokens are part of the cache key.
+Session events record which tables a transaction wrote (flushed objects and
+ORM INSERT/UPDATE/DELETE statements), and after_commit replaces their tokens.
+Entries built from the old data are then never read again and age out via
+TTL/LRU, so pages are fresh right after a write. With the 'lru' backend this
+only holds within one process, so when MULTI_PROCESS is set (gunicorn with
+WEB_CONCURRENCY > 1, or Vercel) 'lru' is replaced by 'null'; the default
+CACHE_TYPE picks 'redis' or 'filesystem' there instead (see config.py).
+
+Entries can also depend on finer-grained tags such as 'student:12'. Flushed
+rows produce the tags registered for their model with cache.tag_rows(), and
+bulk statements add theirs with record_write(); both are invalidated on
+commit like table tags.
+
+    @cache.cached_view(depends_on=(Attendance, Student))
+    def attendance_analytics(): ...
+
+    stats = cache.get_or_set('dashboard-stats', dashboard_stats, depends_on=(Student, Fee))
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import request, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.services.replica import on_primary
+
+# ==================== BACKENDS ====================
+
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def get_many(self, keys):
+        return [None] * len(keys)
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache:
+    """Thread-safe in-process cache evicting the least recently used entry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires and expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._entries[key] = (time.time() + timeout if timeout else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemCache:
+    """
+    One pickle file per key; writes are atomic renames so readers never see partial files.
+
+    Every PRUNE_INTERVAL writes the directory is pruned back to `max_entries`
+    files: expired entries first, then the least recently written. Entries
+    retired by a version change are never read again, so this is what
+    removes them.
+    """
+    PRUNE_INTERVAL = 64
+
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def _entries(self):
+        # Cache files are sha1 hex names; mkstemp's in-flight temp files are left alone
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if len(entry.name) == 40]
+
+    def prune(self):
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        now = time.time()
+        keep = []
+        for entry in entries:
+            try:
+                written = entry.stat().st_mtime
+                with open(entry.path, 'rb') as f:
+                    expires, _ = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                expires = now  # removed meanwhile, or unreadable
+            if expires and expires <= now:
+                self._remove(entry.path)
+            else:
+                keep.append((written, entry.path))
+        keep.sort()
+        for _, path in keep[:max(len(keep) - self.max_entries, 0)]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires and expires < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((time.time() + timeout if timeout else None, value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._writes += 1
+        if self._writes % self.PRUNE_INTERVAL == 0:
+            self.prune()
+
+    def delete(self, key):
+        self._remove(self._path(key))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+
+
+class RedisCache:
+    """Stores pickled values in a redis-py compatible client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _load(raw):
+        return pickle.loads(raw) if raw is not None else None
+
+    def get(self, key):
+        return self._load(self.client.get(key))
+
+    def get_many(self, keys):
+        return [self._load(raw) for raw in self.client.mget(keys)] if keys else []
+
+    def set(self, key, value, timeout=None):
+        self.client.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=int(timeout) if timeout else None)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def clear(self):
+        self.client.flushdb()
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of the redis-py client RedisCache uses."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            value, expires = self._data.get(name, (None, None))
+            if expires and expires < time.time():
+                del self._data[name]
+                return None
+            return value
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (value, time.time() + ex if ex else None)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+
+def make_backend(config):
+    cache_type = config['CACHE_TYPE']
+    if cache_type == 'lru':
+        return LRUCache(config['CACHE_THRESHOLD'])
+    if cache_type == 'filesystem':
+        return FileSystemCache(config['CACHE_DIR'], config['CACHE_THRESHOLD'])
+    if cache_type == 'redis':
+        if config['CACHE_REDIS_URL'] == 'fake://':
+            return RedisCache(FakeRedis())
+        import redis
+        return RedisCache(redis.Redis.from_url(config['CACHE_REDIS_URL']))
+    if cache_type == 'null':
+        return NullCache()
+    raise ValueError(f"Unknown CACHE_TYPE: {cache_type!r}")
+
+
+# ==================== CACHE ====================
+
+
+def _table_names(models):
+    return tuple(sorted(model.__tablename__ for model in models))
+
+
+class Cache:
+    def __init__(self):
+        self.backend = NullCache()
+        self.prefix = ''
+        self.default_timeout = 300
+        self.row_taggers = {}
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_TYPE', 'lru')
+        app.config.setdefault('CACHE_DEFAULT_TIMEOUT', 300)
+        app.config.setdefault('CACHE_THRESHOLD', 1024)
+        app.config.setdefault('CACHE_DIR', os.path.join(app.instance_path, 'cache'))
+        app.config.setdefault('CACHE_REDIS_URL', None)
+        app.config.setdefault('CACHE_KEY_PREFIX', 'sms:')
+        app.config.setdefault('MULTI_PROCESS', False)
+
+        if app.config['CACHE_TYPE'] == 'lru' and app.config['MULTI_PROCESS']:
+            # Commits would only invalidate the writing process's copy
+            app.logger.warning("CACHE_TYPE 'lru' is per process and several processes serve requests; "
+                               "caching is off. Use 'redis' or 'filesystem'.")
+            app.config['CACHE_TYPE'] = 'null'
+        self.backend = make_backend(app.config)
+        self.prefix = app.config['CACHE_KEY_PREFIX']
+        self.default_timeout = app.config['CACHE_DEFAULT_TIMEOUT']
+        app.extensions['cache'] = self
+
+    @property
+    def shared(self):
+        """True when every process sees the same entries, so a commit anywhere retires them everywhere."""
+        return isinstance(self.backend, (FileSystemCache, RedisCache))
+
+    def _versions(self, tables):
+        """Current version token of each table, creating tokens that are missing (or were evicted)."""
+        keys = [f'{self.prefix}version:{table}' for table in tables]
+        versions = self.backend.get_many(keys)
+        for i, version in enumerate(versions):
+            if version is None:
+                versions[i] = uuid.uuid4().hex[:12]
+                self.backend.set(keys[i], versions[i])
+        return versions
+
+    def invalidate(self, *tables):
+        """Retire every entry that depends on any of `tables`."""
+        for table in tables:
+            self.backend.set(f'{self.prefix}version:{table}', uuid.uuid4().hex[:12])
+
+    def tag_rows(self, model, tags_for):
+        """Also invalidate the tags returned by `tags_for(row)` whenever a `model` row is written."""
+        self.row_taggers.setdefault(model, []).append(tags_for)
+
+    def get_or_set(self, key, compute, depends_on=(), timeout=None, tags=()):
+        """
+        Return the cached value for `key`, calling `compute()` and storing its
+        result on a miss. The entry is dropped when a table in `depends_on`
+        (models) or any of `tags` is written.
+        """
+        names = _table_names(depends_on) + tuple(sorted(tags))
+        full_key = f"{self.prefix}{key}:{'.'.join(self._versions(names))}"
+        value = self.backend.get(full_key)
+        if value is None:
+            # Never from a lagging replica: the entry outlives the lag (see app/services/replica.py)
+            with on_primary():
+                value = compute()
+            self.backend.set(full_key, value, timeout or self.default_timeout)
+        return value
+
+    def cached_view(self, depends_on, timeout=None):
+        """
+        Cache a GET view's rendered HTML per role, user and query string.
+
+        Pages are rendered fresh (and not stored) while flashed messages are
+        pending, since base.html would bake them into the cached copy.
+        Non-string responses such as redirects are never cached.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if request.method != 'GET' or '_flashes' in session or isinstance(self.backend, NullCache):
+                    return f(*args, **kwargs)
+                query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+                key = f'view:{request.endpoint}:{current_user.role}:{current_user.id}:{kwargs}:{query}'
+                try:
+                    return self.get_or_set(key, lambda: _only_text(f(*args, **kwargs)), depends_on, timeout)
+                except _Uncacheable as uncacheable:
+                    return uncacheable.response
+            return decorated_function
+        return decorator
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def _only_text(response):
+    if not isinstance(response, str):
+        raise _Uncacheable(response)
+    return response
+
+
+# ==================== INVALIDATION ====================
+
+_WRITTEN_TABLES = 'cache_written_tables'
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_flushed_tables(db_session, flush_context):
+    from app import cache
+    tables = db_session.info.setdefault(_WRITTEN_TABLES, set())
+    for obj in (*db_session.new, *db_session.dirty, *db_session.deleted):
+        tables.add(obj.__table__.name)
+        for tags_for in cache.row_taggers.get(type(obj), ()):
+            tables.update(tags_for(obj))
+
+
+def record_write(db_session, *tags):
+    """Invalidate `tags` when `db_session` commits (for bulk statements that bypass the flush)."""
+    db_session.info.setdefault(_WRITTEN_TABLES, set()).update(tags)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _record_dml_tables(orm_execute_state):
+    if orm_execute_state.is_select or orm_execute_state.bind_mapper is None:
+        return
+    tables = orm_execute_state.session.info.setdefault(_WRITTEN_TABLES, set())
+    tables.add(orm_execute_state.bind_mapper.local_table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_written_tables(db_session):
+    tables = db_session.info.pop(_WRITTEN_TABLES, None)
+    if tables:
+        from app import cache
+        cache.invalidate(*tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_written_tables(db_session):
+    db_session.info.pop(_WRITTEN_TABLES, None)
@@ -0,0 +1,65 @@
+"""
+Aggregated statistics for the admin dashboard.
+
+Everything the dashboard shows is fetched with three statements: one row of
+scalar counts, one GROUP BY over fee status and one GROUP BY over
+(date, status) for the attendance chart.
+"""
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from app import db
+from app.models import User, Student, Teacher, Class, Subject, Exam, Attendance, Fee
+
+FEE_STATUSES = ('Paid', 'Pending', 'Overdue')
+
+
+def _count(model):
+    return select(func.count(model.id)).scalar_subquery()
+
+
+def entity_counts():
+    """Return the headline counts (students, teachers, ...) in one query."""
+    row = db.session.execute(select(
+        _count(Student).label('students'),
+        _count(Teacher).label('teachers'),
+        _count(Class).label('classes'),
+        _count(Subject).label('subjects'),
+        _count(Exam).label('exams'),
+        _count(User).label('users'),
+    )).one()
+    return dict(row._mapping)
+
+
+def fee_status_counts():
+    """Return {'paid': n, 'pending': n, 'overdue': n} from one GROUP BY."""
+    rows = db.session.query(Fee.status, func.count(Fee.id)).group_by(Fee.status).all()
+    counts = dict(rows)
+    return {status.lower(): counts.get(status, 0) for status in FEE_STATUSES}
+
+
+def attendance_by_day(days=7, today=None):
+    """Present/absent counts for the last `days` days, oldest first."""
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+    rows = db.session.query(Attendance.date, Attendance.status, func.count(Attendance.id)) \
+        .filter(Attendance.date >= start, Attendance.date <= today) \
+        .group_by(Attendance.date, Attendance.status).all()
+
+    counts = {}
+    for d, status, n in rows:
+        counts[(d, status)] = n
+
+    data = []
+    for i in range(days - 1, -1, -1):
+        d = today - timedelta(days=i)
+        data.append({
+            'date': d.strftime('%a'),
+            'present': counts.get((d, 'Present'), 0),
+            'absent': counts.get((d, 'Absent'), 0)
+        })
+    return data
+
+
+def dashboard_stats():
+    """Return (stats, fee_stats, attendance_data) for the admin dashboard."""
+    return entity_counts(), fee_status_counts(), attendance_by_day()
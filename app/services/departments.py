@@ -0,0 +1,92 @@
+"""
+Per-department statistics for the department analytics page.
+
+Every figure is a GROUP BY department_id subquery, LEFT JOINed onto
+departments, so all departments come back from a single SELECT however many
+there are.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import AttendanceDailySummary, Class, Department, Fee, Student, Subject, Teacher
+
+
+@dataclass
+class DepartmentStats:
+    name: str
+    code: str
+    head: str
+    students: int
+    teachers: int
+    classes: int
+    subjects: int
+    attendance_rate: float
+    fee_collection: float
+
+
+def _count_by_department(model):
+    return select(model.department_id, func.count(model.id).label('n')) \
+        .group_by(model.department_id).subquery()
+
+
+def _percent(part, whole):
+    return round((part / whole * 100), 1) if whole else 0
+
+
+def department_stats(days=7, today=None):
+    """Return a DepartmentStats for every department, ordered by id."""
+    today = today or date.today()
+    S = AttendanceDailySummary
+
+    students = _count_by_department(Student)
+    teachers = _count_by_department(Teacher)
+    classes = _count_by_department(Class)
+    subjects = _count_by_department(Subject)
+    attendance = select(
+        S.department_id, func.sum(S.present).label('present'),
+        func.sum(S.present + S.absent + S.late).label('total')
+    ).where(S.date >= today - timedelta(days=days)).group_by(S.department_id).subquery()
+    fees = select(
+        Student.department_id, func.count(Fee.id).label('total'),
+        func.sum(case((Fee.status == 'Paid', 1), else_=0)).label('paid')
+    ).join(Student, Student.id == Fee.student_id).group_by(Student.department_id).subquery()
+    head = aliased(Teacher)
+
+    rows = db.session.execute(
+        select(
+            Department.name, Department.code, head.first_name, head.last_name,
+            func.coalesce(students.c.n, 0).label('students'),
+            func.coalesce(teachers.c.n, 0).label('teachers'),
+            func.coalesce(classes.c.n, 0).label('classes'),
+            func.coalesce(subjects.c.n, 0).label('subjects'),
+            func.coalesce(attendance.c.present, 0).label('present'),
+            func.coalesce(attendance.c.total, 0).label('attendance_total'),
+            func.coalesce(fees.c.paid, 0).label('fees_paid'),
+            func.coalesce(fees.c.total, 0).label('fees_total')
+        )
+        .outerjoin(head, head.id == Department.head_teacher_id)
+        .outerjoin(students, students.c.department_id == Department.id)
+        .outerjoin(teachers, teachers.c.department_id == Department.id)
+        .outerjoin(classes, classes.c.department_id == Department.id)
+        .outerjoin(subjects, subjects.c.department_id == Department.id)
+        .outerjoin(attendance, attendance.c.department_id == Department.id)
+        .outerjoin(fees, fees.c.department_id == Department.id)
+        .order_by(Department.id)
+    ).all()
+
+    return [
+        DepartmentStats(
+            name=row.name,
+            code=row.code,
+            head=f"{row.first_name} {row.last_name}" if row.first_name is not None else 'Not Assigned',
+            students=row.students,
+            teachers=row.teachers,
+            classes=row.classes,
+            subjects=row.subjects,
+            attendance_rate=_percent(row.present, row.attendance_total),
+            fee_collection=_percent(row.fees_paid, row.fees_total)
+        )
+        for row in rows
+    ]
@@ -0,0 +1,50 @@
+"""
+Streaming CSV exports.
+
+Exports select plain columns (related tables are joined into the same
+SELECT, so there is no per-row lazy loading) and stream the result through a
+server-side cursor with `yield_per`. Rows are written to the response in
+batches as they arrive, so memory stays flat regardless of export size.
+"""
+import csv
+import io
+from flask import Response, stream_with_context
+from app import db
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_csv(header, statement, format_row, batch_size=EXPORT_BATCH_SIZE):
+    """Yield CSV text for `header` followed by `format_row(row)` for each result row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    result = db.session.execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+    for rows in result.partitions():
+        for row in rows:
+            writer.writerow(format_row(row))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
+def stream_csv(filename, header, statement, format_row):
+    """Return a streaming text/csv attachment Response."""
+    return Response(
+        stream_with_context(iter_csv(header, statement, format_row)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def date_or(value, default='N/A'):
+    return value.strftime('%Y-%m-%d') if value else default
+
+
+def class_label(grade, section, default='N/A'):
+    return f"{grade}-{section}" if grade is not None else default
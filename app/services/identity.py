@@ -0,0 +1,89 @@
+"""
+Cached identity for Flask-Login.
+
+The user loader runs on every request (and check_approval_status reads the
+approval flag right after), so instead of a users query per request it
+returns a small UserSnapshot (id, username, role, approval flag) from a
+bounded in-process LRU with a short TTL.
+
+Snapshots are dropped as soon as a commit touches their user: after_flush
+records the ids of User rows that were added, changed or deleted
+(approve_user, reject_user, delete_student, delete_teacher, ...), and
+after_commit evicts them. Other worker processes pick the change up when
+their entry expires (USER_CACHE_TTL seconds).
+"""
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.services.cache import LRUCache
+
+_CHANGED_USER_IDS = 'identity_changed_user_ids'
+
+
+class UserSnapshot(UserMixin):
+    """The fields of User that current_user is read for."""
+    __slots__ = ('id', 'username', 'role', 'is_approved')
+
+    def __init__(self, id, username, role, is_approved):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.is_approved = is_approved
+
+    def __repr__(self):
+        return f'<User {self.username}>'
+
+
+class IdentityCache:
+    def __init__(self):
+        self.entries = LRUCache(0)
+        self.ttl = 0
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_SIZE', 1024)
+        app.config.setdefault('USER_CACHE_TTL', 60)
+        self.entries = LRUCache(app.config['USER_CACHE_SIZE'])
+        self.ttl = app.config['USER_CACHE_TTL']
+
+    def load(self, user_id):
+        """Return the UserSnapshot for `user_id`, or None if there is no such user."""
+        snapshot = self.entries.get(user_id)
+        if snapshot is None:
+            from app import db
+            from app.models import User
+            row = db.session.query(User.id, User.username, User.role, User.is_approved) \
+                .filter(User.id == user_id).first()
+            if row is None:
+                return None
+            snapshot = UserSnapshot(*row)
+            if self.ttl:
+                self.entries.set(user_id, snapshot, self.ttl)
+        return snapshot
+
+    def forget(self, *user_ids):
+        for user_id in user_ids:
+            self.entries.delete(user_id)
+
+
+identity_cache = IdentityCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changed_users(db_session, flush_context):
+    from app.models import User
+    changed = {obj.id for obj in (*db_session.new, *db_session.dirty, *db_session.deleted)
+               if isinstance(obj, User)}
+    if changed:
+        db_session.info.setdefault(_CHANGED_USER_IDS, set()).update(changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_changed_users(db_session):
+    changed = db_session.info.pop(_CHANGED_USER_IDS, None)
+    if changed:
+        identity_cache.forget(*changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(db_session):
+    db_session.info.pop(_CHANGED_USER_IDS, None)
@@ -0,0 +1,195 @@
+"""
+Student photo pipeline.
+
+An upload is checked in the request: Pillow must recognise it as a JPEG,
+PNG, WebP or GIF within MAX_PHOTO_PIXELS, and must be able to decode all of
+it (a JPEG at 1/8 scale, which still reads every byte), so a truncated file
+is turned away with a message instead of failing later. It is then parked
+in PHOTO_STAGING_DIR (under JOB_OUTPUT_DIR) and a background job decodes it
+once, applies the EXIF orientation, and writes each variant in
+PHOTO_VARIANTS as WebP and as a JPEG fallback. Nothing is copied from the
+original file's metadata. Student.photo_file is switched to the new photo
+once every variant exists, so pages keep showing the previous photo until
+then.
+
+The job runs in the web process's job thread by default, or in `flask jobs
+worker` with JOB_EXECUTOR = 'worker' (which must then share JOB_OUTPUT_DIR
+and UPLOAD_FOLDER with the web processes). PHOTO_INLINE = 1 renders in the
+upload request instead, for deployments that cannot run jobs.
+
+Variant files are named '<key>-<variant>.<ext>', where the key is a hash of
+the uploaded bytes and PIPELINE_VERSION. A name therefore never changes
+content, and /media/photos serves them with a one-year immutable
+Cache-Control. Templates use photo_urls() through the student_photo macro
+in partials/photo.html; photos uploaded before this pipeline still show the
+original file.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+from collections import namedtuple
+from flask import current_app, url_for
+
+# Bump when the variants change so every photo gets new file names
+PIPELINE_VERSION = 1
+
+# name: (width, height, crop); crop=True fills the box exactly, False fits inside it
+PHOTO_VARIANTS = {
+    'thumb': (96, 96, True),     # list avatars (up to 48px at 2x)
+    'medium': (480, 480, False)  # detail views
+}
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+ONE_YEAR = 365 * 24 * 3600
+
+_PHOTO_KEY = re.compile(r'^[0-9a-f]{32}$')
+
+
+class InvalidImageError(ValueError):
+    pass
+
+
+# A checked upload: `key` names its variants, `data` is the uploaded file
+UploadedPhoto = namedtuple('UploadedPhoto', 'key data')
+
+
+def is_photo_key(photo_file):
+    return bool(photo_file and _PHOTO_KEY.match(photo_file))
+
+
+def photo_filename(key, variant, ext):
+    return f'{key}-{variant}.{ext}'
+
+
+def photo_urls(photo_file, variant='thumb'):
+    """
+    Return {'webp': url, 'jpeg': url} for a processed photo, {'jpeg': url}
+    for one uploaded before the pipeline, or None when there is no photo.
+    """
+    if is_photo_key(photo_file):
+        return {ext_name: url_for('main.media_photo', filename=photo_filename(photo_file, variant, ext))
+                for ext_name, ext in (('webp', 'webp'), ('jpeg', 'jpg'))}
+    if photo_file and photo_file != 'default.jpg':
+        return {'jpeg': url_for('static', filename='uploads/photos/' + photo_file)}
+    return None
+
+
+def photos_dir():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'photos')
+
+
+# ==================== UPLOAD ====================
+
+def check_photo(file_storage):
+    """
+    Check an uploaded photo and return it as an UploadedPhoto. Raises
+    InvalidImageError if it is not an acceptable image.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    data = file_storage.read()
+    unreadable = InvalidImageError('The photo is not a readable image.')
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format, (width, height) = image.format, image.size
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise unreadable
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidImageError('Photos must be JPEG, PNG, WebP or GIF images.')
+    if width * height > current_app.config['MAX_PHOTO_PIXELS']:
+        raise InvalidImageError(f'The photo is too large ({width}x{height} pixels).')
+    try:
+        # verify() does not decode pixel data; a truncated file only fails here
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft(image.mode, (1, 1))
+            image.load()
+    except (OSError, SyntaxError, ValueError):
+        raise unreadable
+
+    return UploadedPhoto(hashlib.sha256(f'{PIPELINE_VERSION}:'.encode() + data).hexdigest()[:32], data)
+
+
+def save_student_photo(student_id, photo, user_id=None):
+    """
+    Give the student `photo` (an UploadedPhoto): queue a job to render it and
+    return the Job, or render it now and return None with PHOTO_INLINE.
+    """
+    if current_app.config['PHOTO_INLINE']:
+        apply_student_photo(student_id, photo.key, io.BytesIO(photo.data))
+        return None
+
+    from app.services.jobs import enqueue
+    directory = current_app.config['PHOTO_STAGING_DIR']
+    os.makedirs(directory, exist_ok=True)
+    staged_path = os.path.join(directory, photo.key)
+    with open(staged_path, 'wb') as f:
+        f.write(photo.data)
+    return enqueue(process_student_photo, description=f"Photo for student #{student_id}", user_id=user_id,
+                   student_id=student_id, staged_path=staged_path)
+
+
+# ==================== PROCESSING ====================
+
+def _save(image, path, **params):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        image.save(f, **params)
+    os.replace(tmp_path, path)
+
+
+def render_variants(source, key, directory):
+    """Write every variant of the image file `source` into `directory`."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # Flatten transparency onto white; JPEG has no alpha channel
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+
+    os.makedirs(directory, exist_ok=True)
+    for variant, (width, height, crop) in PHOTO_VARIANTS.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.LANCZOS)
+        resized.info = {}  # no EXIF/ICC/XMP from the upload
+        _save(resized, os.path.join(directory, photo_filename(key, variant, 'webp')),
+              format='WEBP', quality=WEBP_QUALITY, method=4)
+        _save(resized, os.path.join(directory, photo_filename(key, variant, 'jpg')),
+              format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+
+
+def apply_student_photo(student_id, key, source):
+    """Render the variants of the image `source` (a path or file object) and switch the student to them."""
+    from app import db
+    from app.models import Student
+
+    directory = photos_dir()
+    # The same picture uploaded twice shares its variants
+    if not all(os.path.exists(os.path.join(directory, photo_filename(key, variant, 'jpg')))
+               for variant in PHOTO_VARIANTS):
+        render_variants(source, key, directory)
+    student = db.session.get(Student, student_id)
+    if student is not None:
+        student.photo_file = key
+        db.session.commit()
+
+
+def process_student_photo(job, student_id, staged_path):
+    """Job task: render a photo staged by save_student_photo() and switch the student to it."""
+    key = os.path.basename(staged_path)
+    apply_student_photo(student_id, key, staged_path)
+    if os.path.exists(staged_path):
+        os.remove(staged_path)
+    return {'photo': key}
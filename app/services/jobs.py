@@ -0,0 +1,287 @@
+"""
+Background jobs on a database-backed queue.
+
+Heavy admin actions enqueue a job (a row in `jobs`) and return at once;
+worker processes started with `flask jobs worker` claim due jobs and run
+them away from the web workers. Nothing beyond the application database is
+needed, SQLite included.
+
+A job is a call of a module-level function, stored as 'module:function'
+with JSON keyword arguments. The function receives a JobContext first, to
+report progress and to find its output directory, and returns a JSON
+result; {'file': name} marks a file in the output directory as the job's
+download.
+
+Claiming is an UPDATE guarded on status = 'queued', so two workers never
+run the same job; on PostgreSQL the candidate row is picked with
+FOR UPDATE SKIP LOCKED so idle workers do not queue up behind each other.
+A job that raises is retried with exponential backoff (JOB_RETRY_DELAY,
+doubled per attempt) up to its max_attempts, then marked failed. A running
+job whose worker died (no progress for JOB_TIMEOUT seconds) is put back on
+the queue.
+
+With JOB_EXECUTOR = 'thread' (the default) jobs run in a thread of each
+web process instead, so nothing else has to be deployed; the thread starts
+on the first request and whenever a job is enqueued. Set JOB_EXECUTOR =
+'worker' only where `flask jobs worker` actually runs. On Vercel the thread
+only runs while the instance is handling requests; a job cut off by a
+frozen instance is requeued after JOB_TIMEOUT.
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, update
+from app import db
+from app.models import Job
+
+FINISHED = ('done', 'failed')
+MAINTENANCE_INTERVAL = 60
+
+
+def task_name(task):
+    return f'{task.__module__}:{task.__qualname__}'
+
+
+def resolve_task(name):
+    module, _, qualname = name.partition(':')
+    return getattr(importlib.import_module(module), qualname)
+
+
+def job_output_dir(job_id):
+    return os.path.join(current_app.config['JOB_OUTPUT_DIR'], str(job_id))
+
+
+def job_result(job):
+    return json.loads(job.result) if job.result else None
+
+
+def job_download_path(job):
+    """Return the path of the job's output file, or None if it has none."""
+    result = job_result(job)
+    if job.status != 'done' or not isinstance(result, dict) or not result.get('file'):
+        return None
+    return os.path.join(job_output_dir(job.id), os.path.basename(result['file']))
+
+
+def job_status(job):
+    """The JSON shape served by the job status endpoint."""
+    return {
+        'id': job.id,
+        'description': job.description,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'error': job.error.strip().splitlines()[-1] if job.error else None,
+        'has_download': job_download_path(job) is not None,
+        'created_at': job.created_at.isoformat(timespec='seconds') if job.created_at else None,
+        'finished_at': job.finished_at.isoformat(timespec='seconds') if job.finished_at else None
+    }
+
+
+class JobContext:
+    """Handed to a running task as its first argument."""
+
+    def __init__(self, job_id, attempt):
+        self.id = job_id
+        self.attempt = attempt
+
+    def output_path(self, filename):
+        directory = job_output_dir(self.id)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+
+    def progress(self, done, total=None):
+        """Record progress, which also tells the queue the worker is alive. Commits the session."""
+        values = {'progress': done, 'locked_at': datetime.utcnow()}
+        if total is not None:
+            values['total'] = total
+        db.session.execute(update(Job).where(Job.id == self.id).values(**values))
+        db.session.commit()
+
+
+# ==================== QUEUE ====================
+
+def enqueue(task, description=None, user_id=None, max_attempts=None, **kwargs):
+    """Queue `task(context, **kwargs)` and return the Job. Commits the session."""
+    job = Job(task=task_name(task), description=description, payload=json.dumps(kwargs), created_by=user_id,
+              max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'])
+    db.session.add(job)
+    db.session.commit()
+    if current_app.config['JOB_EXECUTOR'] == 'thread':
+        start_thread_worker(current_app._get_current_object())
+    return job
+
+
+def retry(job_id):
+    """Put a failed job back on the queue with a fresh set of attempts."""
+    requeued = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == 'failed')
+        .values(status='queued', attempts=0, run_at=datetime.utcnow(), error=None, finished_at=None, progress=0)
+    ).rowcount
+    db.session.commit()
+    if requeued and current_app.config['JOB_EXECUTOR'] == 'thread':
+        start_thread_worker(current_app._get_current_object())
+    return bool(requeued)
+
+
+def claim_job(worker_id):
+    """Mark the oldest due job as running for `worker_id` and return it, or None if none is due."""
+    while True:
+        now = datetime.utcnow()
+        job_id = db.session.query(Job.id) \
+            .filter(Job.status == 'queued', Job.run_at <= now) \
+            .order_by(Job.run_at, Job.id).limit(1) \
+            .with_for_update(skip_locked=True).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+        # Another worker got there first; look again
+
+
+def run_job(job):
+    """Run a claimed job and record its result, or schedule its retry."""
+    job_id, task, attempt, max_attempts = job.id, job.task, job.attempts, job.max_attempts
+    try:
+        result = resolve_task(task)(JobContext(job_id, attempt), **json.loads(job.payload))
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Job %s (%s) failed on attempt %s of %s", job_id, task, attempt, max_attempts)
+        now = datetime.utcnow()
+        values = {'error': traceback.format_exc()[-4000:], 'locked_by': None}
+        if attempt < max_attempts:
+            delay = current_app.config['JOB_RETRY_DELAY'] * 2 ** (attempt - 1)
+            values.update(status='queued', run_at=now + timedelta(seconds=delay))
+        else:
+            values.update(status='failed', finished_at=now)
+    else:
+        values = {'status': 'done', 'result': json.dumps(result), 'error': None, 'locked_by': None,
+                  'progress': func.coalesce(Job.total, Job.progress), 'finished_at': datetime.utcnow()}
+    db.session.execute(update(Job).where(Job.id == job_id).values(**values))
+    db.session.commit()
+    db.session.remove()
+
+
+def release_stale_jobs(timeout):
+    """Requeue (or fail, when out of attempts) running jobs that have not reported for `timeout` seconds."""
+    now = datetime.utcnow()
+    stale = (Job.status == 'running', Job.locked_at < now - timedelta(seconds=timeout))
+    db.session.execute(
+        update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status='failed', error='Worker stopped responding', locked_by=None, finished_at=now)
+    )
+    db.session.execute(update(Job).where(*stale).values(status='queued', locked_by=None, run_at=now))
+    db.session.commit()
+
+
+def prune_jobs(max_age):
+    """Delete finished jobs older than `max_age` seconds, with their output files."""
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    job_ids = [job_id for job_id, in db.session.query(Job.id)
+               .filter(Job.status.in_(FINISHED), Job.finished_at < cutoff)]
+    for job_id in job_ids:
+        shutil.rmtree(job_output_dir(job_id), ignore_errors=True)
+    if job_ids:
+        db.session.execute(delete(Job).where(Job.id.in_(job_ids)))
+    db.session.commit()
+
+
+# ==================== WORKERS ====================
+
+def work(worker_id=None, poll_interval=1.0, burst=False, stop=None):
+    """
+    Claim and run jobs until `stop` (a threading.Event) is set, or with
+    `burst` until no job is due. Needs an app context.
+    """
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+    stop = stop or threading.Event()
+    next_maintenance = 0
+    while not stop.is_set():
+        if time.monotonic() >= next_maintenance:
+            release_stale_jobs(current_app.config['JOB_TIMEOUT'])
+            prune_jobs(current_app.config['JOB_RETENTION'])
+            next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+        job = claim_job(worker_id)
+        if job is None:
+            if burst:
+                return
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+
+
+def _worker_process(app, poll_interval, burst):
+    stop = threading.Event()
+    # Finish the current job, then exit
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    with app.app_context():
+        work(poll_interval=poll_interval, burst=burst, stop=stop)
+
+
+def run_workers(app, processes=1, poll_interval=1.0, burst=False):
+    """Run `processes` worker processes until they are stopped (SIGINT/SIGTERM)."""
+    with app.app_context():
+        db.engine.dispose()  # children must not share the parent's connections
+    # fork: the app object is inherited rather than rebuilt; not daemonic, as jobs may start process pools
+    context = multiprocessing.get_context('fork')
+    children = [context.Process(target=_worker_process, args=(app, poll_interval, burst), name=f'job-worker-{i}')
+                for i in range(processes)]
+    for child in children:
+        child.start()
+    signal.signal(signal.SIGTERM, lambda *args: [child.terminate() for child in children])
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the children get it from the terminal too
+    for child in children:
+        child.join()
+
+
+_thread_lock = threading.Lock()
+_thread_wakeup = threading.Event()
+_thread = None
+
+
+def start_thread_worker(app):
+    """Wake (or start) the in-process worker thread used with JOB_EXECUTOR = 'thread'."""
+    global _thread
+    with _thread_lock:
+        _thread_wakeup.set()
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_thread_worker, args=(app,), name='job-worker', daemon=True)
+            _thread.start()
+
+
+def init_job_executor(app):
+    """With JOB_EXECUTOR = 'thread', start the worker thread on the first request so jobs queued earlier run."""
+    if app.config['JOB_EXECUTOR'] != 'thread':
+        return
+
+    @app.before_request
+    def _ensure_thread_worker():
+        if _thread is None or not _thread.is_alive():
+            start_thread_worker(app)
+
+
+def _thread_worker(app):
+    with app.app_context():
+        while True:
+            _thread_wakeup.clear()
+            work(burst=True)
+            # Woken by the next enqueue, or in time for a retry that has come due
+            _thread_wakeup.wait(app.config['JOB_RETRY_DELAY'])
@@ -0,0 +1,95 @@
+"""
+Eager-loading policy for list views, and a lazy-load detector.
+
+Relationships on the models stay lazy. Each view declares the relationships
+its template touches by passing one of the option sets below to
+`Query.options()`:
+
+    students = Student.query.options(*STUDENT_LIST).all()
+
+Many-to-one references use joinedload (a LEFT JOIN in the same SELECT);
+collections use selectinload (one extra IN query for the whole list).
+
+The detector counts lazy loads that hit the database during a request. It
+is on when the app runs in debug mode or LAZY_LOAD_DETECTION is set; once a
+request goes past LAZY_LOAD_THRESHOLD loads it logs a warning naming the
+relationships involved, or raises LazyLoadError when LAZY_LOAD_RAISE is set.
+"""
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, configure_mappers, contains_eager, joinedload, undefer
+from app.models import (Student, Teacher, Class, Subject, Attendance, Mark, Fee, TimeTable,
+                        BookIssue, Department, Homework)
+
+# ==================== LOAD POLICIES ====================
+
+# Backref attributes (enrolled_class, class_info, ...) only exist once the mappers are configured
+configure_mappers()
+
+STUDENT_LIST = (joinedload(Student.enrolled_class), joinedload(Student.department))
+TEACHER_LIST = (joinedload(Teacher.department),)
+CLASS_LIST = (joinedload(Class.department), joinedload(Class.class_teacher), undefer(Class.student_count))
+CLASS_OPTIONS = (joinedload(Class.department),)
+CLASS_COUNTS = (undefer(Class.student_count),)
+SUBJECT_LIST = (joinedload(Subject.department),)
+DEPARTMENT_LIST = (joinedload(Department.head_teacher),)
+ATTENDANCE_LIST = (joinedload(Attendance.student).joinedload(Student.enrolled_class),)
+# The fee list already joins Student for search and filters, so reuse that join
+FEE_LIST = (contains_eager(Fee.student),)
+BOOK_ISSUE_LIST = (joinedload(BookIssue.book), joinedload(BookIssue.student))
+HOMEWORK_LIST = (joinedload(Homework.class_info), joinedload(Homework.subject), joinedload(Homework.teacher))
+MARK_LIST = (joinedload(Mark.subject), joinedload(Mark.exam))
+TIMETABLE_FOR_CLASS = (joinedload(TimeTable.subject), joinedload(TimeTable.teacher))
+TIMETABLE_FOR_TEACHER = (joinedload(TimeTable.subject), joinedload(TimeTable.class_info))
+
+
+# ==================== LAZY-LOAD DETECTOR ====================
+
+class LazyLoadError(RuntimeError):
+    """Raised when a request goes past LAZY_LOAD_THRESHOLD lazy loads with LAZY_LOAD_RAISE set."""
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _count_lazy_load(orm_execute_state):
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None or not has_request_context():
+        return
+    lazy_loads = g.get('lazy_loads')
+    if lazy_loads is None:
+        return
+
+    parent = orm_execute_state.lazy_loaded_from.class_.__name__
+    target = orm_execute_state.bind_mapper.class_.__name__ if orm_execute_state.bind_mapper else '?'
+    lazy_loads[f'{parent} -> {target}'] += 1
+
+    threshold = current_app.config['LAZY_LOAD_THRESHOLD']
+    if current_app.config['LAZY_LOAD_RAISE'] and sum(lazy_loads.values()) > threshold:
+        raise LazyLoadError(
+            f'{request.endpoint} triggered more than {threshold} lazy loads: {_describe(lazy_loads)}. '
+            'Add the relationship to the view\'s load policy in app/services/loading.py.'
+        )
+
+
+def _describe(lazy_loads):
+    return ', '.join(f'{name} x{count}' for name, count in lazy_loads.most_common())
+
+
+def init_lazy_load_detector(app):
+    app.config.setdefault('LAZY_LOAD_DETECTION', False)
+    app.config.setdefault('LAZY_LOAD_THRESHOLD', 10)
+    app.config.setdefault('LAZY_LOAD_RAISE', False)
+
+    @app.before_request
+    def start_lazy_load_count():
+        if app.debug or app.config['LAZY_LOAD_DETECTION']:
+            g.lazy_loads = Counter()
+
+    @app.teardown_request
+    def report_lazy_loads(exc):
+        lazy_loads = g.pop('lazy_loads', None)
+        if not lazy_loads:
+            return
+        total = sum(lazy_loads.values())
+        if total > app.config['LAZY_LOAD_THRESHOLD']:
+            app.logger.warning('%s triggered %d lazy loads (threshold %d): %s',
+                               request.endpoint, total, app.config['LAZY_LOAD_THRESHOLD'], _describe(lazy_loads))
@@ -0,0 +1,141 @@
+"""
+Marks loading, bulk saving and exam-sheet uploads.
+
+Existing marks for a (class, subject, exam) are read with one query and
+saves go through a batched INSERT ... ON CONFLICT DO UPDATE on the
+(student_id, subject_id, exam_id) unique index, one statement per batch.
+"""
+import csv
+import io
+import json
+from app import db
+from app.models import Mark, Student, Subject
+from app.services.cache import record_write
+from app.services.student_dashboard import student_tag
+from app.services.upsert import upsert_statement
+
+UPSERT_BATCH_SIZE = 500
+LOOKUP_BATCH_SIZE = 500
+
+
+def load_marks(class_id, subject_id, exam_id):
+    """Return {student_id: score_obtained} for the class in one query."""
+    rows = db.session.query(Mark.student_id, Mark.score_obtained) \
+        .join(Student, Student.id == Mark.student_id) \
+        .filter(Student.class_id == class_id, Mark.subject_id == subject_id, Mark.exam_id == exam_id).all()
+    return dict(rows)
+
+
+def _save_orm(rows):
+    existing = {
+        (m.student_id, m.subject_id, m.exam_id): m for m in Mark.query.filter(
+            Mark.exam_id.in_({row['exam_id'] for row in rows}),
+            Mark.student_id.in_({row['student_id'] for row in rows})
+        ).all()
+    }
+    for row in rows:
+        mark = existing.get((row['student_id'], row['subject_id'], row['exam_id']))
+        if mark:
+            mark.score_obtained = row['score_obtained']
+            mark.max_score = row['max_score']
+        else:
+            db.session.add(Mark(**row))
+
+
+def save_marks(rows):
+    """
+    Insert or update marks. Each row is a dict with student_id, subject_id,
+    exam_id, score_obtained and max_score. The caller commits.
+    """
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        stmt = upsert_statement(Mark, batch, [Mark.student_id, Mark.subject_id, Mark.exam_id],
+                                ['score_obtained', 'max_score'])
+        if stmt is not None:
+            db.session.execute(stmt)
+        else:
+            _save_orm(batch)
+    record_write(db.session, *(student_tag(row['student_id']) for row in rows))
+    return len(rows)
+
+
+def parse_marks_file(upload):
+    """
+    Read an uploaded exam sheet into a list of dicts.
+
+    CSV files need a header row; JSON files hold a list of objects (or
+    {"marks": [...]}). Recognised keys: roll_no or student_id, subject_code
+    or subject_id (optional), score, max_score (optional).
+    """
+    content = upload.read().decode('utf-8-sig')
+    if upload.filename.lower().endswith('.json'):
+        data = json.loads(content)
+        records = data.get('marks', []) if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            raise ValueError('JSON upload must be a list of marks.')
+        if not all(isinstance(record, dict) for record in records):
+            raise ValueError('Each mark in a JSON upload must be an object.')
+        return records
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        yield values[start:start + LOOKUP_BATCH_SIZE]
+
+
+def resolve_uploaded_marks(records, exam_id, default_subject_id, default_max_score, allowed_pairs):
+    """
+    Turn parsed upload records into rows for save_marks().
+
+    Students and subjects are resolved with batched lookups. Records whose
+    (student's class, subject) pair is not in `allowed_pairs`, or with
+    missing/invalid scores, are skipped. Returns (rows, skipped).
+    """
+    roll_nos = {str(r['roll_no']).strip() for r in records if r.get('roll_no') not in (None, '')}
+    student_ids = {int(r['student_id']) for r in records if str(r.get('student_id') or '').isdigit()}
+    codes = {str(r['subject_code']).strip() for r in records if r.get('subject_code')}
+
+    students_by_roll = {}
+    students_by_id = {}
+    for chunk in _chunks(roll_nos):
+        for sid, roll_no, class_id in db.session.query(Student.id, Student.roll_no, Student.class_id) \
+                .filter(Student.roll_no.in_(chunk)):
+            students_by_roll[roll_no] = (sid, class_id)
+    for chunk in _chunks(student_ids):
+        for sid, class_id in db.session.query(Student.id, Student.class_id).filter(Student.id.in_(chunk)):
+            students_by_id[sid] = (sid, class_id)
+    subjects_by_code = dict(db.session.query(Subject.code, Subject.id).filter(Subject.code.in_(codes)).all()) \
+        if codes else {}
+
+    rows = {}
+    skipped = 0
+    for r in records:
+        try:
+            if r.get('roll_no') not in (None, ''):
+                student = students_by_roll.get(str(r['roll_no']).strip())
+            else:
+                student = students_by_id.get(int(r.get('student_id')))
+            if r.get('subject_code'):
+                subject_id = subjects_by_code.get(str(r['subject_code']).strip())
+            else:
+                subject_id = int(r.get('subject_id') or default_subject_id)
+            score = float(r['score'])
+            max_score = float(r.get('max_score') or default_max_score)
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+            continue
+
+        if not student or (student[1], subject_id) not in allowed_pairs:
+            skipped += 1
+            continue
+        # Later rows for the same mark win, as they would in the ON CONFLICT update
+        rows[(student[0], subject_id)] = {
+            'student_id': student[0],
+            'subject_id': subject_id,
+            'exam_id': exam_id,
+            'score_obtained': score,
+            'max_score': max_score
+        }
+    return list(rows.values()), skipped
@@ -0,0 +1,340 @@
+"""
+Request instrumentation: wall time, SQL and template time per endpoint.
+
+The request_started and request_finished signals bracket every request.
+While a request runs, cursor events time each SQL statement. The
+before_render_template and template_rendered signals time rendering, and a
+do_orm_execute listener counts lazy loads, the same way the detector in
+app/services/loading.py does. When the request finishes, the numbers are
+added to per-endpoint totals:
+
+    request count, errors, wall time (histogram, max, recent p50/p95),
+    SQL statements and time, template time, lazy loads
+
+Statements are also grouped by shape: the SQL text with IN lists
+collapsed, since the parameters are already placeholders. For each shape
+the totals record how many requests ran it more than once. A shape that
+repeats within a request is usually a loop issuing one query per row.
+
+The numbers are exposed three ways:
+    /metrics            Prometheus text format. Allowed with
+                        'Authorization: Bearer <METRICS_TOKEN>' or for a
+                        logged-in admin, otherwise 404.
+    /admin/metrics      slowest endpoints and most repeated query shapes
+    log lines           one JSON line per request on the 'app.requests'
+                        logger with METRICS_LOG_REQUESTS, and a warning for
+                        requests slower than SLOW_REQUEST_MS
+
+Totals live in memory and are kept per worker process, as with the 'lru'
+cache. Under gunicorn each scrape or page view shows the worker that
+answered it. Prometheus sums across workers if each one is scraped, but
+the admin page shows a single worker.
+"""
+import hmac
+import json
+import re
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from flask import (Response, abort, g, has_request_context, request, request_finished, request_started,
+                   before_render_template, template_rendered)
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Prometheus histogram buckets for request duration, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SAMPLES = 200   # durations kept per endpoint for p50/p95
+MAX_SHAPES = 500       # distinct query shapes tracked per process
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_IN_LIST = re.compile(rf"\bIN\s*\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)", re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def query_shape(statement):
+    """The statement with IN (...) parameter lists collapsed and whitespace normalised."""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+# ==================== PER REQUEST ====================
+
+class RequestStats:
+    __slots__ = ('started', 'sql_count', 'sql_time', 'template_time', 'template_starts', 'lazy_loads',
+                 'shapes', 'shape_times')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_starts = []
+        self.lazy_loads = 0
+        self.shapes = Counter()
+        self.shape_times = Counter()
+
+
+def _current():
+    return g.get('request_stats') if has_request_context() else None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    started = getattr(context, '_metrics_started', None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.sql_count += 1
+    stats.sql_time += elapsed
+    shape = query_shape(statement)
+    stats.shapes[shape] += 1
+    stats.shape_times[shape] += elapsed
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _count_lazy_load(orm_execute_state):
+    if orm_execute_state.is_select and orm_execute_state.lazy_loaded_from is not None:
+        stats = _current()
+        if stats is not None:
+            stats.lazy_loads += 1
+
+
+# ==================== AGGREGATES ====================
+
+class EndpointStats:
+    __slots__ = ('requests', 'errors', 'total_time', 'max_time', 'recent', 'buckets',
+                 'sql_count', 'sql_time', 'template_time', 'lazy_loads', 'statuses')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.lazy_loads = 0
+        self.statuses = Counter()
+
+    def add(self, elapsed, status, stats):
+        self.requests += 1
+        self.errors += status >= 500
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.recent.append(elapsed)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if elapsed <= bound:
+                self.buckets[i] += 1
+        self.sql_count += stats.sql_count
+        self.sql_time += stats.sql_time
+        self.template_time += stats.template_time
+        self.lazy_loads += stats.lazy_loads
+        self.statuses[status] += 1
+
+    def percentile(self, q):
+        if not self.recent:
+            return 0.0
+        if len(self.recent) == 1:
+            return self.recent[0]
+        return statistics.quantiles(self.recent, n=100, method='inclusive')[q - 1]
+
+
+class ShapeStats:
+    __slots__ = ('executions', 'total_time', 'requests', 'repeated_requests', 'max_per_request', 'endpoints')
+
+    def __init__(self):
+        self.executions = 0
+        self.total_time = 0.0
+        self.requests = 0
+        self.repeated_requests = 0
+        self.max_per_request = 0
+        self.endpoints = Counter()
+
+    def add(self, count, elapsed, endpoint):
+        self.executions += count
+        self.total_time += elapsed
+        self.requests += 1
+        self.repeated_requests += count > 1
+        self.max_per_request = max(self.max_per_request, count)
+        self.endpoints[endpoint] += count
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.shapes = {}
+        self.since = time.time()
+        self.app = None
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_LOG_REQUESTS', False)
+        app.config.setdefault('METRICS_TOKEN', None)
+        app.config.setdefault('SLOW_REQUEST_MS', 1000)
+        app.extensions['metrics'] = self
+        self.app = app
+        self.logger = app.logger.getChild('requests')
+        if app.config['METRICS_LOG_REQUESTS']:
+            self.logger.setLevel('INFO')
+
+        if app.config['METRICS_ENABLED']:
+            request_started.connect(self._request_started, app, weak=False)
+            request_finished.connect(self._request_finished, app, weak=False)
+            before_render_template.connect(self._template_started, app, weak=False)
+            template_rendered.connect(self._template_finished, app, weak=False)
+        app.add_url_rule('/metrics', 'metrics', self.prometheus)
+
+    # ---- signal receivers ----
+
+    def _request_started(self, sender, **extra):
+        g.request_stats = RequestStats()
+
+    def _template_started(self, sender, template, context, **extra):
+        stats = g.get('request_stats')
+        if stats is not None:
+            stats.template_starts.append(time.perf_counter())
+
+    def _template_finished(self, sender, template, context, **extra):
+        stats = g.get('request_stats')
+        if stats is not None and stats.template_starts:
+            stats.template_time += time.perf_counter() - stats.template_starts.pop()
+
+    def _request_finished(self, sender, response, **extra):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - stats.started
+        endpoint = request.endpoint or '<unmatched>'
+        self.record(endpoint, response.status_code, elapsed, stats)
+        self._log(endpoint, response.status_code, elapsed, stats)
+
+    # ---- recording ----
+
+    def record(self, endpoint, status, elapsed, stats):
+        with self.lock:
+            endpoint_stats = self.endpoints.get(endpoint)
+            if endpoint_stats is None:
+                endpoint_stats = self.endpoints[endpoint] = EndpointStats()
+            endpoint_stats.add(elapsed, status, stats)
+            for shape, count in stats.shapes.items():
+                shape_stats = self.shapes.get(shape)
+                if shape_stats is None:
+                    if len(self.shapes) >= MAX_SHAPES:
+                        continue
+                    shape_stats = self.shapes[shape] = ShapeStats()
+                shape_stats.add(count, stats.shape_times[shape], endpoint)
+
+    def _log(self, endpoint, status, elapsed, stats):
+        slow = elapsed * 1000 >= self.app.config['SLOW_REQUEST_MS']
+        if not slow and not self.app.config['METRICS_LOG_REQUESTS']:
+            return
+        line = json.dumps({
+            'endpoint': endpoint, 'method': request.method, 'path': request.path, 'status': status,
+            'ms': round(elapsed * 1000, 1), 'sql': stats.sql_count, 'sql_ms': round(stats.sql_time * 1000, 1),
+            'template_ms': round(stats.template_time * 1000, 1), 'lazy_loads': stats.lazy_loads
+        })
+        if slow:
+            self.logger.warning(line)
+        else:
+            self.logger.info(line)
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.shapes = {}
+            self.since = time.time()
+
+    # ---- reports ----
+
+    def slow_endpoints(self, limit=20):
+        """Per-endpoint summaries (times in ms), slowest p95 first."""
+        with self.lock:
+            rows = [{
+                'endpoint': endpoint,
+                'requests': s.requests,
+                'errors': s.errors,
+                'mean_ms': s.total_time / s.requests * 1000,
+                'p50_ms': s.percentile(50) * 1000,
+                'p95_ms': s.percentile(95) * 1000,
+                'max_ms': s.max_time * 1000,
+                'queries': s.sql_count / s.requests,
+                'sql_ms': s.sql_time / s.requests * 1000,
+                'template_ms': s.template_time / s.requests * 1000,
+                'lazy_loads': s.lazy_loads / s.requests
+            } for endpoint, s in self.endpoints.items()]
+        return sorted(rows, key=lambda row: -row['p95_ms'])[:limit]
+
+    def repeated_shapes(self, limit=20):
+        """Query shapes that ran more than once in a request, most repeated first."""
+        with self.lock:
+            rows = [{
+                'shape': shape,
+                'executions': s.executions,
+                'requests': s.requests,
+                'repeated_requests': s.repeated_requests,
+                'max_per_request': s.max_per_request,
+                'total_ms': s.total_time * 1000,
+                'endpoints': [endpoint for endpoint, _ in s.endpoints.most_common(3)]
+            } for shape, s in self.shapes.items() if s.repeated_requests]
+        return sorted(rows, key=lambda row: (-row['max_per_request'], -row['executions']))[:limit]
+
+    def prometheus_text(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            metric('http_requests_total', 'counter', 'Requests handled, by endpoint and status.',
+                   [({'endpoint': e, 'status': status}, count)
+                    for e, s in endpoints for status, count in sorted(s.statuses.items())])
+            lines.append('# HELP http_request_duration_seconds Request wall time, by endpoint.')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for e, s in endpoints:
+                label = _escape(e)
+                for bound, count in zip(DURATION_BUCKETS, s.buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {s.requests}')
+                lines.append(f'http_request_duration_seconds_sum{{endpoint="{label}"}} {s.total_time:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{endpoint="{label}"}} {s.requests}')
+            metric('db_queries_total', 'counter', 'SQL statements executed during requests, by endpoint.',
+                   [({'endpoint': e}, s.sql_count) for e, s in endpoints])
+            metric('db_query_seconds_total', 'counter', 'Time spent in SQL statements, by endpoint.',
+                   [({'endpoint': e}, f'{s.sql_time:.6f}') for e, s in endpoints])
+            metric('template_render_seconds_total', 'counter', 'Time spent rendering templates, by endpoint.',
+                   [({'endpoint': e}, f'{s.template_time:.6f}') for e, s in endpoints])
+            metric('orm_lazy_loads_total', 'counter', 'Relationship lazy loads, by endpoint.',
+                   [({'endpoint': e}, s.lazy_loads) for e, s in endpoints])
+        return '\n'.join(lines) + '\n'
+
+    # ---- /metrics ----
+
+    def prometheus(self):
+        token = self.app.config['METRICS_TOKEN']
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        allowed = (token and hmac.compare_digest(supplied.encode(), token.encode())) or \
+            (current_user.is_authenticated and current_user.role == 'admin')
+        if not allowed:
+            abort(404)
+        return Response(self.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
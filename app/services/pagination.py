@@ -0,0 +1,180 @@
+"""
+Keyset pagination, sorting and filtering for list views.
+
+A page is addressed by an opaque cursor built from the last (or first) row's
+sort value and id, so every page costs one indexed range query no matter how
+deep the user pages, unlike OFFSET. All state lives in the query string
+(q, sort, dir, per_page, after/before) so pages can be bookmarked.
+
+    page = paginate(query, request.args,
+                    sort_fields={'name': Student.first_name, 'id': Student.id},
+                    default_sort='id', id_column=Student.id)
+"""
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+PER_PAGE_OPTIONS = (10, 25, 50, 100)
+DEFAULT_PER_PAGE = 25
+
+
+class KeysetPage:
+    def __init__(self, items, total, per_page, sort, direction, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.total = total
+        self.per_page = per_page
+        self.sort = sort
+        self.direction = direction
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def apply_search(query, term, columns):
+    """Every whitespace-separated word of `term` must match (ILIKE) one of `columns`."""
+    for word in (term or '').split():
+        pattern = f'%{word}%'
+        query = query.filter(or_(*[column.ilike(pattern) for column in columns]))
+    return query
+
+
+def apply_filters(query, args, filters):
+    """
+    Apply equality filters for each {arg name: column} present in `args`.
+    Values for integer columns that are not integers are ignored.
+    """
+    for name, column in filters.items():
+        value = args.get(name)
+        if value in (None, ''):
+            continue
+        if column.type.python_type is int:
+            try:
+                value = int(value)
+            except ValueError:
+                continue
+        query = query.filter(column == value)
+    return query
+
+
+def encode_cursor(value, row_id):
+    """The `after`/`before` cursor of the row with sort value `value` and id `row_id`."""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps([value is None, value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, column):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        is_null, value, row_id = json.loads(raw)
+        if value is not None:
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+    except (ValueError, TypeError):
+        # Tampered or stale cursor: fall back to the first page
+        return None
+    return is_null, value, row_id
+
+
+def _nullable(column):
+    return getattr(column.expression, 'nullable', True)
+
+
+def _seek(column, id_column, descending, nulls_last, cursor):
+    """Condition selecting rows that come after `cursor` in the given ordering."""
+    is_null, value, row_id = cursor
+    id_after = id_column < row_id if descending else id_column > row_id
+    if column is id_column:
+        return id_after
+    if not _nullable(column):
+        return or_(column < value if descending else column > value, and_(column == value, id_after))
+    if is_null:
+        if nulls_last:
+            return and_(column.is_(None), id_after)
+        return or_(column.isnot(None), and_(column.is_(None), id_after))
+    value_after = column < value if descending else column > value
+    after = or_(value_after, and_(column == value, id_after))
+    if nulls_last:
+        return or_(column.is_(None), after)
+    return and_(column.isnot(None), after)
+
+
+def _ordering(column, id_column, descending, nulls_last):
+    id_order = id_column.desc() if descending else id_column.asc()
+    if column is id_column:
+        return [id_order]
+    order = [column.desc() if descending else column.asc(), id_order]
+    if _nullable(column):
+        # Keep NULLs in one block at the end (or start, when walking backwards)
+        order.insert(0, column.is_(None) if nulls_last else column.isnot(None))
+    return order
+
+
+def _per_page(args):
+    try:
+        per_page = int(args.get('per_page', DEFAULT_PER_PAGE))
+    except (TypeError, ValueError):
+        return DEFAULT_PER_PAGE
+    return per_page if per_page in PER_PAGE_OPTIONS else DEFAULT_PER_PAGE
+
+
+def paginate(query, args, sort_fields, default_sort, id_column, default_direction='asc'):
+    """
+    Return a KeysetPage of `query` for the request `args`.
+
+    `sort_fields` maps the allowed `sort` argument values to columns of the
+    queried model; `id_column` is the unique tiebreaker.
+    """
+    sort = args.get('sort') if args.get('sort') in sort_fields else default_sort
+    direction = args.get('dir') if args.get('dir') in ('asc', 'desc') else default_direction
+    per_page = _per_page(args)
+    column = sort_fields[sort]
+    descending = direction == 'desc'
+
+    total = query.order_by(None).count()
+
+    after = _decode_cursor(args['after'], column) if args.get('after') else None
+    before = _decode_cursor(args['before'], column) if args.get('before') and not after else None
+
+    if before:
+        # Walk backwards from the cursor with the ordering reversed, then flip the rows back
+        rows = query.filter(_seek(column, id_column, not descending, False, before)) \
+            .order_by(*_ordering(column, id_column, not descending, False)) \
+            .limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if after:
+            query = query.filter(_seek(column, id_column, descending, True, after))
+        rows = query.order_by(*_ordering(column, id_column, descending, True)).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev = after is not None
+
+    def cursor_for(item):
+        return encode_cursor(getattr(item, column.key), getattr(item, id_column.key))
+
+    return KeysetPage(
+        items, total, per_page, sort, direction,
+        next_cursor=cursor_for(items[-1]) if has_next and items else None,
+        prev_cursor=cursor_for(items[0]) if has_prev and items else None
+    )
@@ -0,0 +1,40 @@
+"""
+Password hashing with a configurable cost.
+
+PASSWORD_HASH_METHOD takes any werkzeug method string, e.g.
+'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'. Hashes made with other
+parameters still verify; the login view rehashes them with the current
+method after a successful login (see password_needs_rehash).
+"""
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+DEFAULT_HASH_METHOD = f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'
+
+
+def configured_method():
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_HASH_METHOD
+    return DEFAULT_HASH_METHOD
+
+
+def normalize_method(method):
+    """Spell out the defaults werkzeug fills in, so 'pbkdf2' compares equal to 'pbkdf2:sha256:600000'."""
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    elif name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    else:
+        return method
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=configured_method())
+
+
+def password_needs_rehash(password_hash):
+    """True when `password_hash` was made with different parameters than the configured method."""
+    stored_method = (password_hash or '').split('$', 1)[0]
+    return normalize_method(stored_method) != normalize_method(configured_method())
@@ -0,0 +1,87 @@
+"""
+Performance analytics over all marks.
+
+Marks are fetched once as columns (student_id, subject_id, score_obtained,
+max_score) and every figure on the page is computed with NumPy array
+operations on that fetch, so the cost grows with the number of marks rather
+than with the number of students or subjects. Only the names for the rows
+actually shown are looked up afterwards.
+"""
+import numpy as np
+from app import db
+from app.models import Mark, Student, Subject, Class
+
+# Lower bound (percent) of each grade above F, and the grade names from F upwards
+GRADE_BOUNDS = (50, 60, 70, 80, 90)
+GRADES = ('F', 'D', 'C', 'B', 'A', 'A+')
+
+
+def fetch_mark_arrays():
+    """Return (student_ids, subject_ids, percentages) as NumPy arrays, one query."""
+    rows = db.session.execute(
+        db.select(Mark.student_id, Mark.subject_id, Mark.score_obtained, Mark.max_score)
+        .where(Mark.max_score > 0)
+    ).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    student_ids, subject_ids, scores, max_scores = (np.asarray(column) for column in zip(*rows))
+    return student_ids.astype(np.int64), subject_ids.astype(np.int64), \
+        scores.astype(float) / max_scores.astype(float) * 100
+
+
+def group_means(keys, values):
+    """Return (unique keys, mean of `values` per key), keys sorted ascending."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(unique))
+    counts = np.bincount(inverse, minlength=len(unique))
+    return unique, sums / counts
+
+
+def grade_distribution(percentages):
+    counts = np.bincount(np.searchsorted(GRADE_BOUNDS, percentages, side='right'), minlength=len(GRADES))
+    # Best grade first, as the chart shows it
+    return {grade: int(counts[i]) for i, grade in reversed(list(enumerate(GRADES)))}
+
+
+def subject_averages(subject_ids, percentages):
+    ids, means = group_means(subject_ids, percentages)
+    names = dict(db.session.query(Subject.id, Subject.name).filter(Subject.id.in_(ids.tolist())).all()) \
+        if len(ids) else {}
+    return [{'name': names[sid], 'average': round(float(mean), 1)}
+            for sid, mean in zip(ids.tolist(), means) if sid in names]
+
+
+def top_students(student_ids, percentages, limit=10):
+    ids, means = group_means(student_ids, percentages)
+    rounded = np.round(means, 1)
+    # Stable sort on the negated rounded average: ties keep student id order
+    order = np.argsort(-rounded, kind='stable')[:limit]
+    top_ids = ids[order].tolist()
+    if not top_ids:
+        return []
+
+    details = {
+        row.id: row for row in db.session.query(
+            Student.id, Student.first_name, Student.last_name, Student.roll_no, Class.grade, Class.section
+        ).outerjoin(Class, Class.id == Student.class_id).filter(Student.id.in_(top_ids))
+    }
+    students = []
+    for sid, average in zip(top_ids, rounded[order].tolist()):
+        row = details.get(sid)
+        if row is None:
+            continue
+        students.append({
+            'name': f"{row.first_name} {row.last_name}",
+            'roll_no': row.roll_no,
+            'class': f"{row.grade}-{row.section}" if row.grade is not None else 'N/A',
+            'average': average
+        })
+    return students
+
+
+def performance_summary(top_n=10):
+    """Return (subject_data, top_students, grade_dist) for the performance analytics page."""
+    student_ids, subject_ids, percentages = fetch_mark_arrays()
+    return (subject_averages(subject_ids, percentages),
+            top_students(student_ids, percentages, top_n),
+            grade_distribution(percentages))
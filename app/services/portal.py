@@ -0,0 +1,115 @@
+"""
+Portal context for the student and teacher blueprints.
+
+Every portal page needs the logged-in user's profile (and, for teachers, the
+classes and subjects they teach from the timetable). The context is a small
+picklable snapshot of those, resolved once per request (kept on `g`). With
+a shared cache backend ('filesystem' or 'redis') it is also cached across
+requests under the user's id; the entry depends on the profile, class,
+department and timetable tables, so any commit touching them rebuilds it
+on the next request. A per-process 'lru' cache would only see this
+process's commits, so then it is loaded on every request.
+"""
+from dataclasses import dataclass
+from flask import g
+from flask_login import current_user
+from app import db, cache
+from app.models import Student, Teacher, Class, Department, TimeTable
+
+# Part of the cache key; bump when the context classes change shape
+CONTEXT_VERSION = 2
+
+
+@dataclass(frozen=True)
+class StudentContext:
+    id: int
+    first_name: str
+    last_name: str
+    roll_no: str
+    class_id: int
+    class_label: str
+    department_id: int
+    department_name: str
+
+
+@dataclass(frozen=True)
+class TeacherContext:
+    id: int
+    first_name: str
+    last_name: str
+    qualification: str
+    department_id: int
+    department_name: str
+    class_ids: tuple
+    subject_ids: tuple
+    assignments: tuple  # (class_id, subject_id) pairs the teacher has on the timetable
+
+    def teaches(self, class_id, subject_id):
+        return (class_id, subject_id) in self.assignments
+
+
+def _load_student_context(user_id):
+    row = db.session.query(
+        Student.id, Student.first_name, Student.last_name, Student.roll_no, Student.class_id,
+        Class.grade, Class.section, Student.department_id, Department.name
+    ).outerjoin(Class, Class.id == Student.class_id) \
+        .outerjoin(Department, Department.id == Student.department_id) \
+        .filter(Student.user_id == user_id).first()
+    if row is None:
+        return None
+    return StudentContext(
+        id=row.id,
+        first_name=row.first_name,
+        last_name=row.last_name,
+        roll_no=row.roll_no,
+        class_id=row.class_id,
+        class_label=f"{row.grade}-{row.section}" if row.grade is not None else None,
+        department_id=row.department_id,
+        department_name=row.name
+    )
+
+
+def _load_teacher_context(user_id):
+    row = db.session.query(
+        Teacher.id, Teacher.first_name, Teacher.last_name, Teacher.qualification,
+        Teacher.department_id, Department.name
+    ).outerjoin(Department, Department.id == Teacher.department_id) \
+        .filter(Teacher.user_id == user_id).first()
+    if row is None:
+        return None
+    taught = db.session.query(TimeTable.class_id, TimeTable.subject_id) \
+        .filter(TimeTable.teacher_id == row.id).distinct().all()
+    return TeacherContext(
+        id=row.id,
+        first_name=row.first_name,
+        last_name=row.last_name,
+        qualification=row.qualification,
+        department_id=row.department_id,
+        department_name=row.name,
+        class_ids=tuple(sorted({class_id for class_id, _ in taught if class_id is not None})),
+        subject_ids=tuple(sorted({subject_id for _, subject_id in taught if subject_id is not None})),
+        assignments=tuple(sorted((class_id, subject_id) for class_id, subject_id in taught
+                                 if class_id is not None and subject_id is not None))
+    )
+
+
+def _portal_context(kind, loader, depends_on):
+    if 'portal_context' not in g:
+        user_id = current_user.id
+        if cache.shared:
+            # A missing profile is cached as False so it is not looked up again on every page
+            context = cache.get_or_set(f'portal:{kind}:v{CONTEXT_VERSION}:{user_id}', lambda: loader(user_id) or False, depends_on)
+        else:
+            context = loader(user_id)
+        g.portal_context = context or None
+    return g.portal_context
+
+
+def student_context():
+    """Return the current user's StudentContext, or None if they have no student profile."""
+    return _portal_context('student', _load_student_context, (Student, Class, Department))
+
+
+def teacher_context():
+    """Return the current user's TeacherContext, or None if they have no teacher profile."""
+    return _portal_context('teacher', _load_teacher_context, (Teacher, Department, TimeTable))
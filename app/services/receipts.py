@@ -0,0 +1,172 @@
+"""
+Fee receipts, rendered once and stored content-addressed.
+
+A paid fee's receipt never changes, so it is rendered the first time it is
+needed (at payment, or on the first download) and kept under RECEIPT_DIR
+(default instance/receipts, outside the static folder, so receipts are only
+reachable through the login-checked download view), named by a digest of
+everything printed on it. Downloads are plain file responses (sendfile
+under gunicorn) with conditional GET: the ETag is a hash of the digest, so
+it does not reveal the file name, and a repeat download with a matching
+If-None-Match is a 304. If a fee is edited the digest changes, so a fresh
+receipt is rendered instead of serving a stale one. Where the folder cannot
+be written (Vercel's read-only filesystem) the payment still succeeds and
+each download renders the receipt in memory.
+
+The digest is an HMAC keyed with SECRET_KEY, so a receipt's name cannot be
+worked out from the fee details alone.
+
+Rendering is deterministic (fixed creation date), so rendering the same
+receipt twice writes the same bytes and concurrent first downloads are
+harmless. The term export (export_term_receipts, a background job) renders
+whatever is missing, across RECEIPT_WORKERS processes when there is more
+than one and a process pool can start (not on Vercel), and zips the stored
+files.
+"""
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timezone
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import Fee, Student
+from app.services.jobs import enqueue
+
+# Bump when the layout changes so stored receipts are rendered again
+RECEIPT_LAYOUT = 1
+
+
+def receipt_data(*criteria):
+    """Return the printed fields of the paid fees matching `criteria`, one query."""
+    rows = db.session.query(Fee.id, Fee.title, Fee.amount, Fee.paid_date, Student.first_name, Student.last_name) \
+        .join(Student, Student.id == Fee.student_id) \
+        .filter(Fee.status == 'Paid', *criteria) \
+        .order_by(Fee.paid_date, Fee.id).all()
+    return [{
+        'fee_id': row.id,
+        'title': row.title,
+        'student_name': f"{row.first_name} {row.last_name}",
+        'amount': row.amount,
+        'paid_date': row.paid_date.isoformat() if row.paid_date else None
+    } for row in rows]
+
+
+def receipt_digest(data):
+    message = json.dumps([RECEIPT_LAYOUT, data], sort_keys=True).encode()
+    return hmac.new(current_app.config['SECRET_KEY'].encode(), message, hashlib.sha256).hexdigest()
+
+
+def receipt_etag(digest):
+    return hashlib.sha256(digest.encode()).hexdigest()
+
+
+def receipt_path(digest):
+    return os.path.join(current_app.config['RECEIPT_DIR'], digest[:2], f'{digest}.pdf')
+
+
+def render_receipt(data):
+    """Render one receipt (a dict from receipt_data) to PDF bytes."""
+    from fpdf import FPDF
+
+    paid_date = datetime.fromisoformat(data['paid_date']).date() if data['paid_date'] else None
+    pdf = FPDF()
+    # A fixed creation date keeps the output byte-for-byte reproducible
+    pdf.set_creation_date(datetime.combine(paid_date or date(2000, 1, 1), time(), tzinfo=timezone.utc))
+    pdf.add_page()
+    pdf.set_font("helvetica", size=12)
+    for text, align in (("Fee Receipt", "C"),
+                        (f"Receipt No: {data['fee_id']}", "L"),
+                        (f"Student: {data['student_name']}", "L"),
+                        (f"Fee: {data['title']}", "L"),
+                        (f"Amount: ${data['amount']}", "L"),
+                        (f"Date: {paid_date or '-'}", "L")):
+        pdf.cell(200, 10, txt=text, align=align, new_x="LMARGIN", new_y="NEXT")
+    return bytes(pdf.output())
+
+
+def _store(item):
+    path, data = item
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(render_receipt(data))
+    os.replace(tmp_path, path)
+
+
+def ensure_receipt(data):
+    """Return (digest, path) of the stored receipt for `data`, rendering it if missing."""
+    digest = receipt_digest(data)
+    path = receipt_path(digest)
+    if not os.path.exists(path):
+        _store((path, data))
+    return digest, path
+
+
+def _store_all(missing):
+    """Render `missing` [(path, data)] across RECEIPT_WORKERS processes, or in this one."""
+    workers = current_app.config['RECEIPT_WORKERS']
+    if workers > 1 and len(missing) > 1:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        except (OSError, NotImplementedError, ImportError):
+            # No semaphores here (AWS Lambda / Vercel have no /dev/shm)
+            current_app.logger.warning("Process pool unavailable; rendering %d receipts in-process", len(missing))
+        else:
+            with pool:
+                list(pool.map(_store, missing, chunksize=25))
+            return
+    for item in missing:
+        _store(item)
+
+
+def ensure_receipts(receipts):
+    """Return [(data, path)] for `receipts`, rendering the missing ones first."""
+    paths = [receipt_path(receipt_digest(data)) for data in receipts]
+    _store_all([(path, data) for path, data in zip(paths, receipts) if not os.path.exists(path)])
+    return list(zip(receipts, paths))
+
+
+# ==================== TERM EXPORT ====================
+
+def term_criteria(paid_from=None, paid_to=None, title=None):
+    """Fee criteria for a term: paid within [paid_from, paid_to] (ISO dates), title containing `title`."""
+    criteria = []
+    if paid_from:
+        criteria.append(Fee.paid_date >= date.fromisoformat(paid_from))
+    if paid_to:
+        criteria.append(Fee.paid_date <= date.fromisoformat(paid_to))
+    if title:
+        criteria.append(Fee.title.ilike(f'%{title}%'))
+    return criteria
+
+
+def start_term_export(paid_from=None, paid_to=None, title=None, user_id=None):
+    """Queue a zip of the receipts of a term and return the Job. Raises ValueError if there are none."""
+    count = db.session.query(func.count(Fee.id)) \
+        .filter(Fee.status == 'Paid', *term_criteria(paid_from, paid_to, title)).scalar()
+    if not count:
+        raise ValueError('No paid fees in that term.')
+    name = '_'.join(part for part in ('receipts', paid_from, paid_to) if part)
+    return enqueue(export_term_receipts, description=f"Fee receipts: {count} paid fees", user_id=user_id,
+                   paid_from=paid_from, paid_to=paid_to, title=title, filename=f'{name}.zip')
+
+
+def export_term_receipts(job, paid_from, paid_to, title, filename):
+    """Job task: zip the stored receipts of a term, rendering missing ones first."""
+    receipts = ensure_receipts(receipt_data(*term_criteria(paid_from, paid_to, title)))
+    job.progress(0, len(receipts))
+    path = job.output_path(filename)
+    # Receipts are already compressed PDFs, so they are stored rather than deflated
+    with zipfile.ZipFile(path + '.tmp', 'w', zipfile.ZIP_STORED) as archive:
+        for done, (data, receipt) in enumerate(receipts, 1):
+            archive.write(receipt, f"receipt_{data['fee_id']}.pdf")
+            if done % 100 == 0:
+                job.progress(done)
+    os.replace(path + '.tmp', path)
+    return {'file': filename}
@@ -0,0 +1,64 @@
+"""
+Read-replica routing.
+
+When DATABASE_REPLICA_URL is set, config.py adds a 'replica' bind. Views
+decorated with @read_replica send their SELECTs to it: the analytics
+pages, CSV exports and the student portal, which only read and can
+tolerate a little replication lag. Everything else stays on the primary.
+Flushes and INSERT/UPDATE/DELETE always go to the primary, as do
+SELECT ... FOR UPDATE and raw text() statements. Without a replica bind
+the decorator does nothing.
+
+The choice is made per statement in RoutingSession.get_bind(). The flag
+lives on `g`, so it also covers a streamed response that runs queries after
+the view has returned (stream_with_context keeps the request context).
+
+Anything computed for the shared page cache is read from the primary (see
+on_primary() in cache.get_or_set()): an entry is rebuilt right after a
+commit invalidates it, and one built from a lagging replica would keep the
+old data under the new version token until the next write.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+
+REPLICA_BIND = 'replica'
+
+
+def read_replica(f):
+    """Run the view's SELECTs on the read replica (if one is configured)."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_replica = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+@contextmanager
+def on_primary():
+    """Send the SELECTs in the block to the primary, even inside a @read_replica view."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('read_replica', False)
+    g.read_replica = False
+    try:
+        yield
+    finally:
+        g.read_replica = previous
+
+
+def _wants_replica(clause):
+    return (has_request_context() and g.get('read_replica', False)
+            and isinstance(clause, Select) and clause._for_update_arg is None)
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _wants_replica(clause):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,256 @@
+"""
+Report card rendering and batch generation.
+
+render_report_card() draws one student's card from plain data (see
+report_card_data()), so the single-student view and the batch jobs produce
+the same PDF. Marks are read with one joined query for all the students in
+the request instead of lazy loads per mark, and a long list of marks carries
+on over a new page with the table header repeated.
+
+start_batch() queues a background job (see app/services/jobs.py) that
+renders the cards for a class, department or exam: it loads the data,
+hands chunks of cards to REPORT_CARD_WORKERS processes (rendering is CPU
+bound; with 1 worker, or where no process pool can start as on Vercel, the
+chunks are rendered in the job's own process) and writes
+either a zip with one PDF per student or a single merged PDF as the job's
+download, reporting progress after every chunk.
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import func, select
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import Student, Class, Department, Exam, Mark, Subject
+from app.services.jobs import enqueue
+from app.services.performance import GRADE_BOUNDS, GRADES
+
+SCOPES = ('class', 'department', 'exam')
+FORMATS = ('zip', 'pdf')
+CHUNK_SIZE = 25
+
+# Page layout (points, A4)
+TABLE_COLUMNS = ((50, 'Subject'), (200, 'Exam'), (350, 'Score'), (450, 'Grade'))
+ROW_HEIGHT = 15
+BOTTOM_MARGIN = 60
+
+
+def grade_for(percentage):
+    return GRADES[bisect_right(GRADE_BOUNDS, percentage)]
+
+
+# ==================== DATA ====================
+
+def scope_filter(scope, scope_id):
+    """Return the criterion on Student selecting everyone in a class, department or exam."""
+    if scope == 'class':
+        return Student.class_id == scope_id
+    if scope == 'department':
+        return Student.department_id == scope_id
+    if scope == 'exam':
+        return Student.id.in_(select(Mark.student_id).where(Mark.exam_id == scope_id))
+    raise ValueError(f"Unknown report card scope: {scope!r}")
+
+
+def scope_label(scope, scope_id):
+    """Return a display name for the class, department or exam, or None if it does not exist."""
+    if scope == 'class':
+        row = db.session.query(Class.grade, Class.section).filter(Class.id == scope_id).first()
+        return f"{row.grade}-{row.section}" if row else None
+    if scope == 'department':
+        return db.session.query(Department.name).filter(Department.id == scope_id).scalar()
+    if scope == 'exam':
+        return db.session.query(Exam.name).filter(Exam.id == scope_id).scalar()
+    raise ValueError(f"Unknown report card scope: {scope!r}")
+
+
+def report_card_data(criterion, exam_id=None):
+    """
+    Return one plain dict per student matching `criterion`, ordered by class
+    and roll number, with the student's marks (only those of `exam_id` when
+    given). Two queries whatever the number of students.
+    """
+    students = db.session.query(
+        Student.id, Student.first_name, Student.last_name, Student.roll_no, Class.grade, Class.section
+    ).outerjoin(Class, Class.id == Student.class_id) \
+        .filter(criterion) \
+        .order_by(Class.grade, Class.section, Student.roll_no, Student.id).all()
+
+    marks = db.session.query(Mark.student_id, Subject.name, Exam.name, Mark.score_obtained, Mark.max_score) \
+        .join(Student, Student.id == Mark.student_id) \
+        .outerjoin(Subject, Subject.id == Mark.subject_id) \
+        .outerjoin(Exam, Exam.id == Mark.exam_id) \
+        .filter(criterion)
+    if exam_id is not None:
+        marks = marks.filter(Mark.exam_id == exam_id)
+
+    marks_by_student = {}
+    for student_id, subject, exam, score, max_score in marks.order_by(Mark.student_id, Mark.id):
+        marks_by_student.setdefault(student_id, []).append({
+            'subject_name': subject, 'exam_name': exam, 'score_obtained': score, 'max_score': max_score
+        })
+
+    return [{
+        'student_id': row.id,
+        'name': f"{row.first_name} {row.last_name}",
+        'roll_no': row.roll_no,
+        'class_label': f"{row.grade}-{row.section}" if row.grade is not None else None,
+        'marks': marks_by_student.get(row.id, [])
+    } for row in students]
+
+
+# ==================== RENDERING ====================
+
+def report_card_filename(card):
+    return f"report_card_{card['roll_no'] or card['student_id']}.pdf"
+
+
+def _draw_table_header(p, y):
+    p.setFont("Helvetica-Bold", 10)
+    for x, title in TABLE_COLUMNS:
+        p.drawString(x, y, title)
+    p.setFont("Helvetica", 10)
+    return y - 20
+
+
+def _draw_report_card(p, card):
+    from reportlab.lib.pagesizes import A4
+    width, height = A4
+
+    # Header
+    p.setFont("Helvetica-Bold", 20)
+    p.drawCentredString(width/2, height - 50, "REPORT CARD")
+    p.setFont("Helvetica", 12)
+    p.drawCentredString(width/2, height - 70, "Student Management System")
+
+    # Student Info
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(50, height - 120, f"Name: {card['name']}")
+    p.drawString(50, height - 140, f"Roll No: {card['roll_no']}")
+    p.drawString(50, height - 160, f"Class: {card['class_label'] or 'N/A'}")
+
+    # Marks Table, continued on a new page (header repeated) when it runs out of room
+    y = _draw_table_header(p, height - 200)
+    total = 0
+    count = 0
+    for m in card['marks']:
+        if y < BOTTOM_MARGIN:
+            p.showPage()
+            y = _draw_table_header(p, height - 50)
+        percentage = (m['score_obtained'] / m['max_score']) * 100 if m['max_score'] else 0
+        p.drawString(50, y, m['subject_name'] or '-')
+        p.drawString(200, y, m['exam_name'] or '-')
+        p.drawString(350, y, f"{m['score_obtained']}/{m['max_score']}")
+        p.drawString(450, y, grade_for(percentage))
+        total += percentage
+        count += 1
+        y -= ROW_HEIGHT
+
+    if count > 0:
+        y -= 20
+        if y < BOTTOM_MARGIN:
+            p.showPage()
+            y = height - 50
+        p.setFont("Helvetica-Bold", 12)
+        p.drawString(50, y, f"Overall Percentage: {total / count:.2f}%")
+    p.showPage()
+
+
+def render_report_cards(cards):
+    """Render `cards` (dicts from report_card_data) into one PDF, each card starting on a new page."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    for card in cards:
+        _draw_report_card(p, card)
+    p.save()
+    return buffer.getvalue()
+
+
+def render_report_card(card):
+    return render_report_cards([card])
+
+
+def _render_files(cards):
+    return [(report_card_filename(card), render_report_card(card)) for card in cards]
+
+
+# ==================== BATCH JOBS ====================
+
+def start_batch(scope, scope_id, output_format, exam_id=None, user_id=None):
+    """
+    Queue report cards for everyone in a class, department or exam and
+    return the Job. `output_format` is 'zip' (one PDF per student) or
+    'pdf' (one merged PDF); `exam_id` limits the marks to one exam.
+    Raises ValueError for an unknown scope or format, or an empty scope.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown report card format: {output_format!r}")
+    label = scope_label(scope, scope_id)
+    if label is None:
+        raise ValueError(f"No such {scope}.")
+    if scope == 'exam':
+        exam_id = scope_id
+    total = db.session.query(func.count(Student.id)).filter(scope_filter(scope, scope_id)).scalar()
+    if not total:
+        raise ValueError(f"No students in {label}.")
+
+    return enqueue(run_batch, description=f"Report cards: {scope} {label} ({output_format})", user_id=user_id,
+                   scope=scope, scope_id=scope_id, output_format=output_format, exam_id=exam_id,
+                   filename=secure_filename(f"report_cards_{scope}_{label}.{output_format}"))
+
+
+@contextmanager
+def _chunk_map(chunks):
+    """Yield a map() that renders `chunks` across REPORT_CARD_WORKERS processes, or in this one."""
+    workers = current_app.config['REPORT_CARD_WORKERS']
+    if workers > 1 and len(chunks) > 1:
+        try:
+            # spawn, not fork: the parent may have threads and open database connections
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        except (OSError, NotImplementedError, ImportError):
+            # No semaphores here (AWS Lambda / Vercel have no /dev/shm)
+            current_app.logger.warning("Process pool unavailable; rendering report cards in-process")
+        else:
+            with pool:
+                yield pool.map
+            return
+    yield map
+
+
+def run_batch(job, scope, scope_id, output_format, exam_id, filename):
+    """Job task: render the cards, in a process pool if possible, into the job's output file."""
+    cards = report_card_data(scope_filter(scope, scope_id), exam_id)
+    job.progress(0, len(cards))
+    db.session.remove()  # hand the connection back before the long render
+
+    chunks = [cards[i:i + CHUNK_SIZE] for i in range(0, len(cards), CHUNK_SIZE)]
+    path = job.output_path(filename)
+    tmp_path = path + '.tmp'
+    done = 0
+    with _chunk_map(chunks) as render:
+        if output_format == 'zip':
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for chunk, files in zip(chunks, render(_render_files, chunks)):
+                    for name, data in files:
+                        archive.writestr(name, data)
+                    done += len(chunk)
+                    job.progress(done)
+        else:
+            from pypdf import PdfWriter
+            writer = PdfWriter()
+            for chunk, part in zip(chunks, render(render_report_cards, chunks)):
+                writer.append(io.BytesIO(part))
+                done += len(chunk)
+                job.progress(done)
+            with open(tmp_path, 'wb') as f:
+                writer.write(f)
+    os.replace(tmp_path, path)
+    return {'file': filename}
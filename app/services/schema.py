@@ -0,0 +1,158 @@
+"""
+Startup schema check.
+
+The web entry points (run.py, api/index.py) call ensure_schema() once per
+process. It compares the revision recorded in alembic_version with the
+head revision of migrations/. That takes a single one-row query, so a
+current database costs one round trip on a cold start and no DDL.
+
+If the database is behind, it is upgraded once. On PostgreSQL the upgrade
+runs under a session advisory lock, and the version is read again after
+taking it, so when several Vercel instances or gunicorn workers boot
+together only the first applies the migrations. Databases created with
+db.create_all() before the migrations existed have tables but no version.
+They get the old is_approved patch, are stamped at the initial revision
+(which must create exactly the tables those models had), and are then
+upgraded like any other. One that already has every model table (as
+init_db.py creates with the current models) is stamped at head instead,
+since replaying the migrations on it would fail. After an upgrade every model table must exist;
+if one is missing the check reports 'failed' instead of 'upgraded'.
+
+Set STARTUP_MIGRATIONS=0 to leave migrations to `flask db upgrade`. The
+entry points then skip even the version query.
+"""
+import os
+import re
+import time
+from flask import current_app
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from app import db, init_migrate
+
+INITIAL_REVISION = '000047916060'
+# Arbitrary constant shared by every process that may migrate this database
+ADVISORY_LOCK_KEY = 727_100_021
+
+_REVISION = re.compile(r"^revision\s*=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision\s*=\s*(.*)$", re.M)
+
+
+def migrations_dir():
+    return os.path.join(os.path.dirname(current_app.root_path), 'migrations')
+
+
+def head_revisions():
+    """
+    Revision ids of the migration heads, read from the files in
+    migrations/versions. Parsed directly rather than through Alembic, which
+    would add its import time to every cold start.
+    """
+    revisions, parents = set(), set()
+    directory = os.path.join(migrations_dir(), 'versions')
+    for name in os.listdir(directory):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            source = f.read()
+        revision = _REVISION.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+            down = _DOWN_REVISION.search(source)
+            parents.update(re.findall(r"['\"]([^'\"]+)['\"]", down.group(1)) if down else ())
+    return revisions - parents
+
+
+def current_revisions(conn):
+    """Revision ids recorded in alembic_version, or None if the table does not exist."""
+    try:
+        return {row[0] for row in conn.execute(text('SELECT version_num FROM alembic_version'))}
+    except (OperationalError, ProgrammingError):
+        conn.rollback()
+        return None
+
+
+class _AdvisoryLock:
+    """pg_advisory_lock for the duration of the block; no-op on other databases."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.enabled = conn.dialect.name == 'postgresql'
+
+    def __enter__(self):
+        if self.enabled:
+            self.conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ADVISORY_LOCK_KEY})
+            self.conn.commit()
+        return self
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            self.conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_LOCK_KEY})
+            self.conn.commit()
+
+
+def _patch_legacy_schema(conn):
+    """Bring a db.create_all() database up to the initial revision (the old startup patch)."""
+    columns = {c['name'] for c in inspect(conn).get_columns('users')}
+    if 'is_approved' not in columns:
+        # No column default: existing rows stay NULL and are approved below
+        conn.execute(text('ALTER TABLE users ADD COLUMN is_approved BOOLEAN'))
+    conn.execute(text('UPDATE users SET is_approved = TRUE WHERE is_approved IS NULL'))
+    conn.commit()
+
+
+def missing_tables(conn):
+    """Names of model tables that the database does not have."""
+    return sorted(set(db.metadata.tables) - set(inspect(conn).get_table_names()))
+
+
+def _migrate(conn, heads):
+    """Upgrade the database to `heads`; return what was done. Call with the lock held."""
+    init_migrate(current_app)
+    from flask_migrate import stamp, upgrade
+
+    current = current_revisions(conn)
+    if current == heads:
+        return 'current'  # another process got here first
+    directory = migrations_dir()
+    if current is None and inspect(conn).has_table('users') and not missing_tables(conn):
+        # db.create_all() with the current models (init_db.py): already the head schema
+        conn.commit()
+        stamp(directory, 'heads')
+        current_app.logger.warning("Unversioned database with every model table stamped at head")
+        return 'stamped'
+    if current is None and inspect(conn).has_table('users'):
+        _patch_legacy_schema(conn)
+        stamp(directory, INITIAL_REVISION)
+        current_app.logger.warning("Unversioned database stamped at %s before upgrading", INITIAL_REVISION)
+    conn.commit()  # end the read transaction so it does not block the DDL
+    upgrade(directory)
+    missing = missing_tables(conn)
+    if missing:
+        raise RuntimeError(f"Tables missing after upgrading to {', '.join(sorted(heads))}: {', '.join(missing)}")
+    return 'upgraded'
+
+
+def ensure_schema(app):
+    """
+    Upgrade the database to the latest migration unless it already is.
+    Returns 'current', 'upgraded', 'stamped', 'disabled' or 'failed'. Errors
+    are logged and do not stop the app from starting, as with the old startup
+    patch.
+    """
+    if not app.config['STARTUP_MIGRATIONS']:
+        return 'disabled'
+    started = time.perf_counter()
+    with app.app_context():
+        try:
+            heads = head_revisions()
+            with db.engine.connect() as conn:
+                if current_revisions(conn) == heads:
+                    state = 'current'
+                else:
+                    with _AdvisoryLock(conn):
+                        state = _migrate(conn, heads)
+        except Exception:
+            app.logger.exception("Startup schema check failed")
+            state = 'failed'
+    app.logger.info("Schema %s (checked in %.0f ms)", state, (time.perf_counter() - started) * 1000)
+    return state
@@ -0,0 +1,95 @@
+"""
+Precomputed per-student dashboard summary.
+
+Everything the student dashboard shows (30-day attendance percentage,
+pending fee count, latest marks, upcoming homework, active announcements) is
+built into one plain dict and kept in the app cache, so a dashboard hit is a
+single cache read. Only a shared backend ('filesystem' or 'redis') is used:
+a per-process 'lru' cache would miss fee payments and marks written by
+other workers, so there the summary is built on every visit.
+
+Each summary depends on the tags of its own student and class, not on whole
+tables: writing a student's attendance, fees or marks retires only that
+student's entry, and homework retires only its class. Morning attendance
+marking therefore does not flush every other student's summary at once.
+Flushed rows are tagged through cache.tag_rows() below; the bulk attendance
+and marks upserts call record_write() with the ids they wrote.
+"""
+from datetime import date, timedelta
+from sqlalchemy import case, func
+from app import db, cache
+from app.models import Announcement, Attendance, Exam, Fee, Homework, Mark, Student, Subject
+
+RECENT_MARKS = 5
+UPCOMING_HOMEWORK = 5
+ANNOUNCEMENTS = 3
+ATTENDANCE_DAYS = 30
+
+
+def student_tag(student_id):
+    return f'student:{student_id}'
+
+
+def class_tag(class_id):
+    return f'class:{class_id}'
+
+
+cache.tag_rows(Student, lambda row: (student_tag(row.id),))
+cache.tag_rows(Attendance, lambda row: (student_tag(row.student_id),))
+cache.tag_rows(Fee, lambda row: (student_tag(row.student_id),))
+cache.tag_rows(Mark, lambda row: (student_tag(row.student_id),))
+cache.tag_rows(Homework, lambda row: (class_tag(row.class_id),))
+
+
+def build_student_summary(student_id, class_id, today):
+    total, present = db.session.query(
+        func.count(Attendance.id), func.sum(case((Attendance.status == 'Present', 1), else_=0))
+    ).filter(Attendance.student_id == student_id,
+             Attendance.date >= today - timedelta(days=ATTENDANCE_DAYS)).one()
+
+    pending_fees = db.session.query(func.count(Fee.id)) \
+        .filter(Fee.student_id == student_id, Fee.status == 'Pending').scalar()
+
+    recent_marks = db.session.query(Subject.name, Exam.name, Mark.score_obtained, Mark.max_score) \
+        .outerjoin(Subject, Subject.id == Mark.subject_id) \
+        .outerjoin(Exam, Exam.id == Mark.exam_id) \
+        .filter(Mark.student_id == student_id) \
+        .order_by(Mark.id.desc()).limit(RECENT_MARKS).all()
+
+    upcoming_hw = db.session.query(Homework.title, Subject.name, Homework.due_date) \
+        .outerjoin(Subject, Subject.id == Homework.subject_id) \
+        .filter(Homework.class_id == class_id, Homework.due_date >= today) \
+        .order_by(Homework.due_date).limit(UPCOMING_HOMEWORK).all()
+
+    announcements = db.session.query(Announcement.title, Announcement.priority, Announcement.created_at) \
+        .filter_by(is_active=True).order_by(Announcement.created_at.desc()).limit(ANNOUNCEMENTS).all()
+
+    return {
+        'att_percentage': round((present / total * 100), 1) if total else 0,
+        'pending_fees': pending_fees,
+        'recent_marks': [
+            {'subject_name': subject, 'exam_name': exam, 'score_obtained': score, 'max_score': max_score}
+            for subject, exam, score, max_score in recent_marks
+        ],
+        'upcoming_hw': [
+            {'title': title, 'subject_name': subject, 'due_date': due_date}
+            for title, subject, due_date in upcoming_hw
+        ],
+        'announcements': [
+            {'title': title, 'priority': priority, 'created_at': created_at}
+            for title, priority, created_at in announcements
+        ]
+    }
+
+
+def student_summary(student, today=None):
+    """Return the dashboard summary for `student` (a StudentContext), from the cache when fresh."""
+    today = today or date.today()
+    if not cache.shared:
+        return build_student_summary(student.id, student.class_id, today)
+    return cache.get_or_set(
+        f'student-summary:{student.id}:{student.class_id}:{today.isoformat()}',
+        lambda: build_student_summary(student.id, student.class_id, today),
+        depends_on=(Announcement, Subject, Exam),
+        tags=(student_tag(student.id), class_tag(student.class_id))
+    )
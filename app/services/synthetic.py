@@ -0,0 +1,278 @@
+"""
+Deterministic synthetic school data for development and benchmarks.
+
+generate_dataset() builds a whole school: departments with teachers and
+subjects, classes with a weekly timetable, students, a year of school-day
+attendance, exams with a mark for every student and subject, term fees,
+and a library with issues. All randomness comes from one random.Random
+seeded with `seed`, consumed in a fixed order. The same seed and sizes
+therefore give the same rows (password hashes aside, which are salted),
+and `end_date` only shifts the dates.
+
+Rows go in through executemany INSERTs in chunks of CHUNK_SIZE, with ids
+assigned here so that foreign keys need no round trips. Ids continue from
+the current maximum of each table, so the generator can also fill a
+database that already has data. On PostgreSQL the id sequences are moved
+past the new rows afterwards. Every generated account shares one
+password (PASSWORD), hashed once.
+
+    flask generate-data --students-per-class 40 --days 365 --seed 42
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from flask import current_app
+from sqlalchemy import func, insert, text, update
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import (User, Department, Teacher, Subject, Class, TimeTable, Student, Attendance, Exam, Mark,
+                        Fee, Book, BookIssue)
+from app.services.attendance_summary import rebuild_attendance_summary
+
+PASSWORD = 'synthetic123'
+CHUNK_SIZE = 5000
+
+DEPARTMENT_NAMES = ('Science', 'Commerce', 'Arts', 'Engineering', 'Medicine', 'Law', 'Management', 'Design')
+YEARS = ('1st Year', '2nd Year', '3rd Year', '4th Year')
+SECTIONS = 'ABCDEFGH'
+FIRST_NAMES = ('Aarav', 'Aditi', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Nikhil', 'Priya', 'Rahul',
+               'Riya', 'Rohan', 'Saanvi', 'Sahil', 'Sneha', 'Tanvi', 'Varun', 'Vivaan', 'Zara', 'Kabir')
+LAST_NAMES = ('Sharma', 'Patel', 'Iyer', 'Khan', 'Reddy', 'Gupta', 'Nair', 'Das', 'Mehta', 'Joshi',
+              'Singh', 'Rao', 'Kulkarni', 'Bose', 'Menon', 'Chopra')
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')
+BOOK_CATEGORIES = ('textbook', 'reference', 'fiction', 'journal')
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _insert(model, rows):
+    """executemany INSERT of `rows` (any iterable of dicts) in CHUNK_SIZE batches; returns the count."""
+    table = model.__table__
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            db.session.execute(insert(table), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+def _sync_sequences(*models):
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+        ))
+
+
+def _school_days(end_date, days):
+    return [end_date - timedelta(days=n) for n in range(days, -1, -1)
+            if (end_date - timedelta(days=n)).weekday() < 5]
+
+
+def generate_dataset(seed=42, departments=4, classes_per_department=4, students_per_class=40,
+                     teachers_per_department=6, subjects_per_department=5, days=365, exams=4,
+                     books=500, issues_per_student=2, end_date=None, log=None):
+    """
+    Insert a synthetic school and commit; return {table: rows inserted}.
+    `log` is called with a progress message after each table.
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    log = log or (lambda message: None)
+    password_hash = generate_password_hash(PASSWORD, method=current_app.config['PASSWORD_HASH_METHOD'])
+    created = datetime.combine(end_date - timedelta(days=days), time(9))  # instead of the utcnow() defaults
+    counts = {}
+
+    def person():
+        return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+    def account(user_id, role):
+        username = f'{role}{user_id}'
+        return {'id': user_id, 'username': username, 'email': f'{username}@synthetic.example', 'role': role,
+                'is_approved': True, 'password_hash': password_hash, 'created_at': created}
+
+    # ---- departments, teachers, subjects ----
+    user_id = _next_id(User)
+    dept_ids = list(range(_next_id(Department), _next_id(Department) + departments))
+    counts['departments'] = _insert(Department, (
+        {'id': dept_id, 'name': f'{DEPARTMENT_NAMES[n % len(DEPARTMENT_NAMES)]} {dept_id}',
+         'code': f'SYN{dept_id}', 'description': 'Synthetic department', 'created_at': created}
+        for n, dept_id in enumerate(dept_ids)
+    ))
+
+    teacher_id = _next_id(Teacher)
+    teacher_users, teachers, dept_teachers = [], [], {}
+    for dept_id in dept_ids:
+        for _ in range(teachers_per_department):
+            first, last = person()
+            teacher_users.append(account(user_id, 'teacher'))
+            teachers.append({'id': teacher_id, 'user_id': user_id, 'department_id': dept_id, 'first_name': first,
+                             'last_name': last, 'qualification': 'M.Sc.', 'phone': f'9{rng.randrange(10**9):09d}',
+                             'joining_date': end_date - timedelta(days=rng.randrange(365, 3650))})
+            dept_teachers.setdefault(dept_id, []).append(teacher_id)
+            user_id += 1
+            teacher_id += 1
+    _insert(User, teacher_users)
+    counts['teachers'] = _insert(Teacher, teachers)
+    for dept_id in dept_ids:
+        db.session.execute(update(Department.__table__).where(Department.__table__.c.id == dept_id)
+                           .values(head_teacher_id=dept_teachers[dept_id][0]))
+
+    subject_id = _next_id(Subject)
+    subjects, dept_subjects = [], {}
+    for dept_id in dept_ids:
+        for n in range(subjects_per_department):
+            subjects.append({'id': subject_id, 'name': f'Subject {n + 1} ({dept_id})',
+                             'code': f'SYN{dept_id}-{n + 1}', 'department_id': dept_id})
+            dept_subjects.setdefault(dept_id, []).append(subject_id)
+            subject_id += 1
+    counts['subjects'] = _insert(Subject, subjects)
+    log(f"{counts['departments']} departments, {counts['teachers']} teachers, {counts['subjects']} subjects")
+
+    # ---- classes and timetable ----
+    class_id = _next_id(Class)
+    classes = []
+    for dept_id in dept_ids:
+        for n in range(classes_per_department):
+            classes.append({'id': class_id, 'grade': YEARS[n % len(YEARS)],
+                            'section': SECTIONS[n // len(YEARS) % len(SECTIONS)], 'department_id': dept_id,
+                            'class_teacher_id': rng.choice(dept_teachers[dept_id])})
+            class_id += 1
+    counts['classes'] = _insert(Class, classes)
+
+    timetable_id = _next_id(TimeTable)
+    timetable = []
+    for cls in classes:
+        dept_subject_ids = dept_subjects[cls['department_id']]
+        for day in WEEKDAYS:
+            for period in range(4):
+                timetable.append({'id': timetable_id, 'class_id': cls['id'], 'day_of_week': day,
+                                  'subject_id': dept_subject_ids[(period + WEEKDAYS.index(day)) % len(dept_subject_ids)],
+                                  'teacher_id': rng.choice(dept_teachers[cls['department_id']]),
+                                  'start_time': time(9 + period), 'end_time': time(9 + period, 50)})
+                timetable_id += 1
+    counts['timetable'] = _insert(TimeTable, timetable)
+
+    # ---- students ----
+    student_id = _next_id(Student)
+    student_users, students, ability, attendance_rate = [], [], {}, {}
+    for cls in classes:
+        for _ in range(students_per_class):
+            first, last = person()
+            student_users.append(account(user_id, 'student'))
+            students.append({'id': student_id, 'user_id': user_id, 'class_id': cls['id'],
+                             'department_id': cls['department_id'], 'first_name': first, 'last_name': last,
+                             'roll_no': f'SYN{student_id:07d}', 'enrollment_no': f'SYN-EN-{student_id:07d}',
+                             'gender': rng.choice(('Male', 'Female')),
+                             'dob': end_date - timedelta(days=rng.randrange(17 * 365, 23 * 365)),
+                             'admission_date': end_date - timedelta(days=rng.randrange(30, 4 * 365)),
+                             'parent_name': f'{rng.choice(FIRST_NAMES)} {last}',
+                             'parent_phone': f'8{rng.randrange(10**9):09d}'})
+            ability[student_id] = rng.gauss(68, 12)
+            attendance_rate[student_id] = min(0.99, max(0.5, rng.gauss(0.88, 0.07)))
+            user_id += 1
+            student_id += 1
+    _insert(User, student_users)
+    counts['students'] = _insert(Student, students)
+    log(f"{counts['classes']} classes, {counts['timetable']} timetable slots, {counts['students']} students")
+
+    # ---- attendance ----
+    school_days = _school_days(end_date, days)
+
+    def attendance_rows():
+        attendance_id = _next_id(Attendance)
+        for student in students:
+            present = attendance_rate[student['id']]
+            for day in school_days:
+                roll = rng.random()
+                status = 'Present' if roll < present else ('Late' if roll < present + 0.03 else 'Absent')
+                yield {'id': attendance_id, 'student_id': student['id'], 'date': day, 'status': status}
+                attendance_id += 1
+
+    counts['attendance'] = _insert(Attendance, attendance_rows())
+    counts['attendance_daily_summary'] = rebuild_attendance_summary(school_days[0], school_days[-1]) \
+        if school_days else 0
+    log(f"{counts['attendance']} attendance records over {len(school_days)} school days")
+
+    # ---- exams and marks ----
+    exam_id = _next_id(Exam)
+    exam_rows = [{'id': exam_id + n, 'name': f'Exam {n + 1} ({exam_id + n})',
+                  'date': end_date - timedelta(days=days * (exams - n) // (exams + 1))} for n in range(exams)]
+    counts['exams'] = _insert(Exam, exam_rows)
+
+    def mark_rows():
+        mark_id = _next_id(Mark)
+        for exam in exam_rows:
+            for student in students:
+                for subject in dept_subjects[student['department_id']]:
+                    score = min(100, max(0, round(rng.gauss(ability[student['id']], 10))))
+                    yield {'id': mark_id, 'student_id': student['id'], 'exam_id': exam['id'],
+                           'subject_id': subject, 'score_obtained': score, 'max_score': 100}
+                    mark_id += 1
+
+    counts['marks'] = _insert(Mark, mark_rows())
+    log(f"{counts['exams']} exams, {counts['marks']} marks")
+
+    # ---- fees ----
+    def fee_rows():
+        fee_id = _next_id(Fee)
+        terms = [(f'Term {n + 1} Fee', end_date - timedelta(days=days - n * days // 3)) for n in range(3)]
+        for student in students:
+            for title, due_date in terms:
+                roll = rng.random()
+                if due_date > end_date or roll < 0.1:
+                    status, paid_date = 'Pending', None
+                elif roll < 0.85:
+                    status, paid_date = 'Paid', due_date - timedelta(days=rng.randrange(0, 20))
+                else:
+                    status, paid_date = 'Overdue', None
+                yield {'id': fee_id, 'student_id': student['id'], 'title': title, 'due_date': due_date,
+                       'amount': rng.choice((15000, 18000, 22000)), 'status': status, 'paid_date': paid_date}
+                fee_id += 1
+
+    counts['fees'] = _insert(Fee, fee_rows())
+
+    # ---- library ----
+    book_id = _next_id(Book)
+    copies = [rng.randrange(1, 6) for _ in range(books)]
+    available = list(copies)
+    issues = []
+    issue_id = _next_id(BookIssue)
+    end = datetime.combine(end_date, time(15))
+    for student in students if books else ():
+        for _ in range(issues_per_student):
+            n = rng.randrange(books)
+            issued = end - timedelta(days=rng.randrange(0, days + 1))
+            due = issued + timedelta(days=14)
+            returned = (due < end and rng.random() < 0.8) or not available[n]
+            if not returned:
+                available[n] -= 1
+            issues.append({'id': issue_id, 'book_id': book_id + n, 'student_id': student['id'],
+                           'issue_date': issued, 'due_date': due,
+                           'return_date': min(end, issued + timedelta(days=rng.randrange(1, 20))) if returned else None,
+                           'status': 'returned' if returned else ('overdue' if due < end else 'issued'),
+                           'fine_amount': 0.0})
+            issue_id += 1
+    counts['books'] = _insert(Book, (
+        {'id': book_id + n, 'title': f'Book {book_id + n}', 'author': ' '.join(person()),
+         'isbn': f'978{book_id + n:010d}', 'category': rng.choice(BOOK_CATEGORIES),
+         'total_copies': copies[n], 'available_copies': available[n], 'added_date': created}
+        for n in range(books)
+    ))
+    counts['book_issues'] = _insert(BookIssue, issues)
+    log(f"{counts['fees']} fees, {counts['books']} books, {counts['book_issues']} book issues")
+
+    counts['users'] = len(teacher_users) + len(student_users)
+    _sync_sequences(User, Department, Teacher, Subject, Class, TimeTable, Student, Attendance, Exam, Mark, Fee,
+                    Book, BookIssue)
+    db.session.commit()
+    return counts
@@ -0,0 +1,29 @@
+"""
+INSERT ... ON CONFLICT DO UPDATE for the dialects that have it.
+
+PostgreSQL and SQLite share the syntax but each has its own insert()
+construct. upsert_statement() returns None on any other dialect, and the
+caller falls back to ORM reads and writes.
+"""
+from app import db
+
+
+def upsert_statement(model, rows, conflict_columns, update_columns, increment=False):
+    """
+    Insert `rows` into `model`'s table; a row that collides on the unique
+    `conflict_columns` instead sets `update_columns` to the new values, or
+    adds the new values to them with `increment`.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    stmt = insert(model).values(rows)
+    if increment:
+        values = {column: getattr(model, column) + getattr(stmt.excluded, column) for column in update_columns}
+    else:
+        values = {column: getattr(stmt.excluded, column) for column in update_columns}
+    return stmt.on_conflict_do_update(index_elements=conflict_columns, set_=values)
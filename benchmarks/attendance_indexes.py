@@ -0,0 +1,153 @@
+"""
+Query-plan benchmark for the lookup indexes on attendance, marks, students,
+timetable and fees.
+
+Builds a synthetic database (500k attendance rows by default), runs the hot
+queries without the indexes, then creates them and runs the queries again,
+printing each plan and the mean latency.
+
+    python benchmarks/attendance_indexes.py
+    python benchmarks/attendance_indexes.py --url postgresql://... --rows 500000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, text
+from app import db
+from app import models  # noqa: F401  (registers the tables on db.metadata)
+
+STUDENTS_PER_CLASS = 40
+STATUSES = ('Present', 'Present', 'Present', 'Absent', 'Late')
+
+QUERIES = [
+    ('attendance by (student_id, date)',
+     'SELECT id, status FROM attendance WHERE student_id = :student_id AND date = :day'),
+    ('attendance counts for a day',
+     'SELECT status, COUNT(id) FROM attendance WHERE date = :day GROUP BY status'),
+    ('students in a class',
+     'SELECT id FROM students WHERE class_id = :class_id'),
+    ('student profile by user_id',
+     'SELECT id FROM students WHERE user_id = :user_id'),
+    ('mark by (student, subject, exam)',
+     'SELECT id FROM marks WHERE student_id = :student_id AND subject_id = 1 AND exam_id = 1'),
+    ('timetable for teacher and day',
+     "SELECT id FROM timetable WHERE teacher_id = 1 AND day_of_week = 'Monday'"),
+    ('overdue fees',
+     "SELECT id FROM fees WHERE status = 'Pending' AND due_date < :day"),
+]
+
+
+def lookup_indexes():
+    """Every index declared on the models (the set the migration creates)."""
+    return [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+
+def populate(engine, rows):
+    students = max(rows // 250, STUDENTS_PER_CLASS)
+    days = rows // students
+    start = date.today() - timedelta(days=days)
+    tables = db.metadata.tables
+
+    with engine.begin() as conn:
+        conn.execute(insert(tables['departments']), [{'id': 1, 'name': 'Bench', 'code': 'BEN'}])
+        conn.execute(insert(tables['classes']), [
+            {'id': c + 1, 'grade': str(c), 'section': 'A', 'department_id': 1}
+            for c in range(students // STUDENTS_PER_CLASS + 1)
+        ])
+        conn.execute(insert(tables['users']), [
+            {'id': i, 'username': f'u{i}', 'email': f'u{i}@bench', 'role': 'student', 'is_approved': True}
+            for i in range(1, students + 2)
+        ])
+        conn.execute(insert(tables['teachers']), [
+            {'id': 1, 'user_id': students + 1, 'first_name': 'T', 'last_name': 'B', 'department_id': 1}
+        ])
+        conn.execute(insert(tables['students']), [
+            {'id': i, 'user_id': i, 'first_name': 'S', 'last_name': str(i), 'roll_no': str(i),
+             'class_id': (i - 1) // STUDENTS_PER_CLASS + 1, 'department_id': 1}
+            for i in range(1, students + 1)
+        ])
+        conn.execute(insert(tables['subjects']), [{'id': 1, 'name': 'Bench', 'code': 'B1', 'department_id': 1}])
+        conn.execute(insert(tables['exams']), [{'id': 1, 'name': 'Bench'}])
+        conn.execute(insert(tables['marks']), [
+            {'student_id': i, 'subject_id': 1, 'exam_id': 1, 'score_obtained': i % 100, 'max_score': 100}
+            for i in range(1, students + 1)
+        ])
+        conn.execute(insert(tables['fees']), [
+            {'student_id': i, 'title': 'Term', 'amount': 100, 'status': 'Pending' if i % 4 else 'Paid',
+             'due_date': start + timedelta(days=i % days)}
+            for i in range(1, students + 1)
+        ])
+        conn.execute(insert(tables['timetable']), [
+            {'class_id': c % 50 + 1, 'subject_id': 1, 'teacher_id': 1, 'day_of_week': day}
+            for c in range(200) for day in ('Monday', 'Tuesday', 'Wednesday')
+        ])
+
+        batch = []
+        for d in range(days):
+            day = start + timedelta(days=d)
+            for s in range(1, students + 1):
+                batch.append({'student_id': s, 'date': day, 'status': STATUSES[(s + d) % len(STATUSES)]})
+            if len(batch) >= 50000:
+                conn.execute(insert(tables['attendance']), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(tables['attendance']), batch)
+
+    return students, start + timedelta(days=days // 2)
+
+
+def explain(conn, sql, params):
+    if conn.dialect.name == 'sqlite':
+        rows = conn.execute(text('EXPLAIN QUERY PLAN ' + sql), params).all()
+        return [row[-1] for row in rows]
+    return [row[0] for row in conn.execute(text('EXPLAIN ANALYZE ' + sql), params).all()]
+
+
+def run_queries(engine, params, repeat):
+    with engine.connect() as conn:
+        for label, sql in QUERIES:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(text(sql), params).all()
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            print(f"\n  {label}: {elapsed:.3f} ms")
+            for line in explain(conn, sql, params):
+                print(f"      {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='sqlite:///bench_indexes.db')
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    for index in lookup_indexes():
+        index.drop(engine)
+
+    print(f"Populating {args.rows} attendance rows ...")
+    students, day = populate(engine, args.rows)
+    params = {'student_id': students // 2, 'day': day, 'class_id': 3, 'user_id': students // 3}
+
+    print("\n=== Without indexes ===")
+    run_queries(engine, params, args.repeat)
+
+    for index in lookup_indexes():
+        index.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+
+    print("\n=== With indexes ===")
+    run_queries(engine, params, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
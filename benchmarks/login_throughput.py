@@ -0,0 +1,125 @@
+"""
+Login throughput benchmark.
+
+Builds a users table (100k rows by default) and measures:
+
+  1. the user lookup: the old ILIKE-on-both-columns query against the
+     lower(email)/lower(username) lookup, with query plans;
+  2. end-to-end POST /login requests per second through the Flask test
+     client for each PASSWORD_HASH_METHOD given, first while the stored
+     hashes are being upgraded to it and then in steady state.
+
+    python benchmarks/login_throughput.py
+    python benchmarks/login_throughput.py --users 200000 \
+        --methods pbkdf2:sha256:600000,pbkdf2:sha256:100000,scrypt:32768:8:1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, text
+from werkzeug.security import generate_password_hash
+from config import Config
+from app import create_app, db
+from app import models  # noqa: F401  (registers the tables on db.metadata)
+
+PASSWORD = 'bench-password'
+OLD_METHOD = 'pbkdf2:sha256:260000'
+
+LOOKUPS = [
+    ('ILIKE on email or username (before)',
+     'SELECT id FROM users WHERE email LIKE :login OR username LIKE :login'),
+    ('lower() = on email or username (after)',
+     'SELECT id FROM users WHERE lower(email) = :login OR lower(username) = :login'),
+]
+
+
+def populate(engine, users):
+    # One shared hash keeps setup fast; every account has the same password
+    password_hash = generate_password_hash(PASSWORD, method=OLD_METHOD)
+    with engine.begin() as conn:
+        for start in range(1, users + 1, 50000):
+            conn.execute(insert(db.metadata.tables['users']), [
+                {'id': i, 'username': f'User{i}', 'email': f'User{i}@Bench.example', 'role': 'admin',
+                 'is_approved': True, 'password_hash': password_hash}
+                for i in range(start, min(start + 50000, users + 1))
+            ])
+        conn.execute(text('ANALYZE'))
+
+
+def explain(conn, sql, params):
+    if conn.dialect.name == 'sqlite':
+        return [row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql), params).all()]
+    sql = sql.replace(' LIKE ', ' ILIKE ')
+    return [row[0] for row in conn.execute(text('EXPLAIN ANALYZE ' + sql), params).all()]
+
+
+def bench_lookups(engine, users, repeat):
+    login = f'user{users // 2}@bench.example'
+    with engine.connect() as conn:
+        for label, sql in LOOKUPS:
+            if conn.dialect.name != 'sqlite':
+                sql = sql.replace(' LIKE ', ' ILIKE ')
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(text(sql), {'login': login}).all()
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            print(f"\n  {label}: {elapsed:.3f} ms")
+            for line in explain(conn, sql, {'login': login}):
+                print(f"      {line}")
+
+
+def bench_logins(url, users, method, requests):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        PASSWORD_HASH_METHOD = method
+        CACHE_TYPE = 'null'
+        JOB_EXECUTOR = 'worker'  # no job thread polling the database during the run
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    login_ids = [f'USER{(i * 7919) % users + 1}@bench.example' for i in range(requests)]
+
+    def run():
+        started = time.perf_counter()
+        for login_id in login_ids:
+            response = client.post('/login', data={'login_id': login_id, 'password': PASSWORD})
+            assert response.status_code == 302, response.status_code
+            client.get('/logout')
+        return (time.perf_counter() - started) / len(login_ids)
+
+    # The first pass rehashes every password to `method`, the second is steady state
+    rehash, steady = run(), run()
+    print(f"\n  {method}: {rehash * 1000:.1f} ms/login with rehash, "
+          f"{steady * 1000:.1f} ms/login after ({1 / steady:.1f} logins/s per worker)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='sqlite:///bench_login.db')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--methods', default='pbkdf2:sha256:600000,pbkdf2:sha256:100000,scrypt:32768:8:1')
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    print(f"Populating {args.users} users ...")
+    populate(engine, args.users)
+
+    print("\n=== User lookup ===")
+    bench_lookups(engine, args.users, args.repeat)
+
+    print(f"\n=== POST /login (passwords stored as {OLD_METHOD}, rehashed on first login) ===")
+    for method in args.methods.split(','):
+        bench_logins(args.url, args.users, method, args.requests)
+
+
+if __name__ == '__main__':
+    main()
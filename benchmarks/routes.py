@@ -0,0 +1,191 @@
+"""
+Route latency benchmark against a synthetic school.
+
+Builds the dataset with app/services/synthetic.py (the same data as
+`flask generate-data`), logs in as an admin, a teacher and a student, and
+drives the main pages of each portal through the Flask test client. For
+every route it reports p50/p95 latency and the SQL statements per request.
+The page cache is off by default, so each request does the full work.
+
+Save a run with --json and pass it as --baseline next time to see the
+change per route:
+
+    python benchmarks/routes.py --json before.json
+    python benchmarks/routes.py --reuse --baseline before.json
+    python benchmarks/routes.py --url postgresql://... --students-per-class 60 --requests 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from config import Config
+from app import create_app, db
+from app import models  # noqa: F401  (registers the tables on db.metadata)
+from app.models import User, Student, TimeTable, Exam
+from app.services.pagination import encode_cursor
+from app.services.synthetic import PASSWORD, generate_dataset
+
+BENCH_ADMIN = 'bench-admin'
+
+# (role, path); {placeholders} are filled from the generated data
+ROUTES = [
+    ('admin', '/admin/dashboard'),
+    ('admin', '/admin/students'),
+    ('admin', '/admin/students?after={deep_cursor}'),
+    ('admin', '/admin/students?q=Sharma'),
+    ('admin', '/admin/teachers'),
+    ('admin', '/admin/classes'),
+    ('admin', '/admin/attendance'),
+    ('admin', '/admin/attendance/mark?class_id={class_id}&date={today}'),
+    ('admin', '/admin/analytics/attendance'),
+    ('admin', '/admin/analytics/performance'),
+    ('admin', '/admin/analytics/departments'),
+    ('admin', '/admin/fees'),
+    ('admin', '/admin/library/issues'),
+    ('admin', '/admin/timetable/view/{class_id}'),
+    ('admin', '/admin/reportcard/{student_id}'),
+    ('admin', '/admin/students/export'),
+    ('teacher', '/teacher/dashboard'),
+    ('teacher', '/teacher/schedule'),
+    ('teacher', '/teacher/attendance/mark?class_id={class_id}&date={today}'),
+    ('teacher', '/teacher/marks/entry?class_id={class_id}&subject_id={subject_id}&exam_id={exam_id}'),
+    ('student', '/student/dashboard'),
+    ('student', '/student/attendance'),
+    ('student', '/student/marks'),
+    ('student', '/student/fees'),
+    ('student', '/student/timetable'),
+]
+
+
+def build(app, args):
+    with app.app_context():
+        # through the app's engine, so a relative sqlite:/// URL resolves to the same file
+        db.drop_all()
+        db.create_all()
+        counts = generate_dataset(seed=args.seed, departments=args.departments,
+                                  classes_per_department=args.classes_per_department,
+                                  students_per_class=args.students_per_class, days=args.days,
+                                  log=lambda message: print(f"  {message}"))
+        admin = User(username=BENCH_ADMIN, email='bench-admin@synthetic.example', role='admin', is_approved=True)
+        admin.set_password(PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+    return counts
+
+
+def fixtures(app):
+    """Logins and the ids the route placeholders refer to."""
+    with app.app_context():
+        slot = TimeTable.query.order_by(TimeTable.id).first()
+        teacher_login = db.session.get(User, slot.teacher.user_id).username
+        student = Student.query.filter_by(class_id=slot.class_id).order_by(Student.id).first()
+        # Keyset cursor halfway down the student list in its default order (roll_no, id), as reached
+        # by paging with "next"; list views ignore ?page=
+        middle = Student.query.order_by(Student.roll_no.is_(None), Student.roll_no, Student.id) \
+            .offset(Student.query.count() // 2).first()
+        params = {'class_id': slot.class_id, 'subject_id': slot.subject_id, 'student_id': student.id,
+                  'exam_id': Exam.query.order_by(Exam.id).first().id, 'today': date.today().isoformat(),
+                  'deep_cursor': encode_cursor(middle.roll_no, middle.id)}
+        logins = {'admin': BENCH_ADMIN, 'teacher': teacher_login,
+                  'student': db.session.get(User, student.user_id).username}
+    return logins, params
+
+
+def login(app, username):
+    client = app.test_client()
+    response = client.post('/login', data={'login_id': username, 'password': PASSWORD})
+    assert response.status_code == 302, f"login as {username} failed ({response.status_code})"
+    return client
+
+
+def bench_route(client, path, statements, warmup, requests):
+    for _ in range(warmup):
+        client.get(path).get_data()
+    timings, queries, status = [], [], None
+    for _ in range(requests):
+        before = len(statements)
+        started = time.perf_counter()
+        response = client.get(path)
+        response.get_data()  # drain streamed responses (CSV exports)
+        timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(statements) - before)
+        status = response.status_code
+    quantiles = statistics.quantiles(timings, n=20, method='inclusive') if len(timings) > 1 else timings * 19
+    return {'status': status, 'p50_ms': statistics.median(timings), 'p95_ms': quantiles[18],
+            'queries': statistics.mean(queries), 'max_queries': max(queries)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='sqlite:///bench_routes.db')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--departments', type=int, default=4)
+    parser.add_argument('--classes-per-department', type=int, default=4)
+    parser.add_argument('--students-per-class', type=int, default=40)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--cache', default='null', help='CACHE_TYPE for the run (default: no page cache)')
+    parser.add_argument('--only', help='run only routes whose path contains this text')
+    parser.add_argument('--reuse', action='store_true', help='keep the database from a previous run')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results file of an earlier run to compare against')
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.url
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        CACHE_TYPE = args.cache
+        JOB_EXECUTOR = 'worker'  # no job thread polling the database during the run
+
+    app = create_app(BenchConfig)
+    if not args.reuse:
+        print(f"Generating synthetic data (seed {args.seed}) ...")
+        started = time.perf_counter()
+        counts = build(app, args)
+        print(f"  {sum(counts.values())} rows in {time.perf_counter() - started:.1f} s")
+
+    logins, params = fixtures(app)
+    clients = {role: login(app, username) for role, username in logins.items()}
+    with app.app_context():
+        engine = db.engine
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(1))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {row['route']: row for row in json.load(f)}
+
+    print(f"\n=== {args.requests} requests per route (after {args.warmup} warm-up), cache {args.cache} ===\n")
+    print(f"  {'route':<80} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8}"
+          + (f" {'p50 vs baseline':>16}" if baseline else ''))
+    results = []
+    for role, template in ROUTES:
+        path = template.format(**params)
+        if args.only and args.only not in path:
+            continue
+        row = {'route': f'{role} {template}', **bench_route(clients[role], path, statements, args.warmup, args.requests)}
+        results.append(row)
+        line = (f"  {row['route']:<80} {row['status']:>6} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+                f"{row['queries']:8.1f}")
+        before = baseline.get(row['route'])
+        if before:
+            line += f" {(row['p50_ms'] / before['p50_ms'] - 1) * 100:+15.0f}%"
+        print(line)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
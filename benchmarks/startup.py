@@ -0,0 +1,101 @@
+"""
+Startup benchmark: import-time budget for the app and create_app().
+
+Every serverless cold start and gunicorn worker boot imports the app and
+runs create_app(). The PDF, image and analytics libraries and Alembic
+(HEAVY_MODULES) are therefore imported inside the functions that use them,
+never on that path. Each measurement runs in a fresh interpreter:
+
+  1. `python -X importtime`: the modules imported, by cumulative cost, and
+     any heavy module that crept onto the startup path;
+  2. the wall time of importing the app plus create_app(), whose median
+     must stay under --budget (default STARTUP_BUDGET_MS).
+
+Exits with status 1 when over budget or when a heavy module is imported.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --budget 800 --top 40
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config
+
+HEAVY_MODULES = ('numpy', 'pandas', 'reportlab', 'fpdf', 'pypdf', 'PIL', 'alembic', 'flask_migrate', 'brotli')
+
+TIMED_STARTUP = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "create_app_ms": (done - imported) * 1000}))
+'''
+
+
+def python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def import_times():
+    """{module: (self ms, cumulative ms)} for importing the app and running create_app()."""
+    stderr = python('-X', 'importtime', '-c', 'from app import create_app; create_app()').stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return times
+
+
+def report_imports(top):
+    times = import_times()
+    print(f"  {'self ms':>9} {'total ms':>9}  module")
+    for name, (self_ms, cumulative_ms) in sorted(times.items(), key=lambda item: -item[1][1])[:top]:
+        print(f"  {self_ms:9.1f} {cumulative_ms:9.1f}  {name}")
+    print(f"\n  {len(times)} modules, {sum(s for s, _ in times.values()):.0f} ms of imports")
+    heavy = sorted(name for name in times if name in HEAVY_MODULES)
+    if heavy:
+        print(f"  Heavy modules on the startup path: {', '.join(heavy)}")
+    return heavy
+
+
+def bench_startup(runs):
+    samples = [json.loads(python('-c', TIMED_STARTUP).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    totals = [s['import_ms'] + s['create_app_ms'] for s in samples]
+    print(f"  import app:  {statistics.median(s['import_ms'] for s in samples):.0f} ms (median)")
+    print(f"  create_app:  {statistics.median(s['create_app_ms'] for s in samples):.0f} ms (median)")
+    print(f"  total:       {statistics.median(totals):.0f} ms median, {min(totals):.0f}-{max(totals):.0f} ms")
+    return statistics.median(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=Config.STARTUP_BUDGET_MS, help='milliseconds')
+    parser.add_argument('--top', type=int, default=25, help='modules to list')
+    args = parser.parse_args()
+
+    print("=== Import time (python -X importtime) ===")
+    heavy = report_imports(args.top)
+
+    print(f"\n=== Startup over {args.runs} fresh interpreters ===")
+    median = bench_startup(args.runs)
+
+    ok = median <= args.budget and not heavy
+    print(f"\n{'OK' if ok else 'FAIL'}: median {median:.0f} ms, budget {args.budget:.0f} ms"
+          + (f", heavy imports: {', '.join(heavy)}" if heavy else ''))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,58 +3,176 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def normalize_database_url(database_url):
+    """Fix up a DATABASE_URL-style connection string for SQLAlchemy (scheme, '@' in passwords, sslmode)."""
+    if not database_url:
+        return database_url
+
+    # Standardize scheme
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+
+    # URL encode password if it contains @
+    try:
+        from urllib.parse import quote_plus
+        if '://' in database_url:
+            scheme, rest = database_url.split('://', 1)
+            if '@' in rest:
+                auth_part, host_part = rest.rsplit('@', 1)
+                if ':' in auth_part:
+                    user, password = auth_part.split(':', 1)
+                    if '@' in password:
+                        database_url = f"{scheme}://{user}:{quote_plus(password)}@{host_part}"
+    except:
+        pass
+
+    # Supabase requires TLS
+    if database_url.startswith('postgresql') and 'sslmode' not in database_url:
+        database_url += ('&' if '?' in database_url else '?') + 'sslmode=require'
+    return database_url
+
+
+# Connection pooling per deployment shape (DB_PROFILE):
+#   serverless  Vercel: one request at a time per instance, and the instance may be frozen
+#               between requests, so keep one connection, recycle it quickly and ping it first.
+#   gunicorn    Long-lived workers, each with its own pool. DB_POOL_SIZE + DB_MAX_OVERFLOW per
+#               worker times the number of workers must fit the Supabase pooler's client limit.
+#   local       SQLite for development: SQLAlchemy's defaults, no server connect_args.
+# Unset, the profile is 'local' for SQLite URLs, 'serverless' on Vercel and 'gunicorn' otherwise.
+DB_PROFILES = {
+    'serverless': {'pool_size': 1, 'max_overflow': 2, 'pool_recycle': 60, 'pool_pre_ping': True, 'pool_timeout': 10},
+    'gunicorn': {'pool_size': 5, 'max_overflow': 5, 'pool_recycle': 300, 'pool_pre_ping': True, 'pool_timeout': 10,
+                 'pool_use_lifo': True},
+    'local': {}
+}
+
+
+def db_profile(database_url):
+    profile = os.environ.get('DB_PROFILE')
+    if profile:
+        if profile not in DB_PROFILES:
+            raise ValueError(f"DB_PROFILE must be one of {', '.join(DB_PROFILES)}, not {profile!r}")
+        return profile
+    if database_url.startswith('sqlite'):
+        return 'local'
+    return 'serverless' if os.environ.get('VERCEL') else 'gunicorn'
+
+
+def engine_options(database_url, profile):
+    """SQLALCHEMY_ENGINE_OPTIONS for `database_url` under the named profile."""
+    options = dict(DB_PROFILES[profile])
+    if profile != 'local':
+        if os.environ.get('DB_POOL_SIZE'):
+            options['pool_size'] = int(os.environ['DB_POOL_SIZE'])
+        if os.environ.get('DB_MAX_OVERFLOW'):
+            options['max_overflow'] = int(os.environ['DB_MAX_OVERFLOW'])
+    if database_url.startswith('postgresql'):
+        options['connect_args'] = {'sslmode': 'require', 'connect_timeout': 10}
+    return options
+
+
+def multi_process():
+    """True when requests may be served by several processes (gunicorn reads WEB_CONCURRENCY; Vercel scales out)."""
+    return bool(os.environ.get('VERCEL')) or int(os.environ.get('WEB_CONCURRENCY', 1)) > 1
+
+
+def default_cache_type(redis_url):
+    """
+    A page cache backend every process sees, so a commit invalidates entries everywhere:
+    redis when configured, the shared filesystem for gunicorn workers on one host, and
+    no cache on Vercel (instances share neither memory nor disk). 'lru' only for one process.
+    """
+    if redis_url:
+        return 'redis'
+    if os.environ.get('VERCEL'):
+        return 'null'
+    return 'filesystem' if multi_process() else 'lru'
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-in-production'
-    
-    database_url = os.environ.get('DATABASE_URL') or os.environ.get('SUPABASE_DB_URL')
-    
-    if database_url:
-        # Standardize scheme
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-            
-        # URL encode password if it contains @
-        try:
-            from urllib.parse import quote_plus
-            if '://' in database_url:
-                scheme, rest = database_url.split('://', 1)
-                if '@' in rest:
-                    auth_part, host_part = rest.rsplit('@', 1)
-                    if ':' in auth_part:
-                        user, password = auth_part.split(':', 1)
-                        if '@' in password:
-                            database_url = f"{scheme}://{user}:{quote_plus(password)}@{host_part}"
-        except:
-            pass
-
-    SQLALCHEMY_DATABASE_URI = database_url or 'sqlite:///site.db'
-    
+
+    SQLALCHEMY_DATABASE_URI = normalize_database_url(
+        os.environ.get('DATABASE_URL') or os.environ.get('SUPABASE_DB_URL')
+    ) or 'sqlite:///site.db'
+
     # Supabase Connection Pooling Recommendation:
     # Use the **Session Pooler (Port 5432)** for this application.
     # Why? Flask-SQLAlchemy manages sessions and transaction states that may break with Transaction Pooling (Port 6543)
     # properly unless you disable prepared statements and manage transactions manually.
     # The Session Pooler works like a direct connection but multiplexes the underlying connections, which is safer here.
-    
-    # Supabase Session Pooler Optimizations
-    if SQLALCHEMY_DATABASE_URI and 'postgresql' in SQLALCHEMY_DATABASE_URI:
-        if 'sslmode' not in SQLALCHEMY_DATABASE_URI:
-            SQLALCHEMY_DATABASE_URI += ('&' if '?' in SQLALCHEMY_DATABASE_URI else '?') + 'sslmode=require'
-    
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 5,            # Small pool to avoid exhausting Supabase connections
-        'max_overflow': 10,
-        'pool_recycle': 300,       # Recycle connections every 5 mins
-        'pool_pre_ping': True,     # Test connection before using
-        'connect_args': {
-            'sslmode': 'require',
-            'connect_timeout': 10
+    DB_PROFILE = db_profile(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+
+    # Optional read replica: SELECTs in views marked @read_replica (analytics, exports, student
+    # pages) use it; everything else, and every write, uses the primary. See app/services/replica.py
+    DATABASE_REPLICA_URL = normalize_database_url(os.environ.get('DATABASE_REPLICA_URL'))
+    if DATABASE_REPLICA_URL:
+        SQLALCHEMY_BINDS = {
+            'replica': {'url': DATABASE_REPLICA_URL,
+                        **engine_options(DATABASE_REPLICA_URL, db_profile(DATABASE_REPLICA_URL))}
         }
-    }
-    
+
+    # Upgrade the database to the latest migration when run.py / api/index.py start; see app/services/schema.py
+    STARTUP_MIGRATIONS = os.environ.get('STARTUP_MIGRATIONS', '1') == '1'
+
+    # Median ms allowed for importing the app and create_app(); see benchmarks/startup.py
+    STARTUP_BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', 1500))
+
+    # Lazy-load (N+1) detection, always on in debug mode; see app/services/loading.py
+    LAZY_LOAD_DETECTION = os.environ.get('LAZY_LOAD_DETECTION') == '1'
+    LAZY_LOAD_THRESHOLD = int(os.environ.get('LAZY_LOAD_THRESHOLD', 10))
+    LAZY_LOAD_RAISE = os.environ.get('LAZY_LOAD_RAISE') == '1'
+
+    # Request instrumentation and /metrics; see app/services/metrics.py
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_LOG_REQUESTS = os.environ.get('METRICS_LOG_REQUESTS') == '1'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+
+    # Page cache: 'lru' (per process), 'filesystem', 'redis' or 'null'; see app/services/cache.py
+    MULTI_PROCESS = multi_process()
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or default_cache_type(CACHE_REDIS_URL)
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 1024))
+    if os.environ.get('CACHE_DIR'):
+        CACHE_DIR = os.environ['CACHE_DIR']
+
+    # Logged-in user snapshot cache (per process); see app/services/identity.py
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # werkzeug hash method for new passwords, e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'.
+    # Existing hashes are upgraded on the user's next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+
+    # Background jobs: 'thread' (inside each web process) or 'worker' (only when `flask jobs worker` runs).
+    # Downloads go to JOB_OUTPUT_DIR (default instance/jobs). See app/services/jobs.py
+    JOB_EXECUTOR = os.environ.get('JOB_EXECUTOR', 'thread')
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))      # seconds, doubled per attempt
+    JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 30 * 60))         # requeue after this long without progress
+    JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 7 * 24 * 3600))
+    if os.environ.get('JOB_OUTPUT_DIR'):
+        JOB_OUTPUT_DIR = os.environ['JOB_OUTPUT_DIR']
+
+    # Render processes per report card batch (1 renders in the job's process, as on Vercel);
+    # see app/services/report_cards.py
+    REPORT_CARD_WORKERS = int(os.environ.get('REPORT_CARD_WORKERS', 1 if os.environ.get('VERCEL') else 2))
+
+    # Stored fee receipts (default instance/receipts, never under static/), and the processes used to
+    # render missing ones for a bulk export (1 renders in-process, as on Vercel); see app/services/receipts.py
+    if os.environ.get('RECEIPT_DIR'):
+        RECEIPT_DIR = os.environ['RECEIPT_DIR']
+    RECEIPT_WORKERS = int(os.environ.get('RECEIPT_WORKERS', 1 if os.environ.get('VERCEL') else 2))
+
     # Upload configurations
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app/static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
+    MAX_PHOTO_PIXELS = int(os.environ.get('MAX_PHOTO_PIXELS', 40_000_000))  # larger photos are rejected
+    PHOTO_INLINE = os.environ.get('PHOTO_INLINE') == '1'  # resize in the upload request, not in a job
     
     # Session
     SESSION_COOKIE_SECURE = os.environ.get('FLASK_ENV') == 'production'
@@ -0,0 +1,52 @@
+"""Add attendance daily summary
+
+Revision ID: 32999da7d0e7
+Revises: a0a6a221e731
+Create Date: 2026-10-17 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '32999da7d0e7'
+down_revision = 'a0a6a221e731'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built from an earlier copy of the initial revision already have the table
+    if sa.inspect(op.get_bind()).has_table('attendance_daily_summary'):
+        return
+
+    summary = op.create_table('attendance_daily_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('class_id', sa.Integer(), nullable=True),
+    sa.Column('department_id', sa.Integer(), nullable=True),
+    sa.Column('present', sa.Integer(), nullable=False),
+    sa.Column('absent', sa.Integer(), nullable=False),
+    sa.Column('late', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ),
+    sa.ForeignKeyConstraint(['department_id'], ['departments.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'class_id', 'department_id', name='uq_attendance_summary_key')
+    )
+
+    # Backfill from the raw attendance (the same rollup as `flask rebuild-attendance-summary`)
+    attendance = sa.table('attendance', sa.column('student_id'), sa.column('date'), sa.column('status'))
+    students = sa.table('students', sa.column('id'), sa.column('class_id'), sa.column('department_id'))
+    counts = [sa.func.sum(sa.case((attendance.c.status == status, 1), else_=0))
+              for status in ('Present', 'Absent', 'Late')]
+    source = sa.select(attendance.c.date, students.c.class_id, students.c.department_id, *counts) \
+        .select_from(attendance.join(students, students.c.id == attendance.c.student_id)) \
+        .group_by(attendance.c.date, students.c.class_id, students.c.department_id)
+    op.execute(summary.insert().from_select(
+        ['date', 'class_id', 'department_id', 'present', 'absent', 'late'], source
+    ))
+
+
+def downgrade():
+    op.drop_table('attendance_daily_summary')
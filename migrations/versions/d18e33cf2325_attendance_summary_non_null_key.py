@@ -0,0 +1,57 @@
+"""Use a non-null key in attendance daily summary
+
+Revision ID: d18e33cf2325
+Revises: 32999da7d0e7
+Create Date: 2026-10-17 10:05:12.631870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd18e33cf2325'
+down_revision = '32999da7d0e7'
+branch_labels = None
+depends_on = None
+
+
+def _create_and_fill(nullable):
+    # The summary is derived from attendance, so it is rebuilt rather than altered in place
+    summary = op.create_table('attendance_daily_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('class_id', sa.Integer(), nullable=nullable),
+    sa.Column('department_id', sa.Integer(), nullable=nullable),
+    sa.Column('present', sa.Integer(), nullable=False),
+    sa.Column('absent', sa.Integer(), nullable=False),
+    sa.Column('late', sa.Integer(), nullable=False),
+    *([sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ),
+       sa.ForeignKeyConstraint(['department_id'], ['departments.id'], )] if nullable else []),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'class_id', 'department_id', name='uq_attendance_summary_key')
+    )
+
+    attendance = sa.table('attendance', sa.column('student_id'), sa.column('date'), sa.column('status'))
+    students = sa.table('students', sa.column('id'), sa.column('class_id'), sa.column('department_id'))
+    # Students without a class or department are counted under 0 (NULLs never conflict in the key)
+    class_id = students.c.class_id if nullable else sa.func.coalesce(students.c.class_id, 0)
+    department_id = students.c.department_id if nullable else sa.func.coalesce(students.c.department_id, 0)
+    counts = [sa.func.sum(sa.case((attendance.c.status == status, 1), else_=0))
+              for status in ('Present', 'Absent', 'Late')]
+    source = sa.select(attendance.c.date, class_id, department_id, *counts) \
+        .select_from(attendance.join(students, students.c.id == attendance.c.student_id)) \
+        .group_by(attendance.c.date, class_id, department_id)
+    op.execute(summary.insert().from_select(
+        ['date', 'class_id', 'department_id', 'present', 'absent', 'late'], source
+    ))
+
+
+def upgrade():
+    op.drop_table('attendance_daily_summary')
+    _create_and_fill(nullable=False)
+
+
+def downgrade():
+    op.drop_table('attendance_daily_summary')
+    _create_and_fill(nullable=True)
@@ -0,0 +1,29 @@
+import pytest
+from config import Config
+from app import create_app, db
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
+    WTF_CSRF_ENABLED = False
+    CACHE_TYPE = 'null'
+    METRICS_ENABLED = False
+    JOB_EXECUTOR = 'worker'
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
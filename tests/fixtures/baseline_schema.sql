@@ -0,0 +1,245 @@
+-- SQLite schema made by db.create_all() with the models as they were before
+-- migrations/ existed. Unversioned databases look like this; see app/services/schema.py.
+
+CREATE TABLE users (
+	id INTEGER NOT NULL,
+	username VARCHAR(50) NOT NULL,
+	email VARCHAR(120) NOT NULL,
+	password_hash VARCHAR(128),
+	role VARCHAR(20) NOT NULL,
+	is_approved BOOLEAN,
+	created_at DATETIME,
+	PRIMARY KEY (id),
+	UNIQUE (username),
+	UNIQUE (email)
+);
+
+CREATE TABLE teachers (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	department_id INTEGER,
+	first_name VARCHAR(50) NOT NULL,
+	last_name VARCHAR(50) NOT NULL,
+	qualification VARCHAR(100),
+	specialization VARCHAR(100),
+	phone VARCHAR(20),
+	joining_date DATE,
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES users (id),
+	FOREIGN KEY(department_id) REFERENCES departments (id)
+);
+
+CREATE TABLE exams (
+	id INTEGER NOT NULL,
+	name VARCHAR(100) NOT NULL,
+	date DATE,
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE books (
+	id INTEGER NOT NULL,
+	title VARCHAR(200) NOT NULL,
+	author VARCHAR(100),
+	isbn VARCHAR(20),
+	category VARCHAR(50),
+	total_copies INTEGER,
+	available_copies INTEGER,
+	added_date DATETIME,
+	PRIMARY KEY (id),
+	UNIQUE (isbn)
+);
+
+CREATE TABLE permissions (
+	id INTEGER NOT NULL,
+	name VARCHAR(50) NOT NULL,
+	description VARCHAR(200),
+	PRIMARY KEY (id),
+	UNIQUE (name)
+);
+
+CREATE TABLE departments (
+	id INTEGER NOT NULL,
+	name VARCHAR(100) NOT NULL,
+	code VARCHAR(20),
+	description TEXT,
+	head_teacher_id INTEGER,
+	created_at DATETIME,
+	PRIMARY KEY (id),
+	UNIQUE (code),
+	FOREIGN KEY(head_teacher_id) REFERENCES teachers (id)
+);
+
+CREATE TABLE classes (
+	id INTEGER NOT NULL,
+	grade VARCHAR(20) NOT NULL,
+	section VARCHAR(10) NOT NULL,
+	department_id INTEGER,
+	class_teacher_id INTEGER,
+	PRIMARY KEY (id),
+	FOREIGN KEY(department_id) REFERENCES departments (id),
+	FOREIGN KEY(class_teacher_id) REFERENCES teachers (id)
+);
+
+CREATE TABLE subjects (
+	id INTEGER NOT NULL,
+	name VARCHAR(100) NOT NULL,
+	code VARCHAR(20),
+	department_id INTEGER,
+	PRIMARY KEY (id),
+	UNIQUE (code),
+	FOREIGN KEY(department_id) REFERENCES departments (id)
+);
+
+CREATE TABLE announcements (
+	id INTEGER NOT NULL,
+	title VARCHAR(200) NOT NULL,
+	content TEXT NOT NULL,
+	priority VARCHAR(20),
+	target_role VARCHAR(20),
+	created_by INTEGER NOT NULL,
+	created_at DATETIME,
+	expires_at DATETIME,
+	is_active BOOLEAN,
+	PRIMARY KEY (id),
+	FOREIGN KEY(created_by) REFERENCES users (id)
+);
+
+CREATE TABLE role_permissions (
+	id INTEGER NOT NULL,
+	role VARCHAR(20) NOT NULL,
+	permission_id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(permission_id) REFERENCES permissions (id)
+);
+
+CREATE TABLE events (
+	id INTEGER NOT NULL,
+	title VARCHAR(200) NOT NULL,
+	description TEXT,
+	event_type VARCHAR(50),
+	start_date DATETIME NOT NULL,
+	end_date DATETIME,
+	all_day BOOLEAN,
+	color VARCHAR(20),
+	created_by INTEGER,
+	target_role VARCHAR(20),
+	PRIMARY KEY (id),
+	FOREIGN KEY(created_by) REFERENCES users (id)
+);
+
+CREATE TABLE students (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	class_id INTEGER,
+	department_id INTEGER,
+	first_name VARCHAR(50) NOT NULL,
+	last_name VARCHAR(50) NOT NULL,
+	roll_no VARCHAR(20),
+	enrollment_no VARCHAR(30),
+	dob DATE,
+	gender VARCHAR(10),
+	blood_group VARCHAR(5),
+	phone VARCHAR(20),
+	parent_name VARCHAR(100),
+	parent_phone VARCHAR(20),
+	address TEXT,
+	admission_date DATE,
+	photo_file VARCHAR(100),
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES users (id),
+	FOREIGN KEY(class_id) REFERENCES classes (id),
+	FOREIGN KEY(department_id) REFERENCES departments (id),
+	UNIQUE (roll_no),
+	UNIQUE (enrollment_no)
+);
+
+CREATE TABLE timetable (
+	id INTEGER NOT NULL,
+	class_id INTEGER NOT NULL,
+	subject_id INTEGER NOT NULL,
+	teacher_id INTEGER NOT NULL,
+	day_of_week VARCHAR(20),
+	start_time TIME,
+	end_time TIME,
+	PRIMARY KEY (id),
+	FOREIGN KEY(class_id) REFERENCES classes (id),
+	FOREIGN KEY(subject_id) REFERENCES subjects (id),
+	FOREIGN KEY(teacher_id) REFERENCES teachers (id)
+);
+
+CREATE TABLE homework (
+	id INTEGER NOT NULL,
+	class_id INTEGER NOT NULL,
+	subject_id INTEGER NOT NULL,
+	teacher_id INTEGER NOT NULL,
+	title VARCHAR(200) NOT NULL,
+	description TEXT,
+	due_date DATE NOT NULL,
+	assigned_date DATETIME,
+	PRIMARY KEY (id),
+	FOREIGN KEY(class_id) REFERENCES classes (id),
+	FOREIGN KEY(subject_id) REFERENCES subjects (id),
+	FOREIGN KEY(teacher_id) REFERENCES teachers (id)
+);
+
+CREATE TABLE attendance (
+	id INTEGER NOT NULL,
+	student_id INTEGER NOT NULL,
+	date DATE NOT NULL,
+	status VARCHAR(20) NOT NULL,
+	remarks VARCHAR(255),
+	PRIMARY KEY (id),
+	FOREIGN KEY(student_id) REFERENCES students (id)
+);
+
+CREATE TABLE marks (
+	id INTEGER NOT NULL,
+	student_id INTEGER NOT NULL,
+	exam_id INTEGER NOT NULL,
+	subject_id INTEGER NOT NULL,
+	score_obtained FLOAT NOT NULL,
+	max_score FLOAT NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(student_id) REFERENCES students (id),
+	FOREIGN KEY(exam_id) REFERENCES exams (id),
+	FOREIGN KEY(subject_id) REFERENCES subjects (id)
+);
+
+CREATE TABLE fees (
+	id INTEGER NOT NULL,
+	student_id INTEGER NOT NULL,
+	title VARCHAR(100) NOT NULL,
+	amount FLOAT NOT NULL,
+	due_date DATE,
+	status VARCHAR(20),
+	paid_date DATE,
+	PRIMARY KEY (id),
+	FOREIGN KEY(student_id) REFERENCES students (id)
+);
+
+CREATE TABLE book_issues (
+	id INTEGER NOT NULL,
+	book_id INTEGER NOT NULL,
+	student_id INTEGER NOT NULL,
+	issue_date DATETIME,
+	due_date DATETIME,
+	return_date DATETIME,
+	status VARCHAR(20),
+	fine_amount FLOAT,
+	PRIMARY KEY (id),
+	FOREIGN KEY(book_id) REFERENCES books (id),
+	FOREIGN KEY(student_id) REFERENCES students (id)
+);
+
+CREATE TABLE id_cards (
+	id INTEGER NOT NULL,
+	student_id INTEGER NOT NULL,
+	card_number VARCHAR(50),
+	issue_date DATE,
+	expiry_date DATE,
+	is_active BOOLEAN,
+	PRIMARY KEY (id),
+	FOREIGN KEY(student_id) REFERENCES students (id),
+	UNIQUE (card_number)
+);
+
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import User, Student, Class, Department, Attendance, Fee, Announcement
+
+# dashboard_stats() is three statements; the rest are the login lookup, the
+# recent students and the announcements. It must not grow with the data.
+MAX_DASHBOARD_STATEMENTS = 6
+
+
+def _add_school(students, days):
+    department = Department(name='Science', code='SCI')
+    db.session.add(department)
+    db.session.flush()
+    school_class = Class(grade='10', section='A', department_id=department.id)
+    db.session.add(school_class)
+    db.session.flush()
+    for i in range(students):
+        user = User(username=f'student{i}', email=f'student{i}@example.com', role='student', is_approved=True)
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, first_name=f'S{i}', last_name='L', roll_no=str(i),
+                          class_id=school_class.id, department_id=department.id)
+        db.session.add(student)
+        db.session.flush()
+        for day in range(days):
+            db.session.add(Attendance(student_id=student.id, date=date.today() - timedelta(days=day),
+                                      status=('Present', 'Absent', 'Late')[(i + day) % 3]))
+        db.session.add(Fee(student_id=student.id, title='Term fee', amount=100,
+                           status=('Paid', 'Pending', 'Overdue')[i % 3], due_date=date.today()))
+
+
+@pytest.fixture
+def admin_client(app, client):
+    admin = User(username='admin', email='admin@example.com', role='admin', is_approved=True)
+    admin.set_password('secret')
+    db.session.add(admin)
+    db.session.add(Announcement(title='Welcome', content='Hello', created_by=1))
+    db.session.commit()
+    response = client.post('/login', data={'login_id': 'admin', 'password': 'secret'})
+    assert response.status_code == 302
+    return client
+
+
+def _dashboard_statements(client):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/admin/dashboard')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return statements
+
+
+@pytest.mark.parametrize('students, days', [(3, 2), (30, 14)])
+def test_dashboard_statement_count_is_capped(admin_client, students, days):
+    _add_school(students, days)
+    db.session.commit()
+
+    statements = _dashboard_statements(admin_client)
+    assert len(statements) <= MAX_DASHBOARD_STATEMENTS, '\n'.join(statements)
+
+
+def test_dashboard_statement_count_does_not_grow_with_data(admin_client):
+    _add_school(3, 2)
+    db.session.commit()
+    small = len(_dashboard_statements(admin_client))
+
+    db.session.add_all(Attendance(student_id=student.id, date=date.today() - timedelta(days=day), status='Present')
+                       for student in Student.query.all() for day in range(2, 7))
+    db.session.commit()
+    assert len(_dashboard_statements(admin_client)) == small
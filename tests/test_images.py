@@ -0,0 +1,60 @@
+import io
+import os
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from app import db
+from app.models import User, Student, Job
+from app.services.images import InvalidImageError, check_photo, save_student_photo, process_student_photo
+
+
+def _jpeg(size=(800, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def _upload(data):
+    return FileStorage(io.BytesIO(data), filename='photo.jpg')
+
+
+@pytest.fixture
+def student(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['PHOTO_STAGING_DIR'] = str(tmp_path / 'staging')
+    user = User(username='student', email='student@example.com', role='student', is_approved=True)
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.flush()
+    student = Student(user_id=user.id, first_name='Asha', last_name='Rao', roll_no='1')
+    db.session.add(student)
+    db.session.commit()
+    return student
+
+
+def test_truncated_photo_is_rejected_by_the_check(app):
+    data = _jpeg()
+    assert check_photo(_upload(data)).data == data
+    with pytest.raises(InvalidImageError):
+        check_photo(_upload(data[:len(data) // 2]))
+
+
+def test_photo_is_resized_by_a_job_not_in_the_upload(app, student):
+    job = save_student_photo(student.id, check_photo(_upload(_jpeg())))
+
+    assert isinstance(job, Job) and job.status == 'queued'
+    assert db.session.get(Student, student.id).photo_file == 'default.jpg'
+    staged_path = os.path.join(app.config['PHOTO_STAGING_DIR'], os.listdir(app.config['PHOTO_STAGING_DIR'])[0])
+
+    result = process_student_photo(None, student.id, staged_path)
+    assert db.session.get(Student, student.id).photo_file == result['photo']
+    assert not os.path.exists(staged_path)
+    assert sorted(os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], 'photos'))) == sorted(
+        f"{result['photo']}-{variant}.{ext}" for variant in ('thumb', 'medium') for ext in ('webp', 'jpg'))
+
+
+def test_photo_inline_renders_in_the_upload(app, student):
+    app.config['PHOTO_INLINE'] = True
+    photo = check_photo(_upload(_jpeg()))
+    assert save_student_photo(student.id, photo) is None
+    assert db.session.get(Student, student.id).photo_file == photo.key
@@ -0,0 +1,43 @@
+import pytest
+from app import db
+from app.models import User, Student, Book, BookIssue
+
+
+@pytest.fixture
+def admin_client(app, client):
+    admin = User(username='admin', email='admin@example.com', role='admin', is_approved=True)
+    admin.set_password('secret')
+    db.session.add(admin)
+    db.session.commit()
+    response = client.post('/login', data={'login_id': 'admin', 'password': 'secret'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def books(app):
+    user = User(username='student', email='student@example.com', role='student', is_approved=True)
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.flush()
+    student = Student(user_id=user.id, first_name='Asha', last_name='Rao', roll_no='1')
+    issued, unused = Book(title='Issued'), Book(title='Unused')
+    db.session.add_all([student, issued, unused])
+    db.session.flush()
+    db.session.add(BookIssue(book_id=issued.id, student_id=student.id, status='returned'))
+    db.session.commit()
+    return issued.id, unused.id
+
+
+def test_book_without_issues_is_deleted(admin_client, books):
+    response = admin_client.post(f'/admin/library/delete/{books[1]}', follow_redirects=True)
+    assert response.status_code == 200
+    assert db.session.get(Book, books[1]) is None
+
+
+def test_book_with_issue_records_is_kept(admin_client, books):
+    response = admin_client.post(f'/admin/library/delete/{books[0]}', follow_redirects=True)
+    assert response.status_code == 200
+    assert b'cannot be deleted' in response.data
+    assert db.session.get(Book, books[0]) is not None
+    assert BookIssue.query.filter_by(book_id=books[0]).count() == 1
@@ -0,0 +1,65 @@
+import os
+from datetime import date
+import pytest
+from app import create_app, db
+from app.models import User, Student, Class, Department, Fee
+from app.services import receipts
+from app.services.receipts import receipt_data, receipt_digest, ensure_receipts
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def paid_fees(app, tmp_path):
+    app.config['RECEIPT_DIR'] = str(tmp_path / 'receipts')
+    department = Department(name='Science', code='SCI')
+    db.session.add(department)
+    db.session.flush()
+    school_class = Class(grade='10', section='A', department_id=department.id)
+    db.session.add(school_class)
+    db.session.flush()
+    user = User(username='student', email='student@example.com', role='student', is_approved=True)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.flush()
+    student = Student(user_id=user.id, first_name='Asha', last_name='Rao', roll_no='1',
+                      class_id=school_class.id, department_id=department.id)
+    db.session.add(student)
+    db.session.flush()
+    for title in ('Term fee', 'Bus fee', 'Lab fee'):
+        db.session.add(Fee(student_id=student.id, title=title, amount=100, status='Paid',
+                           due_date=date.today(), paid_date=date.today()))
+    db.session.commit()
+    return Fee.query.order_by(Fee.id).all()
+
+
+def test_receipt_dir_is_not_served_as_static_files():
+    app = create_app(TestConfig)
+    assert app.config['RECEIPT_DIR'] == os.path.join(app.instance_path, 'receipts')
+    assert os.path.commonpath([app.config['RECEIPT_DIR'], app.static_folder]) != app.static_folder
+
+
+def test_receipt_download_is_conditional_without_naming_the_file(app, client, paid_fees):
+    client.post('/login', data={'login_id': 'student', 'password': 'secret'})
+    response = client.get(f'/fees/receipt/{paid_fees[0].id}')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+
+    digest = receipt_digest(receipt_data(Fee.id == paid_fees[0].id)[0])
+    stored = [name for _, _, names in os.walk(app.config['RECEIPT_DIR']) for name in names]
+    assert stored == [f'{digest}.pdf']
+    # The ETag must not name the stored file
+    assert digest not in response.headers['ETag']
+
+    repeat = client.get(f'/fees/receipt/{paid_fees[0].id}', headers={'If-None-Match': response.headers['ETag']})
+    assert repeat.status_code == 304
+
+
+def test_term_receipts_render_in_process_without_a_process_pool(app, paid_fees, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError(38, 'Function not implemented')
+
+    app.config['RECEIPT_WORKERS'] = 4
+    monkeypatch.setattr(receipts, 'ProcessPoolExecutor', unavailable)
+    stored = ensure_receipts(receipt_data())
+    assert len(stored) == 3
+    assert all(os.path.exists(path) for _, path in stored)
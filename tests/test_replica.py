@@ -0,0 +1,39 @@
+import pytest
+from flask import g
+from sqlalchemy import select
+from app import create_app, db, cache
+from app.models import Fee
+from app.services.replica import REPLICA_BIND
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_BINDS = {REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"}
+        CACHE_TYPE = 'lru'
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        yield app
+    # init_app registered an (empty) metadata for the bind; later apps do not configure it
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def _engine():
+    return db.session.get_bind(clause=select(Fee))
+
+
+def test_read_replica_views_select_from_the_replica(replica_app):
+    with replica_app.test_request_context():
+        g.read_replica = True
+        assert _engine() is db.engines[REPLICA_BIND]
+
+
+def test_cache_entries_are_computed_on_the_primary(replica_app):
+    with replica_app.test_request_context():
+        g.read_replica = True
+        assert cache.get_or_set('fees', _engine, depends_on=(Fee,)) is db.engine
+        # Only the computation moves; the rest of the view stays on the replica
+        assert _engine() is db.engines[REPLICA_BIND]
@@ -0,0 +1,59 @@
+import json
+import zipfile
+import pytest
+from pypdf import PdfReader
+from app import db
+from app.models import User, Student, Class, Department, Job
+from app.services import report_cards
+from app.services.jobs import JobContext
+from app.services.report_cards import CHUNK_SIZE, start_batch, run_batch
+
+STUDENTS = CHUNK_SIZE + 5
+
+
+@pytest.fixture
+def school_class(app, tmp_path):
+    app.config['JOB_OUTPUT_DIR'] = str(tmp_path / 'jobs')
+    department = Department(name='Science', code='SCI')
+    db.session.add(department)
+    db.session.flush()
+    school_class = Class(grade='10', section='A', department_id=department.id)
+    db.session.add(school_class)
+    db.session.flush()
+    for i in range(STUDENTS):
+        user = User(username=f'student{i}', email=f'student{i}@example.com', role='student', is_approved=True)
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Student(user_id=user.id, first_name=f'S{i}', last_name='L', roll_no=str(i),
+                               class_id=school_class.id, department_id=department.id))
+    db.session.commit()
+    return school_class
+
+
+def _run(job):
+    # run_batch() removes the session, so read the job first
+    context, payload = JobContext(job.id, 1), json.loads(job.payload)
+    return context.output_path(run_batch(context, **payload)['file'])
+
+
+def test_batch_renders_in_process_with_one_worker(app, school_class, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError('no process pool with REPORT_CARD_WORKERS = 1')
+
+    app.config['REPORT_CARD_WORKERS'] = 1
+    monkeypatch.setattr(report_cards, 'ProcessPoolExecutor', no_pool)
+    path = _run(start_batch('class', school_class.id, 'pdf'))
+    assert len(PdfReader(path).pages) == STUDENTS
+    assert db.session.get(Job, 1).progress == STUDENTS
+
+
+def test_batch_falls_back_to_in_process_without_a_process_pool(app, school_class, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError(38, 'Function not implemented')
+
+    app.config['REPORT_CARD_WORKERS'] = 2
+    monkeypatch.setattr(report_cards, 'ProcessPoolExecutor', unavailable)
+    path = _run(start_batch('class', school_class.id, 'zip'))
+    with zipfile.ZipFile(path) as archive:
+        assert len(archive.namelist()) == STUDENTS
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.services.schema import ensure_schema, head_revisions
+from tests.conftest import TestConfig
+
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), 'fixtures', 'baseline_schema.sql')
+
+
+def test_baseline_database_is_upgraded_to_every_model_table(tmp_path):
+    path = tmp_path / 'legacy.db'
+    with sqlite3.connect(path) as conn, open(BASELINE_SCHEMA) as f:
+        conn.executescript(f.read())
+        conn.execute("INSERT INTO users (username, email, role) VALUES ('old', 'old@example.com', 'admin')")
+
+    class LegacyConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        STARTUP_MIGRATIONS = True
+
+    app = create_app(LegacyConfig)
+    assert ensure_schema(app) == 'upgraded'
+
+    with app.app_context():
+        tables = set(inspect(db.engine).get_table_names())
+        assert set(db.metadata.tables) <= tables
+        with db.engine.connect() as conn:
+            assert {row[0] for row in conn.execute(text('SELECT version_num FROM alembic_version'))} \
+                == head_revisions()
+            assert conn.execute(text("SELECT is_approved FROM users WHERE username = 'old'")).scalar() == 1
+
+    assert ensure_schema(app) == 'current'
+
+
+def test_create_all_database_is_stamped_at_head(tmp_path):
+    class CreateAllConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'init_db.db'}"
+        STARTUP_MIGRATIONS = True
+
+    app = create_app(CreateAllConfig)
+    with app.app_context():
+        db.create_all()
+
+    assert ensure_schema(app) == 'stamped'
+    with app.app_context(), db.engine.connect() as conn:
+        assert {row[0] for row in conn.execute(text('SELECT version_num FROM alembic_version'))} \
+            == head_revisions()
+    assert ensure_schema(app) == 'current'
+
+
+def test_baseline_with_duplicated_rows_is_upgraded(tmp_path):
+    path = tmp_path / 'duplicates.db'
+    with sqlite3.connect(path) as conn, open(BASELINE_SCHEMA) as f:
+        conn.executescript(f.read())
+        conn.execute("INSERT INTO users (id, username, email, role) VALUES (1, 'old', 'old@example.com', 'student')")
+        # A user with two student profiles, and attendance marked twice for one day
+        conn.executemany("INSERT INTO students (id, user_id, first_name, last_name) VALUES (?, 1, 'A', 'B')",
+                         [(1,), (2,)])
+        conn.executemany("INSERT INTO attendance (student_id, date, status) VALUES (1, '2024-01-02', ?)",
+                         [('Absent',), ('Present',)])
+
+    class LegacyConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        STARTUP_MIGRATIONS = True
+
+    app = create_app(LegacyConfig)
+    assert ensure_schema(app) == 'upgraded'
+    with app.app_context(), db.engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM students WHERE user_id = 1')).scalar() == 2
+        assert conn.execute(text('SELECT status FROM attendance')).scalars().all() == ['Present']
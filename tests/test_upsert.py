@@ -0,0 +1,52 @@
+from datetime import date
+import pytest
+from app import db
+from app.models import User, Student, Class, Department, Subject, Exam, Mark, AttendanceDailySummary
+from app.services.attendance import save_class_attendance, load_class_attendance
+from app.services.marks import save_marks, load_marks
+
+
+@pytest.fixture
+def students(app):
+    department = Department(name='Science', code='SCI')
+    db.session.add(department)
+    db.session.flush()
+    school_class = Class(grade='10', section='A', department_id=department.id)
+    db.session.add_all([school_class, Subject(name='Physics', code='PHY'), Exam(name='Midterm')])
+    db.session.flush()
+    students = []
+    for i in range(3):
+        user = User(username=f'student{i}', email=f'student{i}@example.com', role='student', is_approved=True)
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.flush()
+        students.append(Student(user_id=user.id, first_name=f'S{i}', last_name='L', roll_no=str(i),
+                                class_id=school_class.id, department_id=department.id))
+    db.session.add_all(students)
+    db.session.commit()
+    return students
+
+
+def test_saving_marks_again_updates_them_in_place(students):
+    rows = [{'student_id': s.id, 'subject_id': 1, 'exam_id': 1, 'score_obtained': 50, 'max_score': 100}
+            for s in students]
+    save_marks(rows)
+    db.session.commit()
+    save_marks([dict(rows[0], score_obtained=75)])
+    db.session.commit()
+
+    assert Mark.query.count() == 3
+    assert load_marks(students[0].class_id, 1, 1) == {students[0].id: 75, students[1].id: 50, students[2].id: 50}
+
+
+def test_remarking_attendance_moves_the_summary_counts(students):
+    today = date.today()
+    class_id = students[0].class_id
+    save_class_attendance(class_id, today, students, {s.id: 'Present' for s in students})
+    db.session.commit()
+    save_class_attendance(class_id, today, students, {students[0].id: 'Absent'})
+    db.session.commit()
+
+    assert load_class_attendance(class_id, today)[students[0].id] == 'Absent'
+    summary = AttendanceDailySummary.query.one()
+    assert (summary.present, summary.absent, summary.late) == (2, 1, 0)